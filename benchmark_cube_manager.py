@@ -0,0 +1,373 @@
+"""
+Scaling benchmark - times distribute and compose in headless Blender
+
+Usage:
+    blender --background --python benchmark_cube_manager.py -- [options]
+
+Options:
+    --output FILE       JSON file to write (default: benchmark_results.json)
+    --max-cubes N       Largest distribute case (default: 100000)
+    --max-compose N     Largest compose case (default: 10000)
+    --repeat N          Timed runs per case, best one kept (default: 1)
+
+Every case records the wall time of the whole operator and of each phase
+the operator reports with Record Timings on, then runs once more with Track
+Memory on for the peak Python memory of each phase (NumPy buffers
+included). Timed runs never have tracemalloc on. The peak resident size
+of the timed runs is restarted for every case on Linux, so it is the case's
+own; on macOS and Windows it is the process's peak so far, and where it
+cannot be read at all it is recorded as null.
+"""
+import bpy
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Get the addon directory
+addon_dir = os.path.dirname(os.path.abspath(__file__))
+
+DISTRIBUTE_COUNTS = (10, 100, 1000, 10000, 100000)
+OBSTACLE_COUNTS = (1000, 10000, 100000)
+COMPOSE_COUNTS = (10, 100, 1000, 10000)
+COMPOSE_LAYOUTS = ("line", "grid", "block", "rotated", "bricks")
+# Layouts that are not axis-aligned unit cubes, so compose takes the general
+# path instead of the lattice one
+GENERAL_LAYOUTS = ("rotated", "bricks")
+ROTATED_ANGLE = math.radians(30)
+BRICK_SCALE = (2.0, 1.0, 0.5)
+# Compose options per case; worker tiles only run on the general path
+COMPOSE_MODES = ("serial", "parallel", "stream")
+
+
+def parse_args():
+    """Read the options after Blender's "--" separator"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    options = {
+        "output": os.path.join(os.getcwd(), "benchmark_results.json"),
+        "max_cubes": 100000,
+        "max_compose": 10000,
+        "repeat": 1,
+    }
+    for flag, value in zip(argv[::2], argv[1::2]):
+        key = flag.lstrip("-").replace("-", "_")
+        if key not in options:
+            print(f"Unknown option: {flag}")
+            sys.exit(1)
+        options[key] = type(options[key])(value)
+    return options
+
+
+def install_addon():
+    """Install the addon package from a zip and enable it, returning its module"""
+    addon_zip = shutil.make_archive(os.path.join(tempfile.mkdtemp(), "cube_mesh_manager"),
+                                    "zip", addon_dir, "cube_mesh_manager")
+    bpy.ops.preferences.addon_install(filepath=addon_zip)
+    bpy.ops.preferences.addon_enable(module="cube_mesh_manager")
+    return sys.modules["cube_mesh_manager"]
+
+
+class PhaseTimer:
+    """Accumulate wall time per named phase"""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+
+def reset_peak_rss():
+    """Restart the peak resident set size from the current one
+
+    Only Linux can do this (through /proc/self/clear_refs); returns whether
+    the reset happened.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def windows_peak_rss_bytes():
+    """Peak working set of this process on Windows, or None"""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD)] + [
+                   (field, ctypes.c_size_t) for field in (
+                       "PeakWorkingSetSize", "WorkingSetSize",
+                       "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                       "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                       "PagefileUsage", "PeakPagefileUsage")]
+
+    kernel32 = ctypes.WinDLL("kernel32")
+    psapi = ctypes.WinDLL("psapi")
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi.GetProcessMemoryInfo.argtypes = [
+        wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(),
+                                      ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def peak_rss_bytes():
+    """Peak resident set size since the last reset_peak_rss, or None
+
+    Falls back to the peak of the whole process so far where the peak
+    cannot be reset, and to None where no peak can be read.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if sys.platform == "win32":
+        return windows_peak_rss_bytes()
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def clear_scene(addon):
+    """Remove every object and mesh and forget cached bounds"""
+    bpy.data.batch_remove(list(bpy.data.objects))
+    bpy.data.batch_remove(list(bpy.data.meshes))
+    for collection in list(bpy.data.collections):
+        bpy.data.collections.remove(collection)
+    addon.bounds_cache.clear()
+
+
+def add_obstacles(addon, count, n, seed=0):
+    """Scatter count boxes of random size over the area n cubes will cover"""
+    rng = np.random.default_rng(seed)
+    rows, cols = addon.core.grid_dimensions(n)
+    spacing = addon.core.DEFAULT_SPACING
+    positions = np.zeros((count, 3))
+    positions[:, 0] = rng.uniform(0, cols * spacing, count)
+    positions[:, 1] = rng.uniform(0, rows * spacing, count)
+
+    collection = bpy.data.collections.new("Obstacles")
+    bpy.context.scene.collection.children.link(collection)
+    objects = addon.create_cube_objects(collection, positions, 1.0, "Obstacle",
+                                        shared_mesh=True)
+    for obj, scale in zip(objects, rng.uniform(0.5, 3.0, (count, 3))):
+        obj.scale = scale
+    bpy.context.view_layer.update()
+
+
+def compose_positions(layout, n):
+    """Centres of n touching boxes in a line, a square or a block
+
+    Boxes are unit cubes, except that a rotated block is turned by
+    ROTATED_ANGLE about Z and a block of bricks is scaled by BRICK_SCALE.
+    """
+    if layout == "line":
+        shape = (n, 1, 1)
+    elif layout == "grid":
+        side = math.ceil(math.sqrt(n))
+        shape = (side, side, 1)
+    else:
+        side = math.ceil(n ** (1 / 3))
+        shape = (side, side, side)
+    cells = np.indices(shape).reshape(3, -1).T[:n].astype(np.float64)
+    if layout == "rotated":
+        cos, sin = math.cos(ROTATED_ANGLE), math.sin(ROTATED_ANGLE)
+        cells = cells @ np.array([[cos, sin, 0], [-sin, cos, 0], [0, 0, 1]])
+    elif layout == "bricks":
+        cells *= BRICK_SCALE
+    return cells
+
+
+def add_compose_scene(addon, layout, n):
+    """Create and select n touching boxes laid out for composing"""
+    collection = addon.get_cube_collection(bpy.context)
+    objects = addon.create_cube_objects(collection, compose_positions(layout, n),
+                                        1.0, "Block")
+    for obj in objects:
+        if layout == "rotated":
+            obj.rotation_euler = (0.0, 0.0, ROTATED_ANGLE)
+        elif layout == "bricks":
+            obj.scale = BRICK_SCALE
+    bpy.context.view_layer.update()
+    for obj in objects:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = objects[0]
+
+
+def run_operator(timer, operator, trace_memory):
+    """Run operator with Record Timings on and collect its phases
+
+    Adds the operator's own phase timings to timer and returns the result
+    and the peak traced memory of each phase (empty unless trace_memory).
+    """
+    props = bpy.context.scene.cube_manager_props
+    props.record_stats = True
+    props.trace_memory = trace_memory
+    props.last_stats = ""
+    with timer.phase("operator"):
+        result = operator()
+
+    phases = json.loads(props.last_stats)["phases"] if props.last_stats else {}
+    for name, phase in phases.items():
+        timer.phases[name] = timer.phases.get(name, 0.0) + phase["seconds"]
+    peaks = {name: phase["peak_bytes"] for name, phase in phases.items()
+             if "peak_bytes" in phase}
+    return result, peaks
+
+
+def run_distribute(addon, timer, n, obstacles, trace_memory=False):
+    """Time one distribute of n cubes into a scene with obstacle boxes"""
+    scene = bpy.context.scene
+    if obstacles:
+        add_obstacles(addon, obstacles, n)
+    scene.cube_manager_props.number_of_cubes = n
+    scene.cube_manager_props.soft_limit = max(n, 1)
+    return run_operator(timer, bpy.ops.cube.distribute_cubes, trace_memory)
+
+
+def run_compose(addon, timer, layout, n, mode="serial", trace_memory=False):
+    """Time one compose of n touching boxes with the options of mode"""
+    props = bpy.context.scene.cube_manager_props
+    props.parallel_compose = mode == "parallel"
+    props.stream_compose = mode == "stream"
+    add_compose_scene(addon, layout, n)
+    return run_operator(timer, bpy.ops.cube.compose_mesh, trace_memory)
+
+
+def measure(addon, name, params, run, repeat):
+    """Run a case repeat times for timings, then once for peak memory
+
+    The memory run turns on the operators' Track Memory option, so the
+    peaks are per phase; the timed runs leave tracemalloc off. The process
+    peak covers the timed runs only: where the peak can be reset it is the
+    case's own, and rss_growth_bytes is how far it rose above the resident
+    size the case started from. Elsewhere the peak is the process's so far
+    and the growth only counts a case that raised it. Both are None where
+    the platform gives no peak.
+    """
+    clear_scene(addon)
+    reset = reset_peak_rss()
+    start_rss = peak_rss_bytes()
+    best = None
+    for _ in range(repeat):
+        clear_scene(addon)
+        timer = PhaseTimer()
+        result, _ = run(timer)
+        if best is None or timer.phases["operator"] < best.phases["operator"]:
+            best = timer
+    peak_rss = peak_rss_bytes()
+
+    clear_scene(addon)
+    _, peaks = run(PhaseTimer(), trace_memory=True)
+    clear_scene(addon)
+    peak_python = max(peaks.values(), default=0)
+
+    record = dict(params)
+    record.update({
+        "name": name,
+        "result": sorted(result),
+        "phases": {key: round(value, 6) for key, value in best.phases.items()},
+        "peak_bytes": peaks,
+        "peak_python_bytes": peak_python,
+        "peak_rss_bytes": peak_rss,
+        "rss_growth_bytes": (None if peak_rss is None or start_rss is None
+                             else max(peak_rss - start_rss, 0)),
+        "peak_rss_reset": reset,
+    })
+    print(f"{name:<32} {best.phases['operator']:>10.3f} s  "
+          f"{peak_python / 2**20:>8.1f} MiB")
+    return record
+
+
+def run_benchmarks(addon, options):
+    """Run every case within the size limits and return the records"""
+    records = []
+    repeat = options["repeat"]
+
+    for n in DISTRIBUTE_COUNTS:
+        if n <= options["max_cubes"]:
+            records.append(measure(
+                addon, f"distribute/{n}",
+                {"operation": "distribute", "cubes": n, "obstacles": 0},
+                lambda timer, n=n, **kw: run_distribute(addon, timer, n, 0, **kw),
+                repeat))
+
+    for n in OBSTACLE_COUNTS:
+        if n <= options["max_cubes"]:
+            obstacles = max(n // 10, 1)
+            records.append(measure(
+                addon, f"distribute/{n}/obstacles-{obstacles}",
+                {"operation": "distribute", "cubes": n, "obstacles": obstacles},
+                lambda timer, n=n, k=obstacles, **kw: run_distribute(
+                    addon, timer, n, k, **kw),
+                repeat))
+
+    for layout in COMPOSE_LAYOUTS:
+        for mode in COMPOSE_MODES:
+            if mode == "parallel" and layout not in GENERAL_LAYOUTS:
+                continue
+            suffix = "" if mode == "serial" else f"/{mode}"
+            for n in COMPOSE_COUNTS:
+                if n <= options["max_compose"]:
+                    records.append(measure(
+                        addon, f"compose/{layout}/{n}{suffix}",
+                        {"operation": "compose", "layout": layout, "mode": mode,
+                         "cubes": n},
+                        lambda timer, layout=layout, n=n, mode=mode, **kw: run_compose(
+                            addon, timer, layout, n, mode, **kw),
+                        repeat))
+    return records
+
+
+def main():
+    options = parse_args()
+    addon = install_addon()
+
+    print("=" * 60)
+    print("CUBE MESH MANAGER BENCHMARK")
+    print("=" * 60)
+    records = run_benchmarks(addon, options)
+
+    report = {
+        "blender": bpy.app.version_string,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "options": options,
+        "cases": records,
+    }
+    with open(options["output"], "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {options['output']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Stand-in for the parts of bmesh the addon uses
+
+A BMesh holds Python vertex and face objects; edges are implied by the
+faces and rebuilt when written back to a mesh.
+"""
+import numpy as np
+from mathutils import Vector
+
+from . import ops
+
+
+class BMVert:
+    __slots__ = ("co", "index", "select", "is_valid", "link_faces")
+
+    def __init__(self, co, index):
+        self.co = Vector(co)
+        self.index = index
+        self.select = False
+        self.is_valid = True
+        self.link_faces = []
+
+
+class BMFace:
+    __slots__ = ("verts", "index", "select", "is_valid")
+
+    def __init__(self, verts, index):
+        self.verts = list(verts)
+        self.index = index
+        self.select = False
+        self.is_valid = True
+
+
+class BMElemSeq:
+    """bm.verts and bm.faces: a list of elements, skipping deleted ones"""
+
+    def __init__(self):
+        self._elements = []
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __iter__(self):
+        return iter(list(self._elements))
+
+    def __getitem__(self, index):
+        return self._elements[index]
+
+    def ensure_lookup_table(self):
+        pass
+
+    def index_update(self):
+        for index, element in enumerate(self._elements):
+            element.index = index
+
+    def _purge(self):
+        self._elements = [element for element in self._elements if element.is_valid]
+
+
+class BMVertSeq(BMElemSeq):
+    def new(self, co=(0.0, 0.0, 0.0)):
+        vert = BMVert(co, len(self._elements))
+        self._elements.append(vert)
+        return vert
+
+
+class BMFaceSeq(BMElemSeq):
+    def new(self, verts):
+        face = BMFace(verts, len(self._elements))
+        self._elements.append(face)
+        for vert in face.verts:
+            vert.link_faces.append(face)
+        return face
+
+
+class BMesh:
+    def __init__(self):
+        self.verts = BMVertSeq()
+        self.faces = BMFaceSeq()
+        self.is_valid = True
+
+    def from_mesh(self, mesh):
+        """Append the vertices and faces of mesh"""
+        first = len(self.verts)
+        verts = [self.verts.new(co) for co in mesh._co.tolist()]
+        for index, vert in enumerate(verts, first):
+            vert.index = index
+        for polygon in mesh._polygon_vertices():
+            self.faces.new([verts[v] for v in polygon])
+
+    def to_mesh(self, mesh):
+        """Replace the geometry of mesh with this BMesh"""
+        self.verts._purge()
+        self.faces._purge()
+        self.verts.index_update()
+        self.faces.index_update()
+        co = np.array([tuple(vert.co) for vert in self.verts],
+                      dtype=np.float32).reshape(-1, 3)
+        faces = [[vert.index for vert in face.verts] for face in self.faces]
+        mesh.from_pydata(co, [], faces)
+
+    def free(self):
+        self.is_valid = False
+        self.verts = BMVertSeq()
+        self.faces = BMFaceSeq()
+
+
+def new():
+    return BMesh()
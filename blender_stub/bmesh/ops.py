@@ -0,0 +1,83 @@
+"""
+Stand-in for the bmesh.ops the addon uses
+"""
+import numpy as np
+from mathutils import Vector
+
+
+def transform(bm, matrix, verts, space=None, use_shapekey=False):
+    """Multiply verts by matrix in place"""
+    if not verts:
+        return {}
+    matrix = np.asarray(matrix, dtype=np.float64)
+    co = np.array([tuple(vert.co) for vert in verts])
+    co = co @ matrix[:3, :3].T + matrix[:3, 3]
+    for vert, value in zip(verts, co):
+        vert.co = Vector(value)
+    return {}
+
+
+def delete(bm, geom, context='VERTS'):
+    """Delete geometry; FACES_ONLY keeps the vertices of deleted faces"""
+    faces = [element for element in geom if hasattr(element, "verts")]
+    verts = [element for element in geom if not hasattr(element, "verts")]
+
+    if context == 'VERTS':
+        for vert in verts:
+            vert.is_valid = False
+            faces.extend(vert.link_faces)
+    for face in faces:
+        if not face.is_valid:
+            continue
+        face.is_valid = False
+        for vert in face.verts:
+            vert.link_faces = [f for f in vert.link_faces if f is not face]
+    if context == 'FACES':
+        # Vertices left without faces go too
+        for face in faces:
+            for vert in face.verts:
+                if not vert.link_faces:
+                    vert.is_valid = False
+
+    bm.verts._purge()
+    bm.faces._purge()
+    return {}
+
+
+def remove_doubles(bm, verts, dist=0.0001):
+    """Merge verts that lie within dist of each other"""
+    verts = [vert for vert in verts if vert.is_valid]
+    if not verts:
+        return {}
+    co = np.array([tuple(vert.co) for vert in verts])
+    cells = np.floor(co / max(dist, 1e-12)).astype(np.int64)
+
+    grid = {}
+    for index, cell in enumerate(map(tuple, cells.tolist())):
+        grid.setdefault(cell, []).append(index)
+
+    target = list(range(len(verts)))
+    for index, cell in enumerate(map(tuple, cells.tolist())):
+        if target[index] != index:
+            continue
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    neighbour = (cell[0] + dx, cell[1] + dy, cell[2] + dz)
+                    for other in grid.get(neighbour, ()):
+                        if (other > index and target[other] == other and
+                                np.linalg.norm(co[other] - co[index]) <= dist):
+                            target[other] = index
+
+    for index, keep in enumerate(target):
+        if keep == index:
+            continue
+        merged, kept = verts[index], verts[keep]
+        for face in merged.link_faces:
+            face.verts = [kept if vert is merged else vert for vert in face.verts]
+            kept.link_faces.append(face)
+        merged.link_faces = []
+        merged.is_valid = False
+
+    bm.verts._purge()
+    return {}
@@ -0,0 +1,119 @@
+"""
+Stand-in for Blender's bpy module
+
+Covers the subset of bpy the addon, its tests and its benchmark use, so the
+operators' execute methods run under plain CPython (and cProfile) with
+only NumPy installed. Put the blender_stub directory first on sys.path:
+
+    PYTHONPATH=blender_stub python benchmark_cube_manager.py
+
+The stub models data, not drawing: there is no viewport, rendering or
+undo, and operators run synchronously.
+"""
+import re
+
+from . import app, props, types
+
+
+class _IDCollection:
+    """bpy.data.objects, bpy.data.meshes and friends"""
+
+    def __init__(self, id_type):
+        self.id_type = id_type
+        self._items = {}
+        self._next_suffix = {}
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return item in self._items
+        return self._items.get(item.name) is item
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._items[key]
+        return list(self._items.values())[key]
+
+    def get(self, name, default=None):
+        return self._items.get(name, default)
+
+    def keys(self):
+        return list(self._items)
+
+    def values(self):
+        return list(self._items.values())
+
+    def _unique_name(self, name):
+        """Return name, or name.001, name.002... if it is taken"""
+        if name not in self._items:
+            return name
+        match = re.fullmatch(r"(.*)\.(\d{3,})", name)
+        stem = match.group(1) if match else name
+        suffix = self._next_suffix.get(stem, 1)
+        while f"{stem}.{suffix:03d}" in self._items:
+            suffix += 1
+        self._next_suffix[stem] = suffix + 1
+        return f"{stem}.{suffix:03d}"
+
+    def _add(self, id_data):
+        id_data._name = self._unique_name(id_data._name)
+        self._items[id_data._name] = id_data
+        return id_data
+
+    def _rename(self, id_data, name):
+        del self._items[id_data._name]
+        id_data._name = name
+        self._add(id_data)
+
+    def new(self, name, *args):
+        return self._add(self.id_type(name, *args))
+
+    def remove(self, id_data, do_unlink=True, do_id_user=True, do_ui_user=True):
+        if self._items.get(id_data.name) is not id_data:
+            raise ReferenceError(f"{id_data!r} is not in bpy.data")
+        del self._items[id_data.name]
+        id_data._removed()
+
+
+class BlendData:
+    """Stand-in for bpy.types.BlendData"""
+
+    def __init__(self):
+        self.objects = _IDCollection(types.Object)
+        self.meshes = _IDCollection(types.Mesh)
+        self.collections = _IDCollection(types.Collection)
+        self.scenes = _IDCollection(types.Scene)
+        self.filepath = ""
+
+    def batch_remove(self, ids):
+        for id_data in list(ids):
+            collection = getattr(self, id_data._data_attr)
+            if id_data in collection:
+                collection.remove(id_data)
+
+    def orphans_purge(self):
+        removed = 0
+        for mesh in self.meshes:
+            if mesh.users == 0:
+                self.meshes.remove(mesh)
+                removed += 1
+        return removed
+
+
+def _reset():
+    """Start over with one empty scene, like File > New > General"""
+    global data, context
+    data = BlendData()
+    context = types.Context(data.scenes.new("Scene"))
+
+
+data = None
+context = None
+_reset()
+
+from . import ops, path, utils  # noqa: E402  (they use data and context)
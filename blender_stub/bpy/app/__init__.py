@@ -0,0 +1,8 @@
+"""
+Stand-in for bpy.app
+"""
+from . import handlers, timers
+
+version = (4, 1, 0)
+version_string = "4.1.0 (stub)"
+background = True
@@ -0,0 +1,24 @@
+"""
+Stand-in for bpy.app.handlers
+
+The lists are real; the stub calls depsgraph_update_post when a view layer
+is updated or an operator finishes, the frame change lists from
+Scene.frame_set, and the other lists only when a caller does.
+"""
+
+depsgraph_update_pre = []
+depsgraph_update_post = []
+load_pre = []
+load_post = []
+undo_pre = []
+undo_post = []
+redo_pre = []
+redo_post = []
+frame_change_pre = []
+frame_change_post = []
+
+
+def persistent(function):
+    """Mark a handler to be kept across file loads (a no-op here)"""
+    function._bpy_persistent = True
+    return function
@@ -0,0 +1,37 @@
+"""
+Stand-in for bpy.app.timers
+
+Nothing runs timers on its own. run_pending() calls every registered
+function once, and again after the interval it returns, until each one
+returns None or is unregistered.
+"""
+
+_registered = []
+
+
+def register(function, first_interval=0.0, persistent=False):
+    if function not in _registered:
+        _registered.append(function)
+
+
+def unregister(function):
+    if function not in _registered:
+        raise ValueError("Error: function is not registered")
+    _registered.remove(function)
+
+
+def is_registered(function):
+    return function in _registered
+
+
+def run_pending(limit=None):
+    """Run registered timers until none is left, or limit rounds passed"""
+    rounds = 0
+    while _registered and (limit is None or rounds < limit):
+        for function in list(_registered):
+            if function not in _registered:
+                continue
+            if function() is None and function in _registered:
+                _registered.remove(function)
+        rounds += 1
+    return rounds
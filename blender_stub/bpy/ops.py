@@ -0,0 +1,180 @@
+"""
+Stand-in for bpy.ops
+
+bpy.ops.<category>.<name>(...) runs a registered Operator subclass or one
+of the few built-in operators below. Like a script call in Blender, it
+checks poll, runs execute (or invoke with 'INVOKE_DEFAULT'), updates the
+view layer and returns the result set.
+"""
+import importlib
+import os
+import sys
+import tempfile
+import zipfile
+
+import bpy
+
+from . import types
+
+_registered = {}
+_builtins = {}
+_enabled_addons = {}
+
+
+def _builtin(idname):
+    def decorate(function):
+        _builtins[idname] = function
+        return function
+    return decorate
+
+
+def _run_operator(cls, idname, context, execution_context, properties):
+    operator = cls()
+    for name, value in properties.items():
+        setattr(operator, name, value)
+    if hasattr(cls, "poll") and not cls.poll(context):
+        raise RuntimeError(f"Operator bpy.ops.{idname}.poll() failed, "
+                           f"context is incorrect")
+    if execution_context.startswith("INVOKE") and hasattr(operator, "invoke"):
+        result = operator.invoke(context, types.Event())
+    else:
+        result = operator.execute(context)
+    return result
+
+
+def call(idname, *args, **properties):
+    """Run the operator called idname ("category.name")"""
+    context = bpy.context
+    execution_context = args[0] if args and isinstance(args[0], str) else "EXEC_DEFAULT"
+    if idname in _registered:
+        result = _run_operator(_registered[idname], idname, context,
+                               execution_context, properties)
+    elif idname in _builtins:
+        result = _builtins[idname](context, **properties)
+    else:
+        raise AttributeError(f"Calling operator \"bpy.ops.{idname}\" error, "
+                             f"could not be found")
+    context.view_layer.update()
+    return result
+
+
+class _Category:
+    def __init__(self, category):
+        self._category = category
+
+    def __getattr__(self, name):
+        idname = f"{self._category}.{name}"
+        return lambda *args, **properties: call(idname, *args, **properties)
+
+
+def __getattr__(category):
+    if category.startswith("__"):
+        raise AttributeError(category)
+    return _Category(category)
+
+
+# ---------------------------------------------------------------------------
+# Built-in operators
+# ---------------------------------------------------------------------------
+
+@_builtin("object.select_all")
+def _select_all(context, action='TOGGLE'):
+    objects = context.scene.objects
+    if action == 'TOGGLE':
+        action = 'DESELECT' if any(obj._select for obj in objects) else 'SELECT'
+    for obj in objects:
+        if action == 'INVERT':
+            obj._select = not obj._select
+        else:
+            obj._select = action == 'SELECT'
+    return {'FINISHED'}
+
+
+@_builtin("object.delete")
+def _delete(context, use_global=False, confirm=True):
+    selected = context.selected_objects
+    if not selected:
+        return {'CANCELLED'}
+    for obj in selected:
+        if context.view_layer.objects.active is obj:
+            context.view_layer.objects.active = None
+        bpy.data.objects.remove(obj)
+    return {'FINISHED'}
+
+
+@_builtin("object.mode_set")
+def _mode_set(context, mode='OBJECT', toggle=False):
+    obj = context.view_layer.objects.active
+    if obj is None:
+        raise RuntimeError("Operator bpy.ops.object.mode_set.poll() failed, "
+                           "context is incorrect")
+    obj.mode = mode
+    context.mode = 'OBJECT' if mode == 'OBJECT' else f"{mode}_MESH"
+    return {'FINISHED'}
+
+
+@_builtin("mesh.primitive_cube_add")
+def _primitive_cube_add(context, size=2.0, location=(0.0, 0.0, 0.0),
+                        rotation=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0), **options):
+    half = size / 2
+    corners = [(x, y, z) for x in (-half, half) for y in (-half, half)
+               for z in (-half, half)]
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1),
+             (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    mesh = bpy.data.meshes.new("Cube")
+    mesh.from_pydata(corners, [], faces)
+    obj = bpy.data.objects.new("Cube", mesh)
+    obj.location = location
+    obj.rotation_euler = rotation
+    obj.scale = scale
+    context.collection.objects.link(obj)
+
+    _select_all(context, action='DESELECT')
+    obj.select_set(True)
+    context.view_layer.objects.active = obj
+    return {'FINISHED'}
+
+
+_addons_directory = None
+
+
+@_builtin("preferences.addon_install")
+def _addon_install(context, filepath, overwrite=True, **options):
+    global _addons_directory
+    if zipfile.is_zipfile(filepath):
+        # A zip is unpacked into a scratch add-ons directory, as Blender
+        # unpacks it into its own
+        if _addons_directory is None:
+            _addons_directory = tempfile.mkdtemp(prefix="addons-")
+        with zipfile.ZipFile(filepath) as archive:
+            archive.extractall(_addons_directory)
+        directory = _addons_directory
+    else:
+        # Nothing is copied: the file's directory is made importable instead
+        directory = os.path.dirname(os.path.abspath(filepath))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    importlib.invalidate_caches()
+    return {'FINISHED'}
+
+
+@_builtin("preferences.addon_enable")
+def _addon_enable(context, module):
+    if module not in _enabled_addons:
+        addon = importlib.import_module(module)
+        addon.register()
+        _enabled_addons[module] = addon
+    return {'FINISHED'}
+
+
+@_builtin("preferences.addon_disable")
+def _addon_disable(context, module):
+    addon = _enabled_addons.pop(module, None)
+    if addon is not None:
+        addon.unregister()
+    return {'FINISHED'}
+
+
+@_builtin("ed.undo_push")
+def _undo_push(context, message=""):
+    return {'FINISHED'}
@@ -0,0 +1,18 @@
+"""
+Stand-in for bpy.path
+"""
+import os
+
+
+def abspath(path, start=None, library=None):
+    """Resolve a "//" blend-relative path against start or the working directory"""
+    if path.startswith("//"):
+        path = os.path.join(start or os.getcwd(), path[2:])
+    return path
+
+
+def ensure_ext(filepath, ext, case_sensitive=False):
+    """Return filepath with ext appended unless it already ends in ext"""
+    if case_sensitive:
+        return filepath if filepath.endswith(ext) else filepath + ext
+    return filepath if filepath.lower().endswith(ext.lower()) else filepath + ext
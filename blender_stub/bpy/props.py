@@ -0,0 +1,115 @@
+"""
+Stand-in for bpy.props
+
+Each function returns a descriptor. bpy.utils.register_class turns class
+annotations into class attributes, so instances read and write their own
+values just like Blender property groups and operators.
+"""
+
+
+class _Property:
+    """A typed property stored per owning instance"""
+
+    def __init__(self, kind, default, **options):
+        self.kind = kind
+        self.default = default
+        self.options = options
+        self.name = options.get("name", "")
+
+    def _values(self, instance):
+        values = instance.__dict__.get("_rna_values")
+        if values is None:
+            values = instance.__dict__["_rna_values"] = {}
+        return values
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        values = self._values(instance)
+        if self not in values:
+            if self.kind == "POINTER":
+                values[self] = self.options["type"]()
+            elif self.kind == "COLLECTION":
+                values[self] = _PropertyCollection(self.options["type"])
+            else:
+                values[self] = self.default
+        return values[self]
+
+    def __set__(self, instance, value):
+        self._values(instance)[self] = self.validate(value)
+
+    def validate(self, value):
+        options = self.options
+        if self.kind == "INT":
+            value = int(value)
+        elif self.kind == "FLOAT":
+            value = float(value)
+        elif self.kind == "BOOLEAN":
+            value = bool(value)
+        elif self.kind == "STRING":
+            value = str(value)
+        elif self.kind == "ENUM":
+            identifiers = [item[0] for item in options["items"]]
+            if value not in identifiers:
+                raise TypeError(f"enum \"{value}\" not found in {tuple(identifiers)}")
+            return value
+        elif self.kind in {"POINTER", "COLLECTION"}:
+            raise AttributeError("property is read-only")
+
+        if "min" in options:
+            value = max(value, options["min"])
+        if "max" in options:
+            value = min(value, options["max"])
+        return value
+
+
+class _PropertyCollection(list):
+    """The value of a CollectionProperty"""
+
+    def __init__(self, item_type):
+        super().__init__()
+        self.item_type = item_type
+
+    def add(self):
+        item = self.item_type()
+        self.append(item)
+        return item
+
+    def remove(self, index):
+        del self[index]
+
+    def clear(self):
+        del self[:]
+
+
+def IntProperty(*, name="", description="", default=0, **options):
+    return _Property("INT", default, name=name, description=description, **options)
+
+
+def FloatProperty(*, name="", description="", default=0.0, **options):
+    return _Property("FLOAT", default, name=name, description=description, **options)
+
+
+def BoolProperty(*, name="", description="", default=False, **options):
+    return _Property("BOOLEAN", default, name=name, description=description, **options)
+
+
+def StringProperty(*, name="", description="", default="", **options):
+    return _Property("STRING", default, name=name, description=description, **options)
+
+
+def EnumProperty(*, items, name="", description="", default=None, **options):
+    if default is None:
+        default = items[0][0]
+    return _Property("ENUM", default, name=name, description=description,
+                     items=items, **options)
+
+
+def PointerProperty(*, type, name="", description="", **options):
+    return _Property("POINTER", None, name=name, description=description,
+                     type=type, **options)
+
+
+def CollectionProperty(*, type, name="", description="", **options):
+    return _Property("COLLECTION", None, name=name, description=description,
+                     type=type, **options)
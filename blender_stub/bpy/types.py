@@ -0,0 +1,1075 @@
+"""
+Stand-in for the bpy.types the addon touches
+
+Mesh data lives in NumPy arrays (float32 coordinates, like Blender), and
+the element collections offer foreach_get/foreach_set over them. Object
+transforms are evaluated on access. Changes to transforms and geometry
+are tagged and reported to depsgraph_update_post handlers the next time a
+view layer is updated or an operator finishes.
+"""
+import itertools
+
+import numpy as np
+from mathutils import Matrix, Vector
+
+from . import app
+
+
+# ---------------------------------------------------------------------------
+# Depsgraph
+# ---------------------------------------------------------------------------
+
+_pending_updates = {}
+
+
+def _tag(id_data, transform=False, geometry=False):
+    """Remember that id_data changed until the next depsgraph update"""
+    update = _pending_updates.get(id_data.session_uid)
+    if update is None:
+        update = _pending_updates[id_data.session_uid] = DepsgraphUpdate(id_data)
+    update.is_updated_transform |= transform
+    update.is_updated_geometry |= geometry
+
+
+def _flush_updates(scene):
+    """Call depsgraph_update_post handlers with everything tagged so far"""
+    if not _pending_updates:
+        return
+    depsgraph = Depsgraph(scene, list(_pending_updates.values()))
+    _pending_updates.clear()
+    for handler in list(app.handlers.depsgraph_update_post):
+        handler(scene, depsgraph)
+
+
+class DepsgraphUpdate:
+    def __init__(self, id_data):
+        self.id = id_data
+        self.is_updated_transform = False
+        self.is_updated_geometry = False
+        self.is_updated_shading = False
+
+
+class Depsgraph:
+    def __init__(self, scene, updates=()):
+        self.scene = scene
+        self.updates = updates
+
+    @property
+    def objects(self):
+        return self.scene.objects
+
+    def id_eval_get(self, id_data):
+        return id_data
+
+    def update(self):
+        _flush_updates(self.scene)
+
+
+# ---------------------------------------------------------------------------
+# Collection helpers
+# ---------------------------------------------------------------------------
+
+def _foreach_get(values, seq):
+    """Copy values into seq, which must have exactly as many items"""
+    flat = np.asarray(values).ravel()
+    size = seq.size if isinstance(seq, np.ndarray) else len(seq)
+    if size != flat.size:
+        raise RuntimeError("internal error setting the array")
+    if isinstance(seq, np.ndarray):
+        seq.flat[:] = flat
+    else:
+        seq[:] = flat.tolist()
+
+
+def _foreach_set(target, seq):
+    """Copy seq into the target array, which must have as many items"""
+    flat = np.asarray(seq).ravel()
+    if flat.size != target.size:
+        raise RuntimeError("internal error setting the array")
+    target.flat[:] = flat
+
+
+class _RNAProperty:
+    def __init__(self, is_readonly=False):
+        self.is_readonly = is_readonly
+
+
+class _RNAStruct:
+    """The bl_rna of a struct: its identifier and properties by name"""
+
+    def __init__(self, identifier, **properties):
+        self.identifier = identifier
+        self.properties = {"rna_type": _RNAProperty(is_readonly=True), **properties}
+
+
+class _PropertyArray(tuple):
+    """Read-only float arrays such as bound_box"""
+
+
+# ---------------------------------------------------------------------------
+# ID data-blocks
+# ---------------------------------------------------------------------------
+
+class ID:
+    """Base of named data-blocks"""
+
+    _session_uids = itertools.count(1)
+
+    def __init__(self, name):
+        self._name = name
+        self.session_uid = next(ID._session_uids)
+        self.use_fake_user = False
+        self.is_evaluated = False
+
+    def __repr__(self):
+        return f"bpy.data.{self._data_attr}['{self._name}']"
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._registry()._rename(self, value)
+
+    @property
+    def original(self):
+        return self
+
+    @property
+    def users(self):
+        return int(self.use_fake_user)
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def _removed(self):
+        """Drop references to this data-block once bpy.data forgets it"""
+
+    def _registry(self):
+        from . import data
+        return getattr(data, self._data_attr)
+
+
+class MeshVertex:
+    __slots__ = ("mesh", "index")
+    bl_rna = _RNAStruct("MeshVertex", co=_RNAProperty(), select=_RNAProperty(),
+                        normal=_RNAProperty(is_readonly=True),
+                        index=_RNAProperty(is_readonly=True))
+
+    def __init__(self, mesh, index):
+        self.mesh = mesh
+        self.index = index
+
+    @property
+    def co(self):
+        return Vector(self.mesh._co[self.index])
+
+    @co.setter
+    def co(self, value):
+        self.mesh._co[self.index] = np.asarray(value, dtype=np.float32)
+        self.mesh._changed()
+
+    @property
+    def select(self):
+        return bool(self.mesh._select[self.index])
+
+    @select.setter
+    def select(self, value):
+        self.mesh._select[self.index] = value
+
+
+class MeshPolygon:
+    __slots__ = ("mesh", "index")
+    # Blender 4 derives loop_total from loop_start
+    bl_rna = _RNAStruct("MeshPolygon", loop_start=_RNAProperty(),
+                        loop_total=_RNAProperty(is_readonly=True),
+                        vertices=_RNAProperty(), normal=_RNAProperty(is_readonly=True),
+                        center=_RNAProperty(is_readonly=True),
+                        index=_RNAProperty(is_readonly=True))
+
+    def __init__(self, mesh, index):
+        self.mesh = mesh
+        self.index = index
+
+    @property
+    def loop_start(self):
+        return int(self.mesh._loop_starts[self.index])
+
+    @property
+    def loop_total(self):
+        return int(self.mesh._loop_totals()[self.index])
+
+    @property
+    def vertices(self):
+        start = self.loop_start
+        return self.mesh._loop_verts[start:start + self.loop_total].tolist()
+
+    @property
+    def normal(self):
+        return Vector(self.mesh._polygon_normals()[self.index])
+
+    @property
+    def center(self):
+        return Vector(self.mesh._co[self.vertices].mean(axis=0))
+
+
+class MeshEdge:
+    __slots__ = ("mesh", "index")
+    bl_rna = _RNAStruct("MeshEdge", vertices=_RNAProperty(),
+                        index=_RNAProperty(is_readonly=True))
+
+    def __init__(self, mesh, index):
+        self.mesh = mesh
+        self.index = index
+
+    @property
+    def vertices(self):
+        return self.mesh._edge_array()[self.index].tolist()
+
+
+class MeshLoop:
+    __slots__ = ("mesh", "index")
+    bl_rna = _RNAStruct("MeshLoop", vertex_index=_RNAProperty(),
+                        index=_RNAProperty(is_readonly=True))
+
+    def __init__(self, mesh, index):
+        self.mesh = mesh
+        self.index = index
+
+    @property
+    def vertex_index(self):
+        return int(self.mesh._loop_verts[self.index])
+
+
+class _MeshElements:
+    """Common sequence behaviour of vertices, edges, loops and polygons"""
+
+    element = None
+
+    def __init__(self, mesh):
+        self.mesh = mesh
+
+    def __iter__(self):
+        return (self.element(self.mesh, index) for index in range(len(self)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.element(self.mesh, i) for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("index out of range")
+        return self.element(self.mesh, index)
+
+    def foreach_get(self, attr, seq):
+        _foreach_get(self._array(attr), seq)
+
+    def foreach_set(self, attr, seq):
+        # Like Blender, the element struct decides what can be written
+        if self.element.bl_rna.properties.get(attr, _RNAProperty()).is_readonly:
+            raise AttributeError(f"attribute \"{attr}\" is read-only")
+        _foreach_set(self._array(attr), seq)
+        self.mesh._changed()
+
+
+class _Vertices(_MeshElements):
+    element = MeshVertex
+
+    def __len__(self):
+        return len(self.mesh._co)
+
+    def add(self, count):
+        mesh = self.mesh
+        mesh._co = np.concatenate([mesh._co, np.zeros((count, 3), np.float32)])
+        mesh._select = np.concatenate([mesh._select, np.zeros(count, bool)])
+        mesh._changed()
+
+    def _array(self, attr):
+        if attr == "co":
+            return self.mesh._co
+        if attr == "select":
+            return self.mesh._select
+        if attr == "index":
+            return np.arange(len(self))
+        raise AttributeError(f"vertices have no attribute \"{attr}\"")
+
+
+class _Edges(_MeshElements):
+    element = MeshEdge
+
+    def __len__(self):
+        return len(self.mesh._edge_array())
+
+    def _array(self, attr):
+        if attr == "vertices":
+            return self.mesh._edge_array()
+        raise AttributeError(f"edges have no attribute \"{attr}\"")
+
+
+class _Loops(_MeshElements):
+    element = MeshLoop
+
+    def __len__(self):
+        return len(self.mesh._loop_verts)
+
+    def add(self, count):
+        mesh = self.mesh
+        mesh._loop_verts = np.concatenate([mesh._loop_verts,
+                                           np.zeros(count, np.int32)])
+        mesh._changed()
+
+    def _array(self, attr):
+        if attr == "vertex_index":
+            return self.mesh._loop_verts
+        raise AttributeError(f"loops have no attribute \"{attr}\"")
+
+
+class _Polygons(_MeshElements):
+    element = MeshPolygon
+
+    def __len__(self):
+        return len(self.mesh._loop_starts)
+
+    def add(self, count):
+        mesh = self.mesh
+        mesh._loop_starts = np.concatenate([mesh._loop_starts,
+                                            np.zeros(count, np.int32)])
+        mesh._changed()
+
+    def _array(self, attr):
+        mesh = self.mesh
+        if attr == "loop_start":
+            return mesh._loop_starts
+        if attr == "loop_total":
+            return mesh._loop_totals()
+        if attr == "normal":
+            return mesh._polygon_normals()
+        if attr == "index":
+            return np.arange(len(self))
+        raise AttributeError(f"polygons have no attribute \"{attr}\"")
+
+
+class _AttributeData:
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def foreach_get(self, attr, seq):
+        _foreach_get(self.values, seq)
+
+    def foreach_set(self, attr, seq):
+        _foreach_set(self.values, seq)
+
+
+class Attribute:
+    def __init__(self, name, data_type, domain, size):
+        self.name = name
+        self.data_type = data_type
+        self.domain = domain
+        dtype = {"INT": np.int32, "FLOAT": np.float32, "BOOLEAN": bool}[data_type]
+        self.data = _AttributeData(np.zeros(size, dtype=dtype))
+
+
+class AttributeGroup:
+    """mesh.attributes: a collection of Attribute, looked up by name"""
+
+    def __init__(self, mesh):
+        self.mesh = mesh
+        self._by_name = {}
+
+    def __iter__(self):
+        return iter(list(self._by_name.values()))
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self._by_name.values())[key]
+        return self._by_name[key]
+
+    def get(self, name, default=None):
+        return self._by_name.get(name, default)
+
+    def keys(self):
+        return list(self._by_name)
+
+    def values(self):
+        return list(self._by_name.values())
+
+    def items(self):
+        return list(self._by_name.items())
+
+    def new(self, name, type, domain):
+        sizes = {"POINT": len(self.mesh.vertices), "EDGE": len(self.mesh.edges),
+                 "CORNER": len(self.mesh.loops), "FACE": len(self.mesh.polygons)}
+        attribute = self._by_name[name] = Attribute(name, type, domain, sizes[domain])
+        return attribute
+
+    def remove(self, attribute):
+        del self._by_name[attribute.name]
+
+    def _clear(self):
+        self._by_name.clear()
+
+
+class Mesh(ID):
+    _data_attr = "meshes"
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._co = np.zeros((0, 3), np.float32)
+        self._select = np.zeros(0, bool)
+        self._loop_verts = np.zeros(0, np.int32)
+        self._loop_starts = np.zeros(0, np.int32)
+        self._edges = None
+        self._bounds = None
+        self._objects = {}
+        self.vertices = _Vertices(self)
+        self.edges = _Edges(self)
+        self.loops = _Loops(self)
+        self.polygons = _Polygons(self)
+        self.attributes = AttributeGroup(self)
+
+    @property
+    def users(self):
+        return len(self._objects) + int(self.use_fake_user)
+
+    def _changed(self):
+        self._edges = None
+        self._bounds = None
+
+    def _loop_totals(self):
+        ends = np.append(self._loop_starts[1:], len(self._loop_verts))
+        return (ends - self._loop_starts).astype(np.int32)
+
+    def _polygon_vertices(self):
+        totals = self._loop_totals()
+        return [self._loop_verts[start:start + total].tolist()
+                for start, total in zip(self._loop_starts.tolist(), totals.tolist())]
+
+    def _polygon_normals(self):
+        # Newell's method, exact for planar polygons
+        normals = np.zeros((len(self._loop_starts), 3))
+        co = self._co.astype(np.float64)
+        for index, polygon in enumerate(self._polygon_vertices()):
+            points = co[polygon]
+            following = np.roll(points, -1, axis=0)
+            normals[index] = np.cross(points, following).sum(axis=0)
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        return np.divide(normals, lengths, out=normals, where=lengths > 0)
+
+    def _edge_array(self):
+        if self._edges is None:
+            totals = self._loop_totals()
+            if len(totals) == 0:
+                self._edges = np.zeros((0, 2), np.int32)
+            else:
+                following = np.arange(len(self._loop_verts)) + 1
+                ends = self._loop_starts + totals
+                following[ends - 1] = self._loop_starts
+                pairs = np.stack([self._loop_verts, self._loop_verts[following]], 1)
+                self._edges = np.unique(np.sort(pairs, axis=1), axis=0)
+        return self._edges
+
+    def _local_bounds(self):
+        if self._bounds is None:
+            if len(self._co):
+                self._bounds = (self._co.min(axis=0), self._co.max(axis=0))
+            else:
+                self._bounds = (np.zeros(3, np.float32), np.zeros(3, np.float32))
+        return self._bounds
+
+    def from_pydata(self, vertices, edges, faces):
+        self.clear_geometry()
+        co = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self._co = co.copy()
+        self._select = np.zeros(len(co), bool)
+        sizes = [len(face) for face in faces]
+        self._loop_verts = np.array([v for face in faces for v in face], np.int32)
+        self._loop_starts = (np.cumsum([0] + sizes[:-1]).astype(np.int32)
+                             if sizes else np.zeros(0, np.int32))
+        self._changed()
+
+    def clear_geometry(self):
+        self._co = np.zeros((0, 3), np.float32)
+        self._select = np.zeros(0, bool)
+        self._loop_verts = np.zeros(0, np.int32)
+        self._loop_starts = np.zeros(0, np.int32)
+        self.attributes._clear()
+        self._changed()
+
+    def update(self, calc_edges=False, calc_edges_loose=False):
+        self._changed()
+        for obj in self._objects.values():
+            _tag(obj, geometry=True)
+
+    def _removed(self):
+        for obj in list(self._objects.values()):
+            obj.data = None
+
+    def validate(self, verbose=False, clean_customdata=True):
+        return False
+
+    def copy(self):
+        from . import data
+        mesh = data.meshes.new(self._name)
+        mesh._co = self._co.copy()
+        mesh._select = self._select.copy()
+        mesh._loop_verts = self._loop_verts.copy()
+        mesh._loop_starts = self._loop_starts.copy()
+        return mesh
+
+
+class Object(ID):
+    _data_attr = "objects"
+
+    def __init__(self, name, object_data):
+        super().__init__(name)
+        self._data = None
+        self._location = self._watched(np.zeros(3))
+        self._rotation = self._watched(np.zeros(3))
+        self._scale = self._watched(np.ones(3))
+        self._basis_key = None
+        self._basis = np.identity(4)
+        self._select = False
+        self._parent = None
+        self._children = {}
+        self.matrix_parent_inverse = Matrix.Identity(4)
+        self.instance_type = 'NONE'
+        self.show_instancer_for_viewport = True
+        self.show_instancer_for_render = True
+        self.hide_viewport = False
+        self.hide_render = False
+        self.mode = 'OBJECT'
+        self._collections = []
+        self.data = object_data
+
+    def _watched(self, values):
+        vector = Vector(values)
+        vector._on_change = self._transform_changed
+        return vector
+
+    def _transform_changed(self):
+        _tag(self, transform=True)
+
+    @property
+    def type(self):
+        return 'EMPTY' if self._data is None else 'MESH'
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        if self._data is not None:
+            self._data._objects.pop(self.session_uid, None)
+        self._data = value
+        if value is not None:
+            value._objects[self.session_uid] = self
+        _tag(self, geometry=True)
+
+    def _set_vector(self, vector, value):
+        vector._data[:] = np.asarray(value, dtype=np.float64)
+        self._transform_changed()
+
+    location = property(lambda self: self._location,
+                        lambda self, value: self._set_vector(self._location, value))
+    rotation_euler = property(lambda self: self._rotation,
+                              lambda self, value: self._set_vector(self._rotation, value))
+    scale = property(lambda self: self._scale,
+                     lambda self, value: self._set_vector(self._scale, value))
+
+    def _basis_array(self):
+        key = (self._location._data.tobytes() + self._rotation._data.tobytes() +
+               self._scale._data.tobytes())
+        if key != self._basis_key:
+            self._basis = np.array(Matrix.LocRotScale(
+                self._location, self._rotation, self._scale))
+            self._basis_key = key
+        return self._basis
+
+    def _world_array(self):
+        local = np.array(self.matrix_parent_inverse) @ self._basis_array()
+        if self._parent is None:
+            return local
+        return self._parent._world_array() @ local
+
+    @property
+    def matrix_basis(self):
+        return Matrix(self._basis_array())
+
+    @property
+    def matrix_local(self):
+        return Matrix(np.array(self.matrix_parent_inverse) @ self._basis_array())
+
+    @property
+    def matrix_world(self):
+        return Matrix(self._world_array())
+
+    @matrix_world.setter
+    def matrix_world(self, value):
+        # Only translation and axis scale survive; enough for the stub
+        matrix = np.array(value, dtype=np.float64)
+        if self._parent is not None:
+            matrix = np.linalg.inv(self._parent._world_array()) @ matrix
+        self._location._data[:] = matrix[:3, 3]
+        self._scale._data[:] = np.linalg.norm(matrix[:3, :3], axis=0)
+        self._rotation._data[:] = 0.0
+        self._transform_changed()
+
+    @property
+    def bound_box(self):
+        if self._data is None:
+            low = high = np.zeros(3)
+        else:
+            low, high = self._data._local_bounds()
+        corners = []
+        for x in (low[0], high[0]):
+            for y, z in ((low[1], low[2]), (low[1], high[2]),
+                         (high[1], high[2]), (high[1], low[2])):
+                corners.append((float(x), float(y), float(z)))
+        return _PropertyArray(corners)
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @parent.setter
+    def parent(self, value):
+        if self._parent is not None:
+            self._parent._children.pop(self.session_uid, None)
+        self._parent = value
+        if value is not None:
+            value._children[self.session_uid] = self
+        self._transform_changed()
+
+    @property
+    def children(self):
+        return tuple(self._children.values())
+
+    @property
+    def users(self):
+        return len(self._collections) + int(self.use_fake_user)
+
+    @property
+    def users_collection(self):
+        return tuple(self._collections)
+
+    def _removed(self):
+        for collection in list(self._collections):
+            collection.objects.unlink(self)
+        for child in self.children:
+            child.parent = None
+        self.parent = None
+        self.data = None
+        _pending_updates.pop(self.session_uid, None)
+
+    def select_get(self, view_layer=None):
+        return self._select
+
+    def select_set(self, state, view_layer=None):
+        self._select = bool(state)
+
+    def hide_get(self, view_layer=None):
+        return self.hide_viewport
+
+    def hide_set(self, state, view_layer=None):
+        self.hide_viewport = bool(state)
+
+    def copy(self):
+        from . import data
+        obj = data.objects.new(self._name, self._data)
+        obj.location = self._location
+        obj.rotation_euler = self._rotation
+        obj.scale = self._scale
+        obj.parent = self._parent
+        obj.instance_type = self.instance_type
+        return obj
+
+
+class _ObjectSequence(list):
+    """A list of objects with foreach_get, as bpy collections have"""
+
+    def foreach_get(self, attr, seq):
+        if attr == "matrix_world":
+            # Blender flattens matrices column by column
+            values = np.array([obj._world_array().T for obj in self])
+        elif attr == "bound_box":
+            values = np.array([obj.bound_box for obj in self])
+        else:
+            values = np.array([np.asarray(getattr(obj, attr)) for obj in self])
+        _foreach_get(values.reshape(-1) if len(self) else np.zeros(0), seq)
+
+    def get(self, name, default=None):
+        for obj in self:
+            if obj.name == name:
+                return obj
+        return default
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            obj = self.get(key)
+            if obj is None:
+                raise KeyError(f"key \"{key}\" not found")
+            return obj
+        result = super().__getitem__(key)
+        return _ObjectSequence(result) if isinstance(key, slice) else result
+
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return self.get(item) is not None
+        return super().__contains__(item)
+
+
+_link_version = itertools.count(1)
+_current_link_version = [0]
+
+
+def _links_changed():
+    _current_link_version[0] = next(_link_version)
+
+
+class _CollectionObjects:
+    def __init__(self, collection):
+        self.collection = collection
+        self._objects = {}
+
+    def __iter__(self):
+        return iter(list(self._objects.values()))
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return any(obj.name == item for obj in self._objects.values())
+        return item.session_uid in self._objects
+
+    def __getitem__(self, key):
+        return _ObjectSequence(self._objects.values())[key]
+
+    def foreach_get(self, attr, seq):
+        _ObjectSequence(self._objects.values()).foreach_get(attr, seq)
+
+    def link(self, obj):
+        if obj.session_uid in self._objects:
+            raise RuntimeError(f"Object '{obj.name}' already in collection "
+                               f"'{self.collection.name}'")
+        self._objects[obj.session_uid] = obj
+        obj._collections.append(self.collection)
+        _links_changed()
+        _tag(obj, transform=True, geometry=True)
+
+    def unlink(self, obj):
+        del self._objects[obj.session_uid]
+        obj._collections.remove(self.collection)
+        _links_changed()
+
+
+class _CollectionChildren:
+    def __init__(self, collection):
+        self.collection = collection
+        self._children = []
+
+    def __iter__(self):
+        return iter(list(self._children))
+
+    def __len__(self):
+        return len(self._children)
+
+    def __contains__(self, item):
+        return item in self._children
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for child in self._children:
+                if child.name == key:
+                    return child
+            raise KeyError(f"key \"{key}\" not found")
+        return self._children[key]
+
+    def link(self, child):
+        self._children.append(child)
+        _links_changed()
+
+    def unlink(self, child):
+        self._children.remove(child)
+        _links_changed()
+
+
+class Collection(ID):
+    _data_attr = "collections"
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.objects = _CollectionObjects(self)
+        self.children = _CollectionChildren(self)
+        self.hide_viewport = False
+        self.hide_render = False
+
+    def _removed(self):
+        from . import data
+        parents = list(data.collections) + [scene.collection for scene in data.scenes]
+        for parent in parents:
+            if self in parent.children:
+                parent.children.unlink(self)
+        for obj in list(self.objects):
+            self.objects.unlink(obj)
+
+    @property
+    def all_objects(self):
+        seen = {}
+        stack = [self]
+        while stack:
+            collection = stack.pop()
+            for obj in collection.objects._objects.values():
+                seen.setdefault(obj.session_uid, obj)
+            stack.extend(reversed(collection.children._children))
+        return _ObjectSequence(seen.values())
+
+
+class Scene(ID):
+    _data_attr = "scenes"
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.collection = Collection("Scene Collection")
+        self.frame_current = 1
+        self.view_layers = [ViewLayer(self)]
+        self._objects = None
+        self._objects_version = None
+
+    @property
+    def objects(self):
+        if self._objects_version != _current_link_version[0]:
+            self._objects = self.collection.all_objects
+            self._objects_version = _current_link_version[0]
+        return self._objects
+
+    def frame_set(self, frame, subframe=0.0):
+        """Change frame and run the frame change handlers (nothing is animated)"""
+        from .app import handlers
+        for handler in list(handlers.frame_change_pre):
+            handler(self, None)
+        self.frame_current = int(frame)
+        for handler in list(handlers.frame_change_post):
+            handler(self, Depsgraph(self))
+
+
+class _LayerObjects:
+    def __init__(self, scene):
+        self.scene = scene
+        self.active = None
+
+    def __iter__(self):
+        return iter(self.scene.objects)
+
+    def __len__(self):
+        return len(self.scene.objects)
+
+    def __getitem__(self, key):
+        return self.scene.objects[key]
+
+    @property
+    def selected(self):
+        return _ObjectSequence(obj for obj in self.scene.objects if obj._select)
+
+
+class ViewLayer:
+    def __init__(self, scene):
+        self.scene = scene
+        self.name = "ViewLayer"
+        self.objects = _LayerObjects(scene)
+
+    def update(self):
+        _flush_updates(self.scene)
+
+    @property
+    def depsgraph(self):
+        return Depsgraph(self.scene)
+
+
+# ---------------------------------------------------------------------------
+# Context, window manager and UI
+# ---------------------------------------------------------------------------
+
+class Timer:
+    def __init__(self, time_step):
+        self.time_step = time_step
+        self.time_duration = 0.0
+
+
+class WindowManager:
+    def __init__(self):
+        self.progress = None
+        self._modal_operators = []
+        self._timers = []
+        self._file_browsers = []
+
+    def event_timer_add(self, time_step, window=None):
+        timer = Timer(time_step)
+        self._timers.append(timer)
+        return timer
+
+    def event_timer_remove(self, timer):
+        self._timers.remove(timer)
+
+    def modal_handler_add(self, operator):
+        self._modal_operators.append(operator)
+        return True
+
+    def fileselect_add(self, operator):
+        """Stand in for the file browser by keeping operator in _file_browsers"""
+        self._file_browsers.append(operator)
+
+    def _send_event(self, event):
+        """Hand event to every running modal operator, like the event loop
+
+        Operators that return FINISHED or CANCELLED stop receiving events,
+        and the view layer is updated as after any operator.
+        """
+        import bpy
+        for operator in list(self._modal_operators):
+            result = operator.modal(bpy.context, event)
+            if result & {'FINISHED', 'CANCELLED'}:
+                self._modal_operators.remove(operator)
+        bpy.context.view_layer.update()
+
+    def _run_modal(self, limit=None):
+        """Send timer events until no modal operator is left, or limit passed"""
+        rounds = 0
+        while self._modal_operators and (limit is None or rounds < limit):
+            for timer in self._timers:
+                timer.time_duration += timer.time_step
+            self._send_event(Event('TIMER'))
+            rounds += 1
+        return rounds
+
+    def progress_begin(self, min_value, max_value):
+        self.progress = (min_value, max_value, min_value)
+
+    def progress_update(self, value):
+        if self.progress is not None:
+            self.progress = self.progress[:2] + (value,)
+
+    def progress_end(self):
+        self.progress = None
+
+
+class Context:
+    def __init__(self, scene):
+        self.scene = scene
+        self.window_manager = WindowManager()
+        self.mode = 'OBJECT'
+        self.window = None
+        self.area = None
+        self.region = None
+
+    @property
+    def view_layer(self):
+        return self.scene.view_layers[0]
+
+    @property
+    def collection(self):
+        return self.scene.collection
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in self.scene.objects if obj._select]
+
+    @property
+    def active_object(self):
+        return self.view_layer.objects.active
+
+    @property
+    def object(self):
+        return self.view_layer.objects.active
+
+    def evaluated_depsgraph_get(self):
+        _flush_updates(self.scene)
+        return Depsgraph(self.scene)
+
+
+class UILayout:
+    """Records what a panel draws"""
+
+    def __init__(self):
+        self.items = []
+
+    def _child(self, kind):
+        child = UILayout()
+        self.items.append((kind, child))
+        return child
+
+    def box(self):
+        return self._child("box")
+
+    def row(self, align=False, heading=""):
+        return self._child("row")
+
+    def column(self, align=False, heading=""):
+        return self._child("column")
+
+    def split(self, factor=0.0, align=False):
+        return self._child("split")
+
+    def label(self, text="", icon='NONE'):
+        self.items.append(("label", text))
+
+    def prop(self, data, property, **options):
+        self.items.append(("prop", property))
+
+    def operator(self, operator, text="", icon='NONE'):
+        self.items.append(("operator", operator))
+        return _OperatorProperties()
+
+    def separator(self, factor=1.0):
+        self.items.append(("separator", None))
+
+
+class _OperatorProperties:
+    """Stand-in for the properties object layout.operator returns"""
+
+
+# ---------------------------------------------------------------------------
+# Registrable classes
+# ---------------------------------------------------------------------------
+
+class bpy_struct:
+    """Base of registrable classes"""
+
+
+class PropertyGroup(bpy_struct):
+    pass
+
+
+class Operator(bpy_struct):
+    bl_options = set()
+
+    def __init__(self):
+        self.layout = UILayout()
+        self.reports = []
+
+    def report(self, type, message):
+        level = next(iter(type))
+        self.reports.append((level, message))
+        print(f"{level.title()}: {message}")
+
+
+class Panel(bpy_struct):
+    def __init__(self):
+        self.layout = UILayout()
+
+
+class Event:
+    def __init__(self, type='NONE', value='NOTHING'):
+        self.type = type
+        self.value = value
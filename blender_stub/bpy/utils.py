@@ -0,0 +1,19 @@
+"""
+Stand-in for bpy.utils
+"""
+from . import ops, props, types
+
+
+def register_class(cls):
+    """Turn annotated properties into descriptors and register operators"""
+    for base in reversed(cls.__mro__):
+        for name, value in vars(base).get("__annotations__", {}).items():
+            if isinstance(value, props._Property):
+                setattr(cls, name, value)
+    if issubclass(cls, types.Operator):
+        ops._registered[cls.bl_idname] = cls
+
+
+def unregister_class(cls):
+    if issubclass(cls, types.Operator):
+        ops._registered.pop(cls.bl_idname, None)
@@ -0,0 +1,239 @@
+"""
+Stand-in for the parts of Blender's mathutils the addon uses
+
+Vector and Matrix wrap NumPy arrays. Only what the addon, its tests and its
+benchmarks touch is implemented.
+"""
+import math
+
+import numpy as np
+
+
+class Vector:
+    """A small float vector"""
+
+    __slots__ = ("_data", "_on_change")
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._data = np.array(values, dtype=np.float64).ravel()
+        self._on_change = None
+
+    def _changed(self):
+        # Vectors owned by an object (its location, say) tell it when edited
+        if self._on_change is not None:
+            self._on_change()
+
+    def __array__(self, dtype=None, copy=None):
+        return self._data.astype(dtype) if dtype else self._data.copy()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data.tolist())
+
+    def __getitem__(self, index):
+        return float(self._data[index])
+
+    def __setitem__(self, index, value):
+        self._data[index] = value
+        self._changed()
+
+    def __repr__(self):
+        return f"Vector({tuple(round(v, 4) for v in self._data.tolist())})"
+
+    def __eq__(self, other):
+        try:
+            return np.array_equal(self._data, np.asarray(other, dtype=np.float64))
+        except (TypeError, ValueError):
+            return NotImplemented
+
+    def _get_x(self):
+        return float(self._data[0])
+
+    def _set_x(self, value):
+        self._data[0] = value
+        self._changed()
+
+    def _get_y(self):
+        return float(self._data[1])
+
+    def _set_y(self, value):
+        self._data[1] = value
+        self._changed()
+
+    def _get_z(self):
+        return float(self._data[2])
+
+    def _set_z(self, value):
+        self._data[2] = value
+        self._changed()
+
+    x = property(_get_x, _set_x)
+    y = property(_get_y, _set_y)
+    z = property(_get_z, _set_z)
+
+    def __add__(self, other):
+        return Vector(self._data + np.asarray(other, dtype=np.float64))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Vector(self._data - np.asarray(other, dtype=np.float64))
+
+    def __rsub__(self, other):
+        return Vector(np.asarray(other, dtype=np.float64) - self._data)
+
+    def __mul__(self, scalar):
+        return Vector(self._data * scalar)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return Vector(self._data / scalar)
+
+    def __neg__(self):
+        return Vector(-self._data)
+
+    def __matmul__(self, other):
+        return float(self._data @ np.asarray(other, dtype=np.float64))
+
+    @property
+    def length(self):
+        return float(np.linalg.norm(self._data))
+
+    def dot(self, other):
+        return float(self._data @ np.asarray(other, dtype=np.float64))
+
+    def cross(self, other):
+        return Vector(np.cross(self._data, np.asarray(other, dtype=np.float64)))
+
+    def normalized(self):
+        length = self.length
+        return Vector(self._data / length if length else self._data)
+
+    def copy(self):
+        return Vector(self._data)
+
+    def to_tuple(self, precision=None):
+        values = self._data.tolist()
+        if precision is not None:
+            values = [round(v, precision) for v in values]
+        return tuple(values)
+
+
+# Blender's Euler is a separate type; XYZ angles in a Vector are enough here
+Euler = Vector
+
+
+class Matrix:
+    """A square float matrix, rows first like Blender's"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = np.identity(4)
+        self._data = np.array(rows, dtype=np.float64)
+
+    @classmethod
+    def Identity(cls, size):
+        return cls(np.identity(size))
+
+    @classmethod
+    def Translation(cls, vector):
+        matrix = np.identity(4)
+        matrix[:3, 3] = np.asarray(vector, dtype=np.float64)[:3]
+        return cls(matrix)
+
+    @classmethod
+    def Scale(cls, factor, size, axis=None):
+        matrix = np.identity(size)
+        if axis is None:
+            matrix[:3, :3] *= factor
+        else:
+            axis = np.asarray(axis, dtype=np.float64)
+            axis = axis / np.linalg.norm(axis)
+            matrix[:3, :3] += (factor - 1) * np.outer(axis, axis)
+        return cls(matrix)
+
+    @classmethod
+    def LocRotScale(cls, location, rotation, scale):
+        """Compose a matrix from a location, XYZ Euler angles and a scale"""
+        matrix = np.identity(4)
+        if rotation is not None:
+            matrix[:3, :3] = euler_matrix(rotation)
+        if scale is not None:
+            matrix[:3, :3] = matrix[:3, :3] * np.asarray(scale, dtype=np.float64)
+        if location is not None:
+            matrix[:3, 3] = np.asarray(location, dtype=np.float64)
+        return cls(matrix)
+
+    def __array__(self, dtype=None, copy=None):
+        return self._data.astype(dtype) if dtype else self._data.copy()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return (Vector(row) for row in self._data)
+
+    def __getitem__(self, index):
+        return Vector(self._data[index])
+
+    def __setitem__(self, index, value):
+        self._data[index] = np.asarray(value, dtype=np.float64)
+
+    def __repr__(self):
+        rows = ",\n        ".join(str(tuple(round(v, 4) for v in row))
+                                  for row in self._data.tolist())
+        return f"Matrix(({rows}))"
+
+    def __eq__(self, other):
+        try:
+            return np.array_equal(self._data, np.asarray(other, dtype=np.float64))
+        except (TypeError, ValueError):
+            return NotImplemented
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix(self._data @ other._data)
+        vector = np.asarray(other, dtype=np.float64)
+        if len(vector) == len(self._data) - 1:
+            # Vectors one short are treated as points, as in Blender
+            return Vector(self._data[:-1, :-1] @ vector + self._data[:-1, -1])
+        return Vector(self._data @ vector)
+
+    def inverted(self):
+        return Matrix(np.linalg.inv(self._data))
+
+    def inverted_safe(self):
+        return Matrix(np.linalg.pinv(self._data))
+
+    def transposed(self):
+        return Matrix(self._data.T)
+
+    def copy(self):
+        return Matrix(self._data)
+
+    def to_translation(self):
+        return Vector(self._data[:3, 3])
+
+    def to_3x3(self):
+        return Matrix(self._data[:3, :3])
+
+    @property
+    def translation(self):
+        return Vector(self._data[:3, 3])
+
+
+def euler_matrix(angles):
+    """Rotation matrix of XYZ Euler angles (X applied first)"""
+    x, y, z = (float(a) for a in angles)
+    cx, sx = math.cos(x), math.sin(x)
+    cy, sy = math.cos(y), math.sin(y)
+    cz, sz = math.cos(z), math.sin(z)
+    rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return rz @ ry @ rx
@@ -0,0 +1,129 @@
+"""
+Stand-in for mathutils.bvhtree
+
+There is no hierarchy: queries test every triangle with NumPy, which is
+exact and fast enough for the meshes the addon's tests and benchmarks use.
+"""
+import numpy as np
+
+from . import Vector
+
+
+def _triangulate(vertices, polygons):
+    """Fan-triangulate polygons into (T, 3, 3) corners and owning indices"""
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    corners = []
+    owners = []
+    for index, polygon in enumerate(polygons):
+        polygon = list(polygon)
+        for k in range(1, len(polygon) - 1):
+            corners.append((polygon[0], polygon[k], polygon[k + 1]))
+            owners.append(index)
+    corners = np.array(corners, dtype=np.int64).reshape(-1, 3)
+    return vertices[corners], np.array(owners, dtype=np.int64)
+
+
+def _closest_points(triangles, point):
+    """Closest point on each triangle to point (Ericson's region test)"""
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    ab, ac = b - a, c - a
+    ap, bp, cp = point - a, point - b, point - c
+    d1, d2 = (ab * ap).sum(1), (ac * ap).sum(1)
+    d3, d4 = (ab * bp).sum(1), (ac * bp).sum(1)
+    d5, d6 = (ab * cp).sum(1), (ac * cp).sum(1)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        on_ab = a + (d1 / (d1 - d3))[:, None] * ab
+        on_ac = a + (d2 / (d2 - d6))[:, None] * ac
+        on_bc = b + ((d4 - d3) / ((d4 - d3) + (d5 - d6)))[:, None] * (c - b)
+        denom = 1.0 / (va + vb + vc)
+        inside = a + (vb * denom)[:, None] * ab + (vc * denom)[:, None] * ac
+
+    conditions = [
+        (d1 <= 0) & (d2 <= 0),
+        (d3 >= 0) & (d4 <= d3),
+        (vc <= 0) & (d1 >= 0) & (d3 <= 0),
+        (d6 >= 0) & (d5 <= d6),
+        (vb <= 0) & (d2 >= 0) & (d6 <= 0),
+        (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0),
+    ]
+    choices = [a, b, on_ab, c, on_ac, on_bc]
+    result = inside
+    for condition, choice in zip(reversed(conditions), reversed(choices)):
+        result = np.where(condition[:, None], choice, result)
+    return result
+
+
+def _triangles_intersect(first, second, epsilon=1e-9):
+    """Separating axis test for pairs of triangles, (P, 3, 3) each"""
+    edges_a = np.roll(first, -1, axis=1) - first
+    edges_b = np.roll(second, -1, axis=1) - second
+    normal_a = np.cross(edges_a[:, 0], edges_a[:, 1])
+    normal_b = np.cross(edges_b[:, 0], edges_b[:, 1])
+
+    axes = [normal_a[:, None], normal_b[:, None],
+            np.cross(edges_a[:, :, None], edges_b[:, None, :]).reshape(-1, 9, 3),
+            np.cross(normal_a[:, None], edges_a),
+            np.cross(normal_b[:, None], edges_b)]
+    axes = np.concatenate(axes, axis=1)
+
+    project_a = np.einsum("pkd,pvd->pkv", axes, first)
+    project_b = np.einsum("pkd,pvd->pkv", axes, second)
+    scale = epsilon * (1.0 + np.abs(project_a).max(2) + np.abs(project_b).max(2))
+    separated = ((project_a.max(2) < project_b.min(2) - scale) |
+                 (project_b.max(2) < project_a.min(2) - scale))
+    return ~separated.any(axis=1)
+
+
+class BVHTree:
+    """Triangle set answering overlap and nearest-point queries"""
+
+    def __init__(self, triangles, owners):
+        self.triangles = triangles
+        self.owners = owners
+        normals = np.cross(triangles[:, 1] - triangles[:, 0],
+                           triangles[:, 2] - triangles[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        self.normals = np.divide(normals, lengths, out=np.zeros_like(normals),
+                                 where=lengths > 0)
+        self.low = triangles.min(axis=1)
+        self.high = triangles.max(axis=1)
+
+    @classmethod
+    def FromPolygons(cls, vertices, polygons, all_triangles=False, epsilon=0.0):
+        return cls(*_triangulate(vertices, polygons))
+
+    @classmethod
+    def FromObject(cls, obj, depsgraph, deform=True, render=False, cage=False,
+                   epsilon=0.0):
+        """Build a tree from obj's mesh in object space"""
+        mesh = obj.data
+        return cls(*_triangulate(mesh._co, mesh._polygon_vertices()))
+
+    def overlap(self, other):
+        """Return (self polygon, other polygon) pairs whose triangles cross"""
+        if len(self.triangles) == 0 or len(other.triangles) == 0:
+            return []
+        boxes = ((self.low[:, None] <= other.high[None]) &
+                 (other.low[None] <= self.high[:, None])).all(axis=2)
+        first, second = np.nonzero(boxes)
+        hit = _triangles_intersect(self.triangles[first], other.triangles[second])
+        pairs = zip(self.owners[first[hit]].tolist(),
+                    other.owners[second[hit]].tolist())
+        return sorted(set(pairs))
+
+    def find_nearest(self, origin, distance=1.84467e19):
+        """Return (location, normal, index, distance) of the closest point"""
+        if len(self.triangles) == 0:
+            return None, None, None, None
+        origin = np.asarray(origin, dtype=np.float64)
+        points = _closest_points(self.triangles, origin)
+        distances = np.linalg.norm(points - origin, axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] > distance:
+            return None, None, None, None
+        return (Vector(points[best]), Vector(self.normals[best]),
+                int(self.owners[best]), float(distances[best]))
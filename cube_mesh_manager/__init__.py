@@ -0,0 +1,1447 @@
+bl_info = {
+    "name": "Cube Mesh Manager",
+    "version": (1, 0, 0),
+    "blender": (3, 0, 0),
+    "location": "View3D > Sidebar > Cube Manager",
+    "description": "Distribute cubes in 2D array and merge meshes with common faces",
+    "category": "Object",
+}
+
+import json
+import os
+import time
+
+import bpy
+import bmesh
+import numpy as np
+from bpy.app.handlers import persistent
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty
+from bpy.types import Panel, Operator, PropertyGroup
+
+# Pure-Python/NumPy engine; the operators below are adapters over it
+try:
+    from . import cube_mesh_core as core
+except ImportError:
+    import cube_mesh_core as core
+
+
+# Objects created between progress updates when distributing
+CREATE_BATCH_SIZE = 10000
+
+# Wall time a modal run works per timer tick before handing back to Blender
+SLICE_SECONDS = 0.01
+# Objects created or read by a modal run between checks of the slice clock
+SLICE_BATCH_SIZE = 200
+
+# Operators currently running modally, for the panel to show their progress
+running_jobs = []
+
+# Events a modal run lets through: the view can still be navigated, but
+# nothing the run holds can be deleted, edited or undone under it
+NAVIGATION_EVENTS = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE',
+    'WHEELDOWNMOUSE', 'WHEELINMOUSE', 'WHEELOUTMOUSE', 'TRACKPADPAN',
+    'TRACKPADZOOM', 'MOUSEROTATE', 'NDOF_MOTION', 'WINDOW_DEACTIVATE',
+    'NUMPAD_0', 'NUMPAD_1', 'NUMPAD_2', 'NUMPAD_3', 'NUMPAD_4', 'NUMPAD_5',
+    'NUMPAD_6', 'NUMPAD_7', 'NUMPAD_8', 'NUMPAD_9', 'NUMPAD_PERIOD',
+    'NUMPAD_PLUS', 'NUMPAD_MINUS', 'HOME',
+}
+
+
+
+
+def is_vertex_instancer(obj):
+    """Check if obj repeats its children at its vertices"""
+    return obj.type == 'MESH' and obj.instance_type == 'VERTS'
+
+
+def get_points(obj):
+    """Get the world-space vertex positions of obj as an (N, 3) array"""
+    mesh = obj.data
+    points = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", points)
+    matrix = np.array(obj.matrix_world)
+    return points.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def get_mesh_arrays(obj, matrix=None):
+    """Get the world-space vertices and polygons of a mesh object as arrays
+    
+    Reads vertex positions, loop vertex indices and polygon loop ranges with
+    foreach_get and applies matrix (matrix_world by default) as one matrix
+    multiply. Returns (verts, faces): an (N, 3) float array and
+    core.FaceArrays.
+    """
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.vertices.foreach_get("co", co)
+    mesh.loops.foreach_get("vertex_index", loops)
+    mesh.polygons.foreach_get("loop_start", starts)
+    mesh.polygons.foreach_get("loop_total", totals)
+    
+    matrix = np.array(obj.matrix_world if matrix is None else matrix)
+    verts = co.reshape(-1, 3).astype(np.float64) @ matrix[:3, :3].T + matrix[:3, 3]
+    
+    # Loops are normally stored in polygon order, but only loop_start says so
+    totals = totals.astype(np.int64)
+    offsets = np.arange(totals.sum()) - np.repeat(np.cumsum(totals) - totals, totals)
+    loop_verts = loops[np.repeat(starts, totals) + offsets].astype(np.int64)
+    return verts, core.FaceArrays(loop_verts, totals)
+
+
+def get_instance_bounds(instancer):
+    """Get the world-space bounds of every mesh instanced on instancer"""
+    points = get_points(instancer)
+    rotation = np.array(instancer.matrix_world)[:3, :3]
+    bounds = []
+    
+    for child in instancer.children:
+        if child.type != 'MESH':
+            continue
+        local = np.array(child.matrix_local)
+        corners = np.array(child.bound_box) @ local[:3, :3].T + local[:3, 3]
+        bounds.append(core.instance_bounds(points, corners @ rotation.T))
+    
+    return bounds
+
+
+def get_object_bounds(objects):
+    """Get the world-space bounds of each object in objects
+    
+    Returns one (K, 6) array per object: a single box for plain meshes,
+    one box per instance for vertex instancers and no boxes for anything
+    else. A bpy collection is read in bulk with foreach_get; a plain list
+    of objects is read one object at a time.
+    """
+    objects = objects if hasattr(objects, "foreach_get") else list(objects)
+    count = len(objects)
+    empty = np.empty((0, 6))
+    if count == 0:
+        return []
+    
+    if hasattr(objects, "foreach_get"):
+        matrices = np.empty(count * 16, dtype=np.float32)
+        corners = np.empty(count * 24, dtype=np.float32)
+        objects.foreach_get("matrix_world", matrices)
+        objects.foreach_get("bound_box", corners)
+        
+        # foreach_get flattens matrices column by column
+        matrices = matrices.reshape(count, 4, 4).transpose(0, 2, 1)
+        corners = corners.reshape(count, 8, 3)
+    else:
+        matrices = np.array([obj.matrix_world for obj in objects])
+        corners = np.array([obj.bound_box for obj in objects])
+    
+    is_mesh = np.zeros(count, dtype=bool)
+    bounds = [empty] * count
+    for index, obj in enumerate(objects):
+        if obj.type != 'MESH':
+            continue
+        if is_vertex_instancer(obj):
+            instances = get_instance_bounds(obj)
+            if instances:
+                bounds[index] = np.concatenate(instances)
+        elif obj.parent is None or not is_vertex_instancer(obj.parent):
+            # Children of vertex instancers only show up at the points
+            is_mesh[index] = True
+    
+    boxes = core.transform_bounds(matrices[is_mesh], corners[is_mesh])
+    for index, box in zip(np.flatnonzero(is_mesh), boxes):
+        bounds[index] = box[np.newaxis]
+    return bounds
+
+
+def get_scene_bounds(objects):
+    """Get the world-space bounds of every mesh in objects as an (N, 6) array
+    
+    Reads matrix_world and bound_box for the whole collection with
+    foreach_get and transforms all corners in one batched multiply.
+    Vertex instancers contribute one box per instance instead of the box
+    around all their points.
+    """
+    return np.concatenate([np.empty((0, 6))] + get_object_bounds(objects))
+
+
+class BoundsCache:
+    """World-space bounds of scene objects, refreshed only where they changed
+    
+    Entries are keyed by session_uid. The depsgraph handler marks objects
+    whose transform or geometry changed as dirty; scene_bounds recomputes
+    dirty and unseen objects and reuses everything else. Undo, file loads
+    and frame changes throw the whole cache away: animation, drivers and
+    constraints move objects on a frame change without a depsgraph update.
+    """
+    
+    def __init__(self):
+        self.bounds = {}
+        self.dirty = set()
+    
+    def clear(self):
+        self.bounds.clear()
+        self.dirty.clear()
+    
+    def invalidate(self, obj):
+        self.dirty.add(obj.session_uid)
+        # Moving an instanced child moves every instance of it
+        parent = obj.parent
+        if parent is not None and is_vertex_instancer(parent):
+            self.dirty.add(parent.session_uid)
+    
+    def scene_bounds(self, scene, with_owners=False):
+        """Get the bounds of every mesh in scene as an (N, 6) array
+        
+        With with_owners, also return a list naming the plain mesh object
+        behind each row, or None for rows that are instances.
+        """
+        objects = scene.objects
+        uids = [obj.session_uid for obj in objects]
+        stale = [index for index, uid in enumerate(uids)
+                 if uid in self.dirty or uid not in self.bounds]
+        
+        if len(stale) > len(uids) // 2:
+            # Mostly cold: one bulk read beats per-object access
+            self.bounds = dict(zip(uids, get_object_bounds(objects)))
+        elif stale:
+            changed = get_object_bounds([objects[index] for index in stale])
+            for index, bounds in zip(stale, changed):
+                self.bounds[uids[index]] = bounds
+            if len(self.bounds) > 2 * len(uids):
+                # Drop entries for deleted objects now and then
+                self.bounds = {uid: self.bounds[uid] for uid in uids}
+        self.dirty.clear()
+        
+        rows = [self.bounds[uid] for uid in uids]
+        bounds = np.concatenate([np.empty((0, 6))] + rows)
+        if not with_owners:
+            return bounds
+        owners = []
+        for obj, boxes in zip(objects, rows):
+            owner = None if is_vertex_instancer(obj) else obj
+            owners.extend([owner] * len(boxes))
+        return bounds, owners
+
+
+bounds_cache = BoundsCache()
+
+
+class MeshCollider:
+    """Exact cube-vs-mesh overlap test behind the AABB broad phase
+    
+    Called with cube centres whose cube hits some obstacle's bounds, it
+    returns which of them really overlap an obstacle. The boxes hit are
+    found through a spatial hash; a BVH tree is built the first time an
+    object's box is hit and kept for the rest of the operation. Rows
+    without an owner (instances) are trusted as they are.
+    """
+    
+    def __init__(self, bounds, owners, depsgraph):
+        self.hash = core.SpatialHash.for_layout()
+        self.hash.insert_many(bounds)
+        self.owners = owners
+        self.depsgraph = depsgraph
+        self.trees = {}
+    
+    def _tree(self, obj):
+        """Get the object-space BVH tree of obj and its matrices"""
+        key = obj.session_uid
+        if key not in self.trees:
+            from mathutils.bvhtree import BVHTree
+            matrix = np.array(obj.matrix_world)
+            self.trees[key] = (BVHTree.FromObject(obj, self.depsgraph),
+                               matrix, np.linalg.inv(matrix))
+        return self.trees[key]
+    
+    def _overlaps(self, obj, centre, size):
+        tree, matrix, inverse = self._tree(obj)
+        corners = core.cube_vertices(size) + centre
+        local = corners @ inverse[:3, :3].T + inverse[:3, 3]
+        local_centre = inverse[:3, :3] @ centre + inverse[:3, 3]
+        
+        from mathutils.bvhtree import BVHTree
+        cube = BVHTree.FromPolygons(local.tolist(), core.CUBE_FACES)
+        if tree.overlap(cube):
+            return True
+        
+        # The surfaces do not cross, so either one holds the other or
+        # they are apart
+        location, normal, _, _ = tree.find_nearest(local_centre.tolist())
+        if location is None:
+            return False
+        offset = np.array(location) - local_centre
+        if offset @ np.array(normal) > 0:
+            return True  # The cube is inside the mesh
+        nearest = matrix[:3, :3] @ np.array(location) + matrix[:3, 3]
+        return bool((np.abs(nearest - centre) <= size / 2).all())
+    
+    def __call__(self, centres, size):
+        hits = np.zeros(len(centres), dtype=bool)
+        for index, centre in enumerate(centres):
+            for row in self.hash.query(core.cube_bounds(centre, size)):
+                obj = self.owners[row]
+                if obj is None or self._overlaps(obj, centre, size):
+                    hits[index] = True
+                    break
+        return hits
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        if not isinstance(update.id, bpy.types.Object):
+            continue
+        if update.is_updated_transform or update.is_updated_geometry:
+            bounds_cache.invalidate(update.id.original)
+
+
+@persistent
+def on_bounds_reset(*args):
+    bounds_cache.clear()
+
+
+def get_cube_collection(context, name="Distributed Cubes"):
+    """Get the collection distributed cubes go into, creating it if needed"""
+    if name in bpy.data.collections:
+        return bpy.data.collections[name]
+    
+    collection = bpy.data.collections.new(name)
+    context.scene.collection.children.link(collection)
+    return collection
+
+
+
+
+def publish_stats(operator, props, stats, **details):
+    """Close stats and publish them if Record Timings is on
+    
+    The timings go to the operator report, to the scene's last_stats (shown
+    in the panel) and, if a log file is set, to one appended JSON line.
+    """
+    stats.close()
+    if not props.record_stats:
+        return
+    
+    record = {"operator": operator.bl_idname,
+              "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+    record.update(details)
+    record.update(stats.as_dict())
+    props.last_stats = json.dumps(record)
+    operator.report({'INFO'}, f"{operator.bl_label}: {stats.summary()}")
+    
+    if props.stats_log:
+        try:
+            with open(bpy.path.abspath(props.stats_log), "a") as log:
+                log.write(json.dumps(record) + "\n")
+        except OSError as error:
+            operator.report({'WARNING'}, f"Could not write timings log: {error}")
+
+
+def merge_objects(target, sources, internal, stats=None, remove_sources=True):
+    """Merge sources into target on a standalone BMesh
+    
+    internal[k] lists the faces of ([target] + sources)[k] that end up inside
+    the result; they are deleted and only their corners are welded, so the
+    cost of the weld follows the seam size rather than the mesh size. The
+    BMesh is written back to target once. Sources are removed afterwards
+    unless remove_sources is False. Uses no operators and no mode switches,
+    so it also runs from background scripts and timers. Each step is timed
+    as a phase of stats, if given.
+    """
+    stats = stats or core.PhaseStats()
+    
+    with stats.phase("build"):
+        bm = bmesh.new()
+        to_target = target.matrix_world.inverted()
+        internal_faces = []
+        
+        for obj, faces in zip([target] + list(sources), internal):
+            first_vert = len(bm.verts)
+            first_face = len(bm.faces)
+            bm.from_mesh(obj.data)
+            bm.verts.ensure_lookup_table()
+            bm.faces.ensure_lookup_table()
+            
+            # Bring the appended geometry into the target's local space
+            if obj is not target:
+                bmesh.ops.transform(bm, matrix=to_target @ obj.matrix_world,
+                                    verts=bm.verts[first_vert:])
+            internal_faces.extend(bm.faces[first_face + i] for i in faces)
+    
+    with stats.phase("delete"):
+        # Duplicates can only sit on the shared faces, so only weld their corners
+        seam = list({vert for face in internal_faces for vert in face.verts})
+        bmesh.ops.delete(bm, geom=internal_faces, context='FACES_ONLY')
+    
+    with stats.phase("weld"):
+        bmesh.ops.remove_doubles(bm, verts=seam, dist=core.DEFAULT_TOLERANCE)
+    
+    with stats.phase("write"):
+        bm.to_mesh(target.data)
+        target.data.update()
+        bm.free()
+    
+    if remove_sources:
+        with stats.phase("cleanup"):
+            remove_objects(sources)
+    
+    return target
+
+
+def compose_lattice(target, sources, centres, size, stats=None,
+                    remove_sources=True):
+    """Replace target's mesh with the outer surface of cubes at centres
+    
+    For axis-aligned cubes on one lattice the shared faces follow from which
+    cells are occupied, so the surface is built in one vectorised pass with
+    core.voxel_geometry and written straight into target's mesh. Nothing is
+    joined, welded or deleted. Sources are removed afterwards unless
+    remove_sources is False.
+    """
+    stats = stats or core.PhaseStats()
+    
+    with stats.phase("lattice"):
+        verts, quads, _ = core.voxel_geometry(centres, size, cull_shared=True)
+        inverse = np.linalg.inv(np.array(target.matrix_world))
+        verts = verts @ inverse[:3, :3].T + inverse[:3, 3]
+    
+    with stats.phase("write"):
+        mesh = target.data
+        mesh.clear_geometry()
+        fill_mesh(mesh, verts, quads, np.full(len(quads), 4))
+    
+    if remove_sources:
+        with stats.phase("cleanup"):
+            remove_objects(sources)
+    
+    return target
+
+
+def simplify_mesh(obj, stats=None):
+    """Merge the coplanar quads of obj's mesh into maximal rectangles
+    
+    Runs core.merge_flat_quads in world space, where composed cubes are
+    axis-aligned, and writes the result back into obj's mesh. Seam vertices
+    left in the middle of straight edges go with the quads they joined.
+    """
+    stats = stats or core.PhaseStats()
+    
+    with stats.phase("simplify"):
+        verts, faces = get_mesh_arrays(obj)
+        verts, faces = core.merge_flat_quads(verts, faces, core.DEFAULT_TOLERANCE)
+        replace_mesh(obj, verts, faces)
+    
+    return obj
+
+
+def replace_mesh(obj, verts, faces):
+    """Replace the geometry of obj's mesh with world-space verts and faces"""
+    inverse = np.linalg.inv(np.array(obj.matrix_world))
+    verts = verts @ inverse[:3, :3].T + inverse[:3, 3]
+    mesh = obj.data
+    mesh.clear_geometry()
+    fill_mesh(mesh, verts, faces.loop_verts, faces.loop_totals)
+    return mesh
+
+
+def remove_objects(objects, meshes=()):
+    """Remove objects, then their meshes and those in meshes once unused"""
+    orphans = {obj.data for obj in objects if obj.data is not None}
+    orphans.update(meshes)
+    for obj in objects:
+        bpy.data.objects.remove(obj)
+    for mesh in orphans:
+        if mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+
+
+def create_cube_mesh(name="Cube", size=1.0):
+    """Build a cube mesh datablock directly in bpy.data"""
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(core.cube_vertices(size).tolist(), [], core.CUBE_FACES)
+    mesh.update()
+    return mesh
+
+
+def create_cube_objects(collection, positions, size=1.0, name="Cube",
+                        shared_mesh=False, window_manager=None):
+    """Create one cube object per position, linked straight into collection
+    
+    Works on bpy.data instead of bpy.ops.mesh.primitive_cube_add, so there is
+    no depsgraph update or undo push per cube; the caller updates the view
+    layer once at the end. With shared_mesh every object uses the same mesh
+    datablock, like linked duplicates. Objects are created in batches of
+    CREATE_BATCH_SIZE, reporting progress to window_manager if given.
+    """
+    objects = []
+    for batch in iter_cube_objects(collection, positions, size, name, shared_mesh):
+        objects.extend(batch)
+        if window_manager is not None:
+            window_manager.progress_update(len(objects))
+    return objects
+
+
+def iter_cube_objects(collection, positions, size=1.0, name="Cube",
+                      shared_mesh=False, batch_size=CREATE_BATCH_SIZE):
+    """Create cube objects like create_cube_objects, one batch at a time
+    
+    Yields the objects of each batch of batch_size positions, so the caller
+    can report progress or hand control back between batches.
+    """
+    template = create_cube_mesh(name, size)
+    if not len(positions):
+        bpy.data.meshes.remove(template)
+        return
+    
+    for start in range(0, len(positions), batch_size):
+        batch = []
+        for index, location in enumerate(positions[start:start + batch_size], start):
+            if shared_mesh or index == 0:
+                mesh = template
+            else:
+                mesh = template.copy()
+            obj = bpy.data.objects.new(f"{name}.{index:03d}", mesh)
+            obj.location = location
+            collection.objects.link(obj)
+            batch.append(obj)
+        yield batch
+
+
+
+
+def create_cube_instancer(collection, positions, size=1.0, name="Cube Instances"):
+    """Create one point object that instances a cube at every position
+    
+    The cube mesh lives on a child object that Blender repeats at each vertex
+    of the parent (vertex instancing), so the scene gains two objects no
+    matter how many cubes are placed.
+    """
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    
+    points = bpy.data.meshes.new(name)
+    points.vertices.add(len(positions))
+    points.vertices.foreach_set("co", positions.ravel())
+    points.update()
+    
+    instancer = bpy.data.objects.new(name, points)
+    instancer.instance_type = 'VERTS'
+    instancer.show_instancer_for_viewport = False
+    instancer.show_instancer_for_render = False
+    collection.objects.link(instancer)
+    
+    cube = bpy.data.objects.new(f"{name} Cube", create_cube_mesh("Cube", size))
+    cube.parent = instancer
+    collection.objects.link(cube)
+    
+    return instancer
+
+
+
+
+def iter_export_meshes(objects, chunk_size=core.EXPORT_CHUNK_SIZE):
+    """Yield the world-space (verts, faces) of every mesh in objects
+    
+    Meshes are read one object at a time. A vertex instancer yields its
+    instanced meshes at every point, about chunk_size vertices at a time;
+    its own points and the instanced children themselves are left out, as
+    in get_object_bounds.
+    """
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        if is_vertex_instancer(obj):
+            yield from iter_instance_meshes(obj, chunk_size)
+        elif obj.parent is None or not is_vertex_instancer(obj.parent):
+            yield get_mesh_arrays(obj)
+
+
+def iter_instance_meshes(instancer, chunk_size=core.EXPORT_CHUNK_SIZE):
+    """Yield the meshes instanced on instancer, a chunk of points at a time"""
+    points = get_points(instancer)
+    placement = np.eye(4)
+    placement[:3, :3] = np.array(instancer.matrix_world)[:3, :3]
+    
+    for child in instancer.children:
+        if child.type != 'MESH':
+            continue
+        verts, faces = get_mesh_arrays(child, placement @ np.array(child.matrix_local))
+        step = max(chunk_size // max(len(verts), 1), 1)
+        for start in range(0, len(points), step):
+            chunk = points[start:start + step]
+            offsets = np.arange(len(chunk))[:, np.newaxis] * len(verts)
+            yield ((chunk[:, np.newaxis] + verts).reshape(-1, 3),
+                   core.FaceArrays((faces.loop_verts + offsets).ravel(),
+                                   np.tile(faces.loop_totals, len(chunk))))
+
+
+def export_objects(objects, filepath, file_format=None):
+    """Write the world-space geometry of objects into one PLY, STL or OBJ file
+    
+    Objects are read and written one at a time by core.write_mesh, so this
+    also works from background scripts on layouts too large to join. The
+    format defaults to the file extension. Returns the number of vertices
+    and faces written.
+    """
+    return core.write_mesh(bpy.path.abspath(filepath), iter_export_meshes(objects),
+                           file_format)
+
+
+def fill_mesh(mesh, verts, face_verts, face_sizes):
+    """Write vertices and polygons into an empty mesh with foreach_set
+    
+    face_verts is the flat vertex index list of all faces and face_sizes the
+    number of corners of each face.
+    """
+    verts = np.asarray(verts, dtype=np.float32).reshape(-1, 3)
+    face_verts = np.asarray(face_verts, dtype=np.int32).ravel()
+    face_sizes = np.asarray(face_sizes, dtype=np.int32).ravel()
+    loop_starts = np.zeros(len(face_sizes), dtype=np.int32)
+    np.cumsum(face_sizes[:-1], out=loop_starts[1:])
+    
+    mesh.vertices.add(len(verts))
+    mesh.loops.add(len(face_verts))
+    mesh.polygons.add(len(face_sizes))
+    mesh.vertices.foreach_set("co", verts.ravel())
+    mesh.loops.foreach_set("vertex_index", face_verts)
+    mesh.polygons.foreach_set("loop_start", loop_starts)
+    # Blender 4.0 derives the sizes from loop_start and made this read-only
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", face_sizes)
+    
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+def create_voxel_mesh(collection, positions, size=1.0, cull_shared=False,
+                      cell_attribute=False, name="Cube Voxels"):
+    """Create one object whose mesh holds a cube at every position
+    
+    All cubes are written in one vectorised pass. With cell_attribute every
+    face gets a "cell_index" integer attribute naming the cube it came from.
+    """
+    verts, quads, cells = core.voxel_geometry(positions, size, cull_shared)
+    
+    mesh = bpy.data.meshes.new(name)
+    fill_mesh(mesh, verts, quads, np.full(len(quads), 4))
+    if cell_attribute:
+        attribute = mesh.attributes.new("cell_index", 'INT', 'FACE')
+        attribute.data.foreach_set("value", cells.astype(np.int32))
+    
+    obj = bpy.data.objects.new(name, mesh)
+    collection.objects.link(obj)
+    return obj
+
+
+
+
+class CubeManagerProperties(PropertyGroup):
+    """Properties for the Cube Manager addon"""
+    
+    number_of_cubes: IntProperty(
+        name="Number of Meshes",
+        description="Number of cubes to distribute",
+        default=4,
+        min=1,
+        soft_max=1000
+    )
+    
+    spacing: FloatProperty(
+        name="Spacing",
+        description="Distance between the centres of neighbouring cubes; 1 makes them touch",
+        default=core.DEFAULT_SPACING,
+        min=1.0,
+        soft_max=10.0
+    )
+    
+    soft_limit: IntProperty(
+        name="Warn Above",
+        description="Warn with a memory and time estimate when distributing more cubes than this",
+        default=10000,
+        min=1
+    )
+    
+    shared_mesh: BoolProperty(
+        name="Share Mesh Data",
+        description="Let all distributed cubes use one mesh, like linked duplicates",
+        default=False
+    )
+    
+    output_mode: EnumProperty(
+        name="Output",
+        description="How distributed cubes are added to the scene",
+        items=[
+            ('OBJECTS', "Objects", "Create one object per cube"),
+            ('INSTANCES', "Instances",
+             "Create one point object that instances the cube at every position"),
+            ('VOXELS', "Voxels", "Write every cube into one mesh"),
+        ],
+        default='OBJECTS'
+    )
+    
+    exact_collision: BoolProperty(
+        name="Exact Collision",
+        description="Test cubes against the actual mesh of objects whose bounding box they hit, "
+                    "so rotated or concave objects only block the space they fill",
+        default=False
+    )
+    
+    simplify_faces: BoolProperty(
+        name="Merge Flat Faces",
+        description="After composing, join coplanar faces into as few rectangles as possible "
+                    "and drop the vertices left in the middle of straight edges",
+        default=False
+    )
+    
+    parallel_compose: BoolProperty(
+        name="Use Worker Processes",
+        description="Find shared faces tile by tile in separate processes, for large selections "
+                    "of meshes that are not plain lattice cubes",
+        default=False
+    )
+    
+    compose_workers: IntProperty(
+        name="Workers",
+        description="Processes to compose with (0 uses every core)",
+        default=0,
+        min=0
+    )
+    
+    stream_compose: BoolProperty(
+        name="Stream Into One Mesh",
+        description="Merge the whole selection into the first selected object a chunk at a time, "
+                    "keeping only the faces still waiting for a neighbour in memory",
+        default=False
+    )
+    
+    record_stats: BoolProperty(
+        name="Record Timings",
+        description="Time each stage of Distribute and Compose and report the result",
+        default=False
+    )
+    
+    trace_memory: BoolProperty(
+        name="Track Memory",
+        description="Also record the peak memory of each stage with tracemalloc "
+                    "(makes the operators noticeably slower)",
+        default=False
+    )
+    
+    stats_log: StringProperty(
+        name="Log File",
+        description="Append the timings of every run to this file as one JSON line",
+        default="",
+        subtype='FILE_PATH'
+    )
+    
+    last_stats: StringProperty(
+        name="Last Timings",
+        description="Timings of the last recorded run, as JSON",
+        default=""
+    )
+    
+    voxel_cell_index: BoolProperty(
+        name="Cell Index Attribute",
+        description="Store the index of the cube each face belongs to as a face attribute",
+        default=False
+    )
+    
+    voxel_cull_shared: BoolProperty(
+        name="Remove Shared Faces",
+        description="Drop faces between touching cubes and weld their corners "
+                    "(cubes only touch with Spacing 1)",
+        default=False
+    )
+
+
+
+
+class TimeSlicedOperator:
+    """Mixin that runs an operator's work in short slices from a modal timer
+    
+    Subclasses implement steps(context), a generator that does the work in
+    bounded chunks, yields the fraction done after each one and returns the
+    operator result, and rollback(context), which undoes a cancelled run.
+    execute runs every step at once, as scripts expect. invoke runs them
+    SLICE_SECONDS at a time from a timer, so Blender keeps redrawing and
+    shows the progress; Esc cancels and rolls back. Between slices only
+    view navigation gets through, so nothing the run holds can be deleted
+    or undone under it. However many slices a run takes, Blender pushes
+    one undo step when it finishes.
+    
+    steps creates its PhaseStats with new_stats, so they are closed (and
+    tracemalloc stopped) however the run ends.
+    """
+    
+    @classmethod
+    def poll(cls, context):
+        # One run at a time, so two never edit the same objects
+        return not running_jobs
+    
+    def new_stats(self, context):
+        """Create the PhaseStats of this run"""
+        props = context.scene.cube_manager_props
+        self._stats = core.PhaseStats(props.record_stats and props.trace_memory)
+        return self._stats
+    
+    def run_steps(self, context):
+        """Run steps, closing its stats when it finishes, fails or is closed"""
+        self._stats = None
+        try:
+            return (yield from self.steps(context))
+        finally:
+            if self._stats is not None:
+                self._stats.close()
+    
+    def execute(self, context):
+        self._batch_size = CREATE_BATCH_SIZE
+        steps = self.run_steps(context)
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, 100)
+        try:
+            while True:
+                window_manager.progress_update(next(steps) * 100)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            window_manager.progress_end()
+    
+    def invoke(self, context, event):
+        self._batch_size = SLICE_BATCH_SIZE
+        self._steps = self.run_steps(context)
+        # The first chunk runs right away, so invalid input fails at once
+        try:
+            self.progress = next(self._steps)
+        except StopIteration as stop:
+            return stop.value
+        
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(SLICE_SECONDS,
+                                                     window=context.window)
+        window_manager.modal_handler_add(self)
+        window_manager.progress_begin(0, 100)
+        running_jobs.append(self)
+        return {'RUNNING_MODAL'}
+    
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.cancel(context)
+            self.report({'WARNING'}, f"{self.bl_label} cancelled")
+            return {'CANCELLED'}
+        if event.type in NAVIGATION_EVENTS:
+            return {'PASS_THROUGH'}
+        if event.type != 'TIMER':
+            return {'RUNNING_MODAL'}
+        
+        deadline = time.perf_counter() + SLICE_SECONDS
+        try:
+            while time.perf_counter() < deadline:
+                self.progress = next(self._steps)
+        except StopIteration as stop:
+            self.end_modal(context)
+            return stop.value
+        except Exception:
+            self.cancel(context)
+            raise
+        
+        context.window_manager.progress_update(self.progress * 100)
+        self.redraw(context)
+        return {'RUNNING_MODAL'}
+    
+    def cancel(self, context):
+        """Stop a modal run and undo what it did so far"""
+        self.end_modal(context)
+        self._steps.close()
+        self.rollback(context)
+    
+    def end_modal(self, context):
+        """Remove the timer and progress display of a modal run"""
+        if self not in running_jobs:
+            return
+        running_jobs.remove(self)
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self._timer)
+        window_manager.progress_end()
+        self.redraw(context)
+    
+    def redraw(self, context):
+        # The panel showing the progress lives in the area the run started from
+        if context.area is not None:
+            context.area.tag_redraw()
+
+
+
+
+class CUBE_OT_distribute(TimeSlicedOperator, Operator):
+    """Distribute N cubes in a 2D array"""
+    bl_idname = "cube.distribute_cubes"
+    bl_label = "Distribute Cubes"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def steps(self, context):
+        props = context.scene.cube_manager_props
+        n = props.number_of_cubes
+        
+        # Large counts are allowed, but say what they are going to cost
+        if n > props.soft_limit:
+            self.report({'WARNING'}, self.cost_warning(n, props))
+        
+        stats = self.new_stats(context)
+        
+        # Calculate grid dimensions (as square as possible)
+        rows, cols = core.grid_dimensions(n)
+        
+        # Create or get collection, remembering what to remove on cancel
+        self._new_collection = "Distributed Cubes" not in bpy.data.collections
+        self._collection = get_cube_collection(context)
+        self._created = []
+        
+        # Get existing objects to avoid overlap
+        with stats.phase("bounds"):
+            # Evaluating runs the depsgraph handler for edits made since the
+            # last update, such as a script moving an object just before
+            depsgraph = context.evaluated_depsgraph_get()
+            narrow_phase = None
+            if props.exact_collision:
+                existing_bounds, owners = bounds_cache.scene_bounds(
+                    context.scene, with_owners=True)
+                narrow_phase = MeshCollider(existing_bounds, owners, depsgraph)
+            else:
+                existing_bounds = bounds_cache.scene_bounds(context.scene)
+        yield 0.05
+        
+        # Lay out the grid, moving cells that collide with existing objects
+        # to the nearest free lattice cell
+        with stats.phase("layout"):
+            layout = core.resolve_layout(n, existing_bounds, 1.0, props.spacing,
+                                         max_radius=core.search_radius(rows, cols),
+                                         narrow_phase=narrow_phase)
+            positions = layout.positions
+        yield 0.1
+        
+        # Create cubes without going through bpy.ops
+        if props.output_mode == 'INSTANCES':
+            with stats.phase("create"):
+                instancer = create_cube_instancer(self._collection, positions, 1.0)
+                self._created.extend([instancer] + list(instancer.children))
+        elif props.output_mode == 'VOXELS':
+            with stats.phase("create"):
+                self._created.append(create_voxel_mesh(
+                    self._collection, positions, 1.0,
+                    cull_shared=props.voxel_cull_shared,
+                    cell_attribute=props.voxel_cell_index))
+        else:
+            batches = iter_cube_objects(self._collection, positions.tolist(), 1.0,
+                                        shared_mesh=props.shared_mesh,
+                                        batch_size=self._batch_size)
+            while True:
+                with stats.phase("create"):
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                self._created.extend(batch)
+                yield 0.1 + 0.85 * len(self._created) / len(positions)
+        
+        with stats.phase("update"):
+            context.view_layer.update()
+        
+        message = (f"Created {len(positions)} cubes in {rows}x{cols} grid "
+                   f"({layout.moved} moved around obstacles, {layout.skipped} skipped)")
+        self.report({'WARNING'} if layout.skipped else {'INFO'}, message)
+        publish_stats(self, props, stats, cubes=len(positions),
+                      output=props.output_mode)
+        return {'FINISHED'}
+    
+    def rollback(self, context):
+        """Remove the cubes of a cancelled run"""
+        remove_objects(self._created)
+        self._created = []
+        if self._new_collection and not self._collection.objects:
+            bpy.data.collections.remove(self._collection)
+        context.view_layer.update()
+    
+    def cost_warning(self, n, props):
+        """Describe the rough memory and time cost of distributing n cubes"""
+        if props.output_mode in {'INSTANCES', 'VOXELS'}:
+            mode = props.output_mode
+        elif props.shared_mesh:
+            mode = 'SHARED'
+        else:
+            mode = 'OBJECTS'
+        
+        memory, seconds = core.estimate_distribution_cost(n, mode)
+        return (f"Distributing {n} cubes needs roughly {core.format_bytes(memory)} "
+                f"and {seconds:.0f}s; consider Instances output for large counts")
+
+
+class CUBE_OT_delete(Operator):
+    """Delete selected cubes"""
+    bl_idname = "cube.delete_cubes"
+    bl_label = "Delete Cubes"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @classmethod
+    def poll(cls, context):
+        # Not while a modal run still holds the objects
+        return not running_jobs
+    
+    def execute(self, context):
+        selected = context.selected_objects
+        
+        if not selected:
+            self.report({'WARNING'}, "No objects selected")
+            return {'CANCELLED'}
+        
+        count = len(selected)
+        bpy.ops.object.delete()
+        
+        self.report({'INFO'}, f"Deleted {count} object(s)")
+        return {'FINISHED'}
+
+
+
+
+class CUBE_OT_realize_instances(Operator):
+    """Turn the selected points of a cube instancer into real cube objects"""
+    bl_idname = "cube.realize_instances"
+    bl_label = "Realize Instances"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return not running_jobs and obj is not None and is_vertex_instancer(obj)
+    
+    def execute(self, context):
+        instancer = context.active_object
+        
+        # Leaving edit mode writes the point selection back to the mesh
+        if instancer.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        
+        mesh = instancer.data
+        count = len(mesh.vertices)
+        selected = np.zeros(count, dtype=bool)
+        mesh.vertices.foreach_get("select", selected)
+        
+        if not selected.any():
+            self.report({'WARNING'}, "No instance points selected")
+            return {'CANCELLED'}
+        
+        # Create real cubes where the selected points are
+        points = get_points(instancer)
+        props = context.scene.cube_manager_props
+        collection = get_cube_collection(context)
+        cubes = create_cube_objects(collection, points[selected].tolist(), 1.0,
+                                    shared_mesh=props.shared_mesh)
+        
+        # Remove the realized points from the instancer
+        local = np.empty(count * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", local)
+        keep = local.reshape(-1, 3)[~selected]
+        mesh.clear_geometry()
+        mesh.vertices.add(len(keep))
+        mesh.vertices.foreach_set("co", keep.ravel())
+        mesh.update()
+        
+        # Select the new cubes so they can be composed right away
+        bpy.ops.object.select_all(action='DESELECT')
+        for cube in cubes:
+            cube.select_set(True)
+        context.view_layer.objects.active = cubes[0]
+        context.view_layer.update()
+        
+        self.report({'INFO'}, f"Realized {len(cubes)} cube(s)")
+        return {'FINISHED'}
+
+
+
+
+class CUBE_OT_compose_mesh(TimeSlicedOperator, Operator):
+    """Merge selected meshes with common faces"""
+    bl_idname = "cube.compose_mesh"
+    bl_label = "Compose Mesh"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @classmethod
+    def poll(cls, context):
+        # Meshes are read from object data, which edit mode keeps stale
+        return context.mode == 'OBJECT' and super().poll(context)
+    
+    def steps(self, context):
+        selected = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        
+        if len(selected) < 2:
+            self.report({'ERROR'}, "Select at least 2 mesh objects")
+            return {'CANCELLED'}
+        
+        props = context.scene.cube_manager_props
+        stats = self.new_stats(context)
+        self._edited = []
+        if props.stream_compose:
+            return (yield from self.stream_steps(context, selected, stats))
+        
+        # Find connected groups on plain arrays, then merge each group once
+        meshes = []
+        for start in range(0, len(selected), self._batch_size):
+            with stats.phase("read"):
+                meshes.extend(get_mesh_arrays(obj)
+                              for obj in selected[start:start + self._batch_size])
+            yield 0.2 * len(meshes) / len(selected)
+        surfaces = tiles = None
+        with stats.phase("plan"):
+            lattice = core.find_lattice_cubes(meshes, core.DEFAULT_TOLERANCE)
+            if len(lattice.indices) == len(selected):
+                # Only lattice cubes: cell adjacency is all there is to plan
+                components = [lattice.indices[group].tolist()
+                              for group in core.lattice_components(lattice.keys)]
+                internal = None
+            elif props.parallel_compose:
+                workers = props.compose_workers or os.cpu_count() or 1
+                tiles = core.TiledCompose(meshes, workers, core.DEFAULT_TOLERANCE)
+            else:
+                components, internal = core.plan_components(
+                    meshes, core.DEFAULT_TOLERANCE)
+        yield 0.3
+        
+        if tiles is not None:
+            # Tiles are merged by worker processes; wait for them a tile at a time
+            results = []
+            pending = core.run_tiles(tiles.tasks, workers)
+            try:
+                while True:
+                    with stats.phase("tiles"):
+                        result = next(pending, None)
+                    if result is None:
+                        break
+                    results.append(result)
+                    yield 0.3 + 0.4 * len(results) / len(tiles.tasks)
+            finally:
+                pending.close()
+            with stats.phase("stitch"):
+                components, surfaces = tiles.stitch(results)
+        
+        cube_rows = {index: row for row, index in enumerate(lattice.indices.tolist())}
+        merged_from = 0.3 if tiles is None else 0.7
+        for done, component in enumerate(components, 1):
+            target = selected[component[0]]
+            sources = [selected[i] for i in component[1:]]
+            
+            # Edit a copy of the target's mesh: linked duplicates outside the
+            # merge keep the original, and a cancelled run can put it back
+            original = target.data
+            target.data = original.copy()
+            self._edited.append((target, original))
+            if surfaces is not None:
+                with stats.phase("write"):
+                    replace_mesh(target, *surfaces[done - 1])
+            elif all(i in cube_rows for i in component):
+                centres = lattice.centres[[cube_rows[i] for i in component]]
+                compose_lattice(target, sources, centres, lattice.size, stats,
+                                remove_sources=False)
+            else:
+                merge_objects(target, sources, [internal[i] for i in component],
+                              stats, remove_sources=False)
+            if props.simplify_faces:
+                simplify_mesh(target, stats)
+            yield merged_from + (0.95 - merged_from) * done / len(components)
+        
+        # Sources go only once every group is merged, so up to here a
+        # cancelled run can be rolled back completely
+        with stats.phase("cleanup"):
+            names = [(target, original.name) for target, original in self._edited]
+            remove_objects([selected[i] for component in components
+                            for i in component[1:]],
+                           [original for _, original in self._edited])
+            for target, name in names:
+                if name not in bpy.data.meshes:
+                    target.data.name = name
+            self._edited = []
+        
+        publish_stats(self, props, stats, meshes=len(selected),
+                      components=len(components))
+        if components:
+            bpy.ops.object.select_all(action='DESELECT')
+            for component in components:
+                selected[component[0]].select_set(True)
+            context.view_layer.objects.active = selected[components[0][0]]
+            
+            merged = sum(len(component) for component in components)
+            self.report({'INFO'}, f"Merged {merged} meshes into {len(components)} object(s)")
+            return {'FINISHED'}
+        else:
+            self.report({'WARNING'}, "No meshes with common faces found")
+            return {'CANCELLED'}
+    
+    def stream_steps(self, context, selected, stats):
+        """Merge the whole selection into its first object, chunk by chunk
+        
+        Objects are read in sweep order a chunk at a time and merged into
+        the frontier of a core.StreamingCompose, which spools finished faces
+        to disk, so memory follows the frontier instead of the selection.
+        The spooled surface is written into the first object's mesh once.
+        """
+        props = context.scene.cube_manager_props
+        target = selected[0]
+        with stats.phase("plan"):
+            matrices = np.array([obj.matrix_world for obj in selected])
+            corners = np.array([obj.bound_box for obj in selected])
+            stream = core.StreamingCompose(core.transform_bounds(matrices, corners),
+                                           core.DEFAULT_TOLERANCE,
+                                           np.linalg.inv(np.array(target.matrix_world)))
+        
+        try:
+            for chunk in stream.chunks(core.STREAM_CHUNK_SIZE):
+                meshes = []
+                for start in range(0, len(chunk), self._batch_size):
+                    with stats.phase("read"):
+                        meshes.extend(get_mesh_arrays(selected[i])
+                                      for i in chunk[start:start + self._batch_size])
+                    yield 0.9 * (stream.read + len(meshes)) / len(selected)
+                with stats.phase("stream"):
+                    stream.add(meshes)
+            
+            if not stream.shared_faces:
+                publish_stats(self, props, stats, meshes=len(selected), components=0)
+                self.report({'WARNING'}, "No meshes with common faces found")
+                return {'CANCELLED'}
+            
+            original = target.data
+            target.data = original.copy()
+            self._edited.append((target, original))
+            with stats.phase("write"):
+                verts, faces = stream.spool.arrays()
+                mesh = target.data
+                mesh.clear_geometry()
+                fill_mesh(mesh, verts, faces.loop_verts, faces.loop_totals)
+                del verts, faces
+        finally:
+            stream.close()
+        
+        if props.simplify_faces:
+            simplify_mesh(target, stats)
+        yield 0.95
+        
+        with stats.phase("cleanup"):
+            name = original.name
+            remove_objects(selected[1:], [original])
+            if name not in bpy.data.meshes:
+                target.data.name = name
+            self._edited = []
+        
+        publish_stats(self, props, stats, meshes=len(selected), components=1,
+                      frontier_faces=stream.peak_faces)
+        bpy.ops.object.select_all(action='DESELECT')
+        target.select_set(True)
+        context.view_layer.objects.active = target
+        self.report({'INFO'}, f"Merged {len(selected)} meshes into 1 object")
+        return {'FINISHED'}
+    
+    def rollback(self, context):
+        """Give the targets of a cancelled run their original meshes back"""
+        for target, original in reversed(self._edited):
+            edited = target.data
+            target.data = original
+            bpy.data.meshes.remove(edited)
+        self._edited = []
+        context.view_layer.update()
+
+
+
+
+class CUBE_OT_export_mesh(Operator):
+    """Write meshes straight to a PLY, STL or OBJ file"""
+    bl_idname = "cube.export_mesh"
+    bl_label = "Export Mesh"
+    
+    filepath: StringProperty(
+        name="File Path",
+        description="File to write",
+        default="",
+        subtype='FILE_PATH'
+    )
+    
+    filter_glob: StringProperty(
+        default="*.ply;*.stl;*.obj",
+        options={'HIDDEN'}
+    )
+    
+    file_format: EnumProperty(
+        name="Format",
+        description="File format to write",
+        items=[
+            ('PLY', "PLY", "Binary PLY with the original polygons"),
+            ('STL', "STL", "Binary STL, polygons split into triangles"),
+            ('OBJ', "OBJ", "Wavefront OBJ text with the original polygons"),
+        ],
+        default='PLY'
+    )
+    
+    source: EnumProperty(
+        name="Export",
+        description="Which objects to write",
+        items=[
+            ('SELECTED', "Selected", "The selected meshes, such as a composed mesh"),
+            ('LAYOUT', "Distributed Cubes",
+             "Every cube in the Distributed Cubes collection, instances included"),
+        ],
+        default='SELECTED'
+    )
+    
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = f"cubes.{self.file_format.lower()}"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+    
+    def execute(self, context):
+        if self.source == 'LAYOUT':
+            collection = bpy.data.collections.get("Distributed Cubes")
+            objects = list(collection.all_objects) if collection else []
+        else:
+            objects = context.selected_objects
+        objects = [obj for obj in objects if obj.type == 'MESH']
+        
+        if not objects:
+            self.report({'WARNING'}, "No meshes to export")
+            return {'CANCELLED'}
+        if not self.filepath:
+            self.report({'ERROR'}, "No file path given")
+            return {'CANCELLED'}
+        
+        path = bpy.path.ensure_ext(bpy.path.abspath(self.filepath),
+                                   f".{self.file_format.lower()}")
+        try:
+            verts, faces = export_objects(objects, path, self.file_format)
+        except (OSError, ValueError) as error:
+            self.report({'ERROR'}, f"Could not export: {error}")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"Wrote {faces} faces and {verts} vertices to {path}")
+        return {'FINISHED'}
+
+
+
+
+class CUBE_PT_main_panel(Panel):
+    """Main panel for Cube Manager"""
+    bl_label = "Cube Manager"
+    bl_idname = "CUBE_PT_main_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'Cube Manager'
+    
+    def draw(self, context):
+        layout = self.layout
+        props = context.scene.cube_manager_props
+        
+        for job in running_jobs:
+            layout.label(text=f"{job.bl_label}: {job.progress:.0%} (Esc to cancel)",
+                         icon='TIME')
+        
+        # Feature Set 1
+        box = layout.box()
+        box.label(text="Task 1", icon='CUBE')
+        
+        box.prop(props, "number_of_cubes")
+        box.prop(props, "spacing")
+        box.prop(props, "soft_limit")
+        box.prop(props, "exact_collision")
+        box.prop(props, "output_mode")
+        if props.output_mode == 'OBJECTS':
+            box.prop(props, "shared_mesh")
+        elif props.output_mode == 'VOXELS':
+            box.prop(props, "voxel_cell_index")
+            box.prop(props, "voxel_cull_shared")
+        box.operator("cube.distribute_cubes", icon='GRID')
+        box.operator("cube.realize_instances", icon='OUTLINER_OB_POINTCLOUD')
+        box.operator("cube.delete_cubes", icon='TRASH')
+        
+        layout.separator()
+        
+        # Feature Set 2
+        box = layout.box()
+        box.label(text="Mesh Composition", icon='MOD_BOOLEAN')
+        box.prop(props, "simplify_faces")
+        box.prop(props, "stream_compose")
+        if not props.stream_compose:
+            box.prop(props, "parallel_compose")
+            if props.parallel_compose:
+                box.prop(props, "compose_workers")
+        box.operator("cube.compose_mesh", icon='AUTOMERGE_ON')
+        
+        layout.separator()
+        
+        box = layout.box()
+        box.label(text="Export", icon='EXPORT')
+        box.operator("cube.export_mesh", text="Export Selected").source = 'SELECTED'
+        box.operator("cube.export_mesh", text="Export Layout").source = 'LAYOUT'
+        
+        layout.separator()
+        
+        box = layout.box()
+        box.label(text="Diagnostics", icon='TIME')
+        box.prop(props, "record_stats")
+        if props.record_stats:
+            box.prop(props, "trace_memory")
+            box.prop(props, "stats_log")
+            self.draw_stats(box, props.last_stats)
+    
+    def draw_stats(self, layout, last_stats):
+        """Show the phases of the last recorded run, one per line"""
+        if not last_stats:
+            return
+        record = json.loads(last_stats)
+        column = layout.column(align=True)
+        column.label(text=f"{record['operator']}: {record['total_seconds']:.2f}s")
+        for name, phase in record["phases"].items():
+            text = f"  {name}: {phase['seconds']:.3f}s"
+            if "peak_bytes" in phase:
+                text += f", {core.format_bytes(phase['peak_bytes'])}"
+            column.label(text=text)
+
+
+
+
+classes = (
+    CubeManagerProperties,
+    CUBE_OT_distribute,
+    CUBE_OT_delete,
+    CUBE_OT_realize_instances,
+    CUBE_OT_compose_mesh,
+    CUBE_OT_export_mesh,
+    CUBE_PT_main_panel,
+)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    
+    bpy.types.Scene.cube_manager_props = bpy.props.PointerProperty(
+        type=CubeManagerProperties
+    )
+    
+    handlers = bpy.app.handlers
+    handlers.depsgraph_update_post.append(on_depsgraph_update)
+    for reset in (handlers.load_post, handlers.undo_post, handlers.redo_post,
+                  handlers.frame_change_post):
+        reset.append(on_bounds_reset)
+
+
+def unregister():
+    handlers = bpy.app.handlers
+    handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    for reset in (handlers.load_post, handlers.undo_post, handlers.redo_post,
+                  handlers.frame_change_post):
+        reset.remove(on_bounds_reset)
+    bounds_cache.clear()
+    
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+    
+    del bpy.types.Scene.cube_manager_props
+
+
+if __name__ == "__main__":
+    register()
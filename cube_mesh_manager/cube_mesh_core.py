@@ -0,0 +1,2013 @@
+"""
+Headless geometry core for the Cube Mesh Manager addon.
+
+Everything in this module works on plain Python values and NumPy arrays and
+never touches bpy, so the layout, overlap and merge logic can be profiled,
+benchmarked and reused by batch jobs outside Blender. The operators in the
+package's __init__.py only translate Blender data to and from these arrays.
+
+Conventions:
+- Bounds are (min_x, max_x, min_y, max_y, min_z, max_z), one row per object.
+- Vertices are (N, 3) float arrays in world space.
+- Faces are FaceArrays (flat loop arrays, as Blender stores them) or plain
+  sequences of vertex indices into the matching vertex array.
+"""
+
+import itertools
+import math
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+
+
+DEFAULT_SPACING = 2.5
+DEFAULT_CUBE_SIZE = 1.0
+DEFAULT_TOLERANCE = 0.0001
+
+
+
+
+# ---------------------------------------------------------------------------
+# Grid layout and overlap resolution
+# ---------------------------------------------------------------------------
+
+# Quads of an axis-aligned cube over the corners from cube_vertices, wound
+# so that every normal points outwards
+CUBE_FACES = (
+    (0, 1, 3, 2),  # -X
+    (4, 6, 7, 5),  # +X
+    (0, 4, 5, 1),  # -Y
+    (2, 3, 7, 6),  # +Y
+    (0, 2, 6, 4),  # -Z
+    (1, 5, 7, 3),  # +Z
+)
+
+
+def cube_vertices(size=DEFAULT_CUBE_SIZE):
+    """Return the (8, 3) corners of a cube of the given size at the origin
+
+    Corner k has bit 2 set for +X, bit 1 for +Y and bit 0 for +Z.
+    """
+    half_size = size / 2
+    bits = np.arange(8)
+    signs = np.stack([(bits >> 2) & 1, (bits >> 1) & 1, bits & 1], axis=1)
+    return (signs * 2 - 1) * half_size
+
+
+def grid_dimensions(n):
+    """Return (rows, cols) of the squarest grid holding n cells"""
+    if n <= 0:
+        return 0, 0
+    cols = math.ceil(math.sqrt(n))
+    rows = math.ceil(n / cols)
+    return rows, cols
+
+
+def grid_positions(n, spacing=DEFAULT_SPACING, z=0.0):
+    """Return the (rows * cols, 3) cell centres of the grid for n cubes
+
+    Cells are ordered row by row, the same order the operator fills them in.
+    """
+    rows, cols = grid_dimensions(n)
+    i, j = np.divmod(np.arange(rows * cols), cols)
+    positions = np.empty((rows * cols, 3), dtype=np.float64)
+    positions[:, 0] = j * spacing
+    positions[:, 1] = i * spacing
+    positions[:, 2] = z
+    return positions
+
+
+def cube_bounds(position, size=DEFAULT_CUBE_SIZE):
+    """Return the bounds of an axis-aligned cube centred at position"""
+    half_size = size / 2
+    x, y, z = position
+    return (x - half_size, x + half_size,
+            y - half_size, y + half_size,
+            z - half_size, z + half_size)
+
+
+def as_bounds_array(bounds):
+    """Convert a sequence of bounds tuples (None entries skipped) to (N, 6)"""
+    rows = [b for b in bounds if b is not None]
+    if not rows:
+        return np.empty((0, 6), dtype=np.float64)
+    return np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+
+
+def transform_bounds(matrices, corners):
+    """Return the (N, 6) world bounds of N local bounding boxes
+
+    matrices is an (N, 4, 4) stack of world matrices and corners an (N, 8, 3)
+    stack of local box corners (Blender's bound_box). All corners are
+    transformed in one batched multiply.
+    """
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    corners = np.asarray(corners, dtype=np.float64).reshape(-1, 8, 3)
+    world = (np.einsum('nij,nkj->nki', matrices[:, :3, :3], corners)
+             + matrices[:, None, :3, 3])
+
+    bounds = np.empty((len(world), 6), dtype=np.float64)
+    bounds[:, 0::2] = world.min(axis=1)
+    bounds[:, 1::2] = world.max(axis=1)
+    return bounds
+
+
+def instance_bounds(points, corners):
+    """Return the (N, 6) bounds of one box repeated at N points
+
+    corners holds the box corners as offsets from each point, already in
+    world orientation.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    corners = np.asarray(corners, dtype=np.float64).reshape(-1, 3)
+    bounds = np.empty((len(points), 6), dtype=np.float64)
+    bounds[:, 0::2] = points + corners.min(axis=0)
+    bounds[:, 1::2] = points + corners.max(axis=0)
+    return bounds
+
+
+def boxes_overlap(a, b):
+    """Check if two bounds tuples overlap (touching counts as overlapping)"""
+    return not (a[1] < b[0] or a[0] > b[1] or
+                a[3] < b[2] or a[2] > b[3] or
+                a[5] < b[4] or a[4] > b[5])
+
+
+class SpatialHash:
+    """Uniform-grid hash of AABBs for overlap queries
+
+    Each box is stored in every bucket it touches, so a query only looks at
+    the boxes in the buckets the query box touches. Boxes spanning more than
+    max_cells_per_box buckets (a ground plane, say) are kept in a short side
+    list that every query scans instead of filling thousands of buckets.
+    """
+
+    def __init__(self, cell_size, max_cells_per_box=64):
+        self.cell_size = float(cell_size)
+        self.max_cells_per_box = max_cells_per_box
+        self.buckets = defaultdict(list)
+        self.boxes = []
+        self.oversized = []
+
+    @classmethod
+    def for_layout(cls, size=DEFAULT_CUBE_SIZE, spacing=DEFAULT_SPACING):
+        """Create a hash whose buckets match the distribution grid"""
+        return cls(max(size, spacing))
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def _cell_range(self, bounds):
+        inv = 1.0 / self.cell_size
+        return (math.floor(bounds[0] * inv), math.floor(bounds[1] * inv),
+                math.floor(bounds[2] * inv), math.floor(bounds[3] * inv),
+                math.floor(bounds[4] * inv), math.floor(bounds[5] * inv))
+
+    def insert(self, bounds):
+        """Add a bounds tuple and return its index"""
+        bounds = tuple(float(v) for v in bounds)
+        index = len(self.boxes)
+        self.boxes.append(bounds)
+
+        x0, x1, y0, y1, z0, z1 = self._cell_range(bounds)
+        cells = (x1 - x0 + 1) * (y1 - y0 + 1) * (z1 - z0 + 1)
+        if cells > self.max_cells_per_box:
+            self.oversized.append(index)
+            return index
+
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for cz in range(z0, z1 + 1):
+                    self.buckets[(cx, cy, cz)].append(index)
+        return index
+
+    def insert_many(self, bounds):
+        """Add every row of an (N, 6) bounds array (None entries skipped)"""
+        if isinstance(bounds, np.ndarray):
+            bounds = bounds.reshape(-1, 6).tolist()
+        for row in bounds:
+            if row is not None:
+                self.insert(row)
+
+    def overlaps(self, bounds):
+        """Check if bounds overlap any stored box"""
+        boxes = self.boxes
+        for index in self.oversized:
+            if boxes_overlap(bounds, boxes[index]):
+                return True
+
+        x0, x1, y0, y1, z0, z1 = self._cell_range(bounds)
+        buckets = self.buckets
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for cz in range(z0, z1 + 1):
+                    for index in buckets.get((cx, cy, cz), ()):
+                        if boxes_overlap(bounds, boxes[index]):
+                            return True
+        return False
+
+    def overlaps_cube(self, position, size=DEFAULT_CUBE_SIZE):
+        """Check if a cube at position would overlap any stored box"""
+        return self.overlaps(cube_bounds(position, size))
+
+    def query(self, bounds):
+        """Return the sorted indices of every stored box overlapping bounds"""
+        boxes = self.boxes
+        hits = {index for index in self.oversized
+                if boxes_overlap(bounds, boxes[index])}
+
+        x0, x1, y0, y1, z0, z1 = self._cell_range(bounds)
+        buckets = self.buckets
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for cz in range(z0, z1 + 1):
+                    for index in buckets.get((cx, cy, cz), ()):
+                        if index not in hits and boxes_overlap(bounds, boxes[index]):
+                            hits.add(index)
+        return sorted(hits)
+
+
+def lattice_blocked(rows, cols, spacing, size, z, bounds, row0=0, col0=0):
+    """Return a (rows, cols) mask of lattice cells whose cube overlaps bounds
+
+    The window starts at lattice cell (row0, col0); cell (i, j) is centred
+    at (j * spacing, i * spacing, z). Each box marks the rectangle of cells
+    it reaches in a 2D difference array, so the whole window is tested in a
+    few vectorised passes instead of one query per cell.
+    """
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 6)
+    half_size = size / 2
+    bounds = bounds[(bounds[:, 4] <= z + half_size) &
+                    (bounds[:, 5] >= z - half_size)]
+
+    j0 = np.maximum(np.ceil((bounds[:, 0] - half_size) / spacing) - col0, 0)
+    j1 = np.minimum(np.floor((bounds[:, 1] + half_size) / spacing) - col0, cols - 1)
+    i0 = np.maximum(np.ceil((bounds[:, 2] - half_size) / spacing) - row0, 0)
+    i1 = np.minimum(np.floor((bounds[:, 3] + half_size) / spacing) - row0, rows - 1)
+    hit = (j0 <= j1) & (i0 <= i1)
+    j0, j1, i0, i1 = (a[hit].astype(np.int64) for a in (j0, j1, i0, i1))
+
+    diff = np.zeros((rows + 1, cols + 1), dtype=np.int64)
+    np.add.at(diff, (i0, j0), 1)
+    np.add.at(diff, (i0, j1 + 1), -1)
+    np.add.at(diff, (i1 + 1, j0), -1)
+    np.add.at(diff, (i1 + 1, j1 + 1), 1)
+    return diff.cumsum(axis=0).cumsum(axis=1)[:rows, :cols] > 0
+
+
+# Side in lattice cells of the blocks whose free cells LatticeOccupancy
+# counts, so that searches step over full blocks without visiting their cells
+SEARCH_BLOCK = 16
+
+# Fewest cells a distribution searches outwards for free space
+MIN_SEARCH_RADIUS = 64
+
+_block_steps = {"reach": -1.0}
+
+# Furthest a cell can be from the centre step between its block and another
+# block, in cells: the corner-to-corner offset inside a block
+BLOCK_SLACK = (SEARCH_BLOCK - 1) * math.sqrt(2)
+
+
+def block_steps(reach):
+    """Return the steps between SEARCH_BLOCK blocks up to reach cells apart
+
+    Returns (steps, centres): (K, 2) block steps (rows, cols) and the
+    distance in cells that each step moves a block, for every step moving
+    at most reach, in increasing order. A cell of one block and a cell of
+    the other are within BLOCK_SLACK of that distance, so the blocks that
+    can hold cells between two distances from a query form one slice. The
+    table is built for the largest reach asked so far (at least twice the
+    previous one), so it is rebuilt only a few times.
+    """
+    cache = _block_steps
+    if reach > cache["reach"]:
+        built = max(reach, 2 * cache["reach"], float(SEARCH_BLOCK))
+        half = int(math.ceil(built / SEARCH_BLOCK)) + 1
+        span = np.arange(-half, half + 1)
+        steps = np.stack(np.meshgrid(span, span, indexing="ij"), axis=-1).reshape(-1, 2)
+        centres = np.hypot(steps[:, 0], steps[:, 1]) * SEARCH_BLOCK
+        order = np.lexsort((steps[:, 1], steps[:, 0], centres))
+        order = order[centres[order] <= built]
+        cache.update(reach=built, steps=steps[order], centres=centres[order])
+    end = np.searchsorted(cache["centres"], reach, side="right")
+    return cache["steps"][:end], cache["centres"][:end]
+
+
+def search_radius(rows, cols):
+    """Return how far (in cells) a rows x cols distribution looks for space
+
+    Twice the larger grid side, and at least MIN_SEARCH_RADIUS, so the
+    occupancy windows stay within a few times the grid's own area even
+    when an obstacle covers everything around it.
+    """
+    return max(2 * max(rows, cols), MIN_SEARCH_RADIUS)
+
+
+class LatticeOccupancy:
+    """Which cells of the distribution lattice are blocked or taken
+
+    Cell (i, j) holds a cube centred at (j * spacing, i * spacing, z). The
+    state lives in dense boolean windows that grow on demand, aligned to
+    SEARCH_BLOCK blocks; obstacles are rasterised into a window in one
+    vectorised pass per growth. The free cells of every block are counted,
+    so nearest_free passes over full blocks without looking at their cells.
+
+    narrow_phase, if given, is called as narrow_phase(centres, size) with
+    the (K, 3) centres of cells whose cube hits an obstacle's bounds and
+    returns a (K,) mask of the cubes that really overlap; the others are
+    freed. Each cell goes through it at most once.
+    """
+
+    def __init__(self, bounds, size=DEFAULT_CUBE_SIZE, spacing=DEFAULT_SPACING,
+                 z=0.0, rows=1, cols=1, narrow_phase=None):
+        if spacing < size:
+            raise ValueError("spacing must be at least the cube size")
+        self.bounds = as_bounds_array(bounds)
+        self.size = size
+        self.spacing = spacing
+        self.z = z
+        self.narrow_phase = narrow_phase
+        self.row0 = 0
+        self.col0 = 0
+        rows = -(-max(rows, 1) // SEARCH_BLOCK) * SEARCH_BLOCK
+        cols = -(-max(cols, 1) // SEARCH_BLOCK) * SEARCH_BLOCK
+        self.blocked = lattice_blocked(rows, cols, spacing, size, z, self.bounds)
+        self.taken = np.zeros_like(self.blocked)
+        self._refine(self.blocked.copy())
+        self._count_free()
+        self._last_search = None
+
+    def _refine(self, candidates):
+        """Run the narrow phase on the candidate cells of the window"""
+        if self.narrow_phase is None or not candidates.any():
+            return
+        rows, cols = np.nonzero(candidates)
+        centres = np.empty((len(rows), 3), dtype=np.float64)
+        centres[:, 0] = (cols + self.col0) * self.spacing
+        centres[:, 1] = (rows + self.row0) * self.spacing
+        centres[:, 2] = self.z
+        hits = np.asarray(self.narrow_phase(centres, self.size), dtype=bool)
+        self.blocked[rows[~hits], cols[~hits]] = False
+
+    def _count_free(self):
+        """Count the free cells of every block of the window"""
+        rows, cols = self.blocked.shape
+        free = ~(self.blocked | self.taken)
+        self.free_counts = free.reshape(rows // SEARCH_BLOCK, SEARCH_BLOCK,
+                                        cols // SEARCH_BLOCK, SEARCH_BLOCK).sum(axis=(1, 3))
+
+    def _cover(self, row_min, row_max, col_min, col_max):
+        """Grow the windows so they include the given cell range"""
+        rows, cols = self.blocked.shape
+        if (row_min >= self.row0 and row_max < self.row0 + rows and
+                col_min >= self.col0 and col_max < self.col0 + cols):
+            return
+
+        # Grow by at least the current size so regrowing stays rare, and
+        # keep the window made of whole blocks
+        row0 = min(row_min, self.row0) - (rows if row_min < self.row0 else 0)
+        col0 = min(col_min, self.col0) - (cols if col_min < self.col0 else 0)
+        row_end = max(row_max + 1, self.row0 + rows)
+        col_end = max(col_max + 1, self.col0 + cols)
+        row_end += rows if row_max >= self.row0 + rows else 0
+        col_end += cols if col_max >= self.col0 + cols else 0
+        row0 -= row0 % SEARCH_BLOCK
+        col0 -= col0 % SEARCH_BLOCK
+        row_end += -row_end % SEARCH_BLOCK
+        col_end += -col_end % SEARCH_BLOCK
+
+        blocked = lattice_blocked(row_end - row0, col_end - col0, self.spacing,
+                                  self.size, self.z, self.bounds, row0, col0)
+        old = (slice(self.row0 - row0, self.row0 - row0 + rows),
+               slice(self.col0 - col0, self.col0 - col0 + cols))
+        candidates = blocked.copy()
+        candidates[old] = False
+        blocked[old] = self.blocked
+        taken = np.zeros_like(blocked)
+        taken[old] = self.taken
+        self.blocked = blocked
+        self.taken = taken
+        self.row0 = row0
+        self.col0 = col0
+        self._refine(candidates)
+        self._count_free()
+
+    def occupied(self, rows, cols):
+        """Return a mask of which of the given cells are blocked or taken"""
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        self._cover(rows.min(), rows.max(), cols.min(), cols.max())
+        rows = rows - self.row0
+        cols = cols - self.col0
+        return self.blocked[rows, cols] | self.taken[rows, cols]
+
+    def take(self, rows, cols):
+        """Mark cells as holding a cube"""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        cols = np.atleast_1d(np.asarray(cols, dtype=np.int64))
+        if len(rows) == 0:
+            return
+        self._cover(rows.min(), rows.max(), cols.min(), cols.max())
+        rows = rows - self.row0
+        cols = cols - self.col0
+        newly = ~(self.blocked[rows, cols] | self.taken[rows, cols])
+        self.taken[rows, cols] = True
+        rows = rows[newly]
+        cols = cols[newly]
+        if len(rows) > 1:
+            # Cells listed twice are only counted once
+            rows, cols = np.divmod(np.unique(rows * self.taken.shape[1] + cols),
+                                   self.taken.shape[1])
+        np.subtract.at(self.free_counts, (rows // SEARCH_BLOCK, cols // SEARCH_BLOCK), 1)
+
+    def nearest_free(self, row, col, max_radius=None):
+        """Return the nearest free cell to (row, col), or None
+
+        Cells are taken in spiral (nearest-first) order, ties broken by
+        row step and then column step, with no fixed radius unless
+        max_radius is given. Without max_radius an obstacle covering all
+        space around the grid makes the search run on. Every cell closer
+        than the last answer minus the distance to the last query was
+        occupied then and still is, so the search only looks at the
+        blocks of a ring from there out to the answer, and only inside the
+        ones that still have free cells: dense areas cost one check per
+        block of that ring rather than a scan of every cell.
+        """
+        start = 0.0
+        if self._last_search is not None:
+            last_row, last_col, last_distance = self._last_search
+            start = max(last_distance - math.hypot(row - last_row, col - last_col), 0.0)
+
+        block_row = row // SEARCH_BLOCK
+        block_col = col // SEARCH_BLOCK
+        reach = start + SEARCH_BLOCK
+        while True:
+            if max_radius is not None:
+                reach = min(reach, float(max_radius))
+            steps, centres = block_steps(reach + BLOCK_SLACK)
+            # Blocks whose every cell is closer than start are full
+            steps = steps[np.searchsorted(centres, start - BLOCK_SLACK - 1e-9):]
+            rows = block_row + steps[:, 0]
+            cols = block_col + steps[:, 1]
+            self._cover(rows.min() * SEARCH_BLOCK, (rows.max() + 1) * SEARCH_BLOCK - 1,
+                        cols.min() * SEARCH_BLOCK, (cols.max() + 1) * SEARCH_BLOCK - 1)
+            open_blocks = self.free_counts[rows - self.row0 // SEARCH_BLOCK,
+                                           cols - self.col0 // SEARCH_BLOCK] > 0
+            found = self._nearest_in_blocks(row, col, rows[open_blocks],
+                                            cols[open_blocks], max_radius)
+            # Blocks beyond reach may still hold a cell closer than found
+            if found is not None and found[0] <= reach:
+                distance, step_row, step_col = found
+                self._last_search = (row, col, distance)
+                return (row + step_row, col + step_col)
+            if max_radius is not None and reach >= max_radius:
+                return None
+            reach = found[0] if found is not None else 2 * reach
+
+    def _nearest_in_blocks(self, row, col, block_rows, block_cols, max_radius):
+        """Return (distance, row step, col step) of the nearest free cell
+
+        Looks at the given blocks, nearest ones first, then at every block
+        that could still hold a cell as close as the best one. Returns None
+        when none of their free cells lies within max_radius.
+        """
+        low_rows = block_rows * SEARCH_BLOCK
+        low_cols = block_cols * SEARCH_BLOCK
+        apart_rows = np.maximum(np.maximum(low_rows - row, row - low_rows - SEARCH_BLOCK + 1), 0)
+        apart_cols = np.maximum(np.maximum(low_cols - col, col - low_cols - SEARCH_BLOCK + 1), 0)
+        gaps = np.hypot(apart_rows, apart_cols)
+        span = np.arange(SEARCH_BLOCK)
+
+        best = None
+        while len(gaps):
+            batch = gaps <= (gaps.min() + SEARCH_BLOCK if best is None else best[0])
+            if not batch.any():
+                break
+            cell_rows = low_rows[batch, None, None] + span[:, None] - self.row0
+            cell_cols = low_cols[batch, None, None] + span[None, :] - self.col0
+            block, free_rows, free_cols = np.nonzero(
+                ~(self.blocked[cell_rows, cell_cols] | self.taken[cell_rows, cell_cols]))
+            step_rows = low_rows[batch][block] + free_rows - row
+            step_cols = low_cols[batch][block] + free_cols - col
+            distances = np.hypot(step_rows, step_cols)
+            if max_radius is not None:
+                within = distances <= max_radius
+                step_rows = step_rows[within]
+                step_cols = step_cols[within]
+                distances = distances[within]
+            if len(distances):
+                tied = np.flatnonzero(distances == distances.min())
+                first = tied[np.lexsort((step_cols[tied], step_rows[tied]))[0]]
+                candidate = (float(distances[first]), int(step_rows[first]),
+                             int(step_cols[first]))
+                if best is None or candidate < best:
+                    best = candidate
+            low_rows = low_rows[~batch]
+            low_cols = low_cols[~batch]
+            gaps = gaps[~batch]
+        return best
+
+
+LayoutResult = namedtuple("LayoutResult", ["positions", "moved", "skipped"])
+
+
+def resolve_layout(n, existing_bounds, size=DEFAULT_CUBE_SIZE,
+                   spacing=DEFAULT_SPACING, z=0.0, max_radius=None,
+                   narrow_phase=None):
+    """Place n cubes on the grid, avoiding the existing bounds
+
+    The first n grid cells are tested against the existing bounds in bulk
+    and the free ones are kept. Each blocked cell's cube then takes the
+    nearest free lattice cell (spiral order, no fixed radius) that is not
+    already taken. Cubes are only skipped when max_radius is given and no
+    free cell lies within it; search_radius gives a bound that keeps the
+    search cheap. narrow_phase is passed on to LatticeOccupancy to free
+    cells that only hit an obstacle's bounds, not the obstacle.
+
+    Returns LayoutResult(positions, moved, skipped) with the (M, 3) cube
+    centres in grid order and the numbers of moved and skipped cubes.
+    """
+    rows, cols = grid_dimensions(n)
+    occupancy = LatticeOccupancy(existing_bounds, size, spacing, z, rows, cols,
+                                 narrow_phase)
+    cell_rows, cell_cols = np.divmod(np.arange(n), max(cols, 1))
+
+    blocked = occupancy.occupied(cell_rows, cell_cols) if n else np.zeros(0, bool)
+    occupancy.take(cell_rows[~blocked], cell_cols[~blocked])
+
+    lattice = np.stack([cell_rows, cell_cols], axis=1)
+    placed = ~blocked
+    for index in np.flatnonzero(blocked).tolist():
+        cell = occupancy.nearest_free(int(cell_rows[index]),
+                                      int(cell_cols[index]), max_radius)
+        if cell is None:
+            continue
+        occupancy.take(*cell)
+        lattice[index] = cell
+        placed[index] = True
+
+    lattice = lattice[placed]
+    positions = np.empty((len(lattice), 3), dtype=np.float64)
+    positions[:, 0] = lattice[:, 1] * spacing
+    positions[:, 1] = lattice[:, 0] * spacing
+    positions[:, 2] = z
+    skipped = n - len(positions)
+    return LayoutResult(positions, int(blocked.sum()) - skipped, skipped)
+
+
+# Lattice steps towards the neighbour behind each face in CUBE_FACES
+CUBE_FACE_NORMALS = np.array([
+    (-1, 0, 0), (1, 0, 0),
+    (0, -1, 0), (0, 1, 0),
+    (0, 0, -1), (0, 0, 1),
+], dtype=np.int64)
+
+
+def encode_cells(keys, low, dims):
+    """Pack integer (N, 3) lattice keys into one int64 code per row"""
+    keys = np.asarray(keys, dtype=np.int64) - low
+    return (keys[:, 0] * dims[1] + keys[:, 1]) * dims[2] + keys[:, 2]
+
+
+def lattice_keys(positions, size=DEFAULT_CUBE_SIZE, tolerance=DEFAULT_TOLERANCE):
+    """Snap cube centres to the size-spaced lattice through the first centre
+
+    Returns (keys, aligned): integer (N, 3) lattice keys and a mask of the
+    centres that actually sit on the lattice within tolerance.
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    if len(positions) == 0:
+        return np.empty((0, 3), dtype=np.int64), np.empty(0, dtype=bool)
+    relative = (positions - positions[0]) / size
+    keys = np.round(relative).astype(np.int64)
+    aligned = (np.abs(relative - keys) * size <= tolerance).all(axis=1)
+    return keys, aligned
+
+
+def voxel_geometry(positions, size=DEFAULT_CUBE_SIZE, cull_shared=False,
+                   tolerance=DEFAULT_TOLERANCE):
+    """Build one mesh holding a cube at every position, in a single pass
+
+    Returns (verts, quads, cells): (V, 3) vertex positions, (F, 4) vertex
+    indices per face and the index of the cube each face belongs to. With
+    cull_shared, faces between touching cubes are dropped and the corners of
+    the dropped faces are welded into one connected surface. As in
+    merge_geometry, cubes meeting only along an edge or at a corner keep
+    their own vertices there.
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    count = len(positions)
+    corners = cube_vertices(size)
+    faces = np.asarray(CUBE_FACES, dtype=np.int64)
+
+    verts = (positions[:, None, :] + corners[None, :, :]).reshape(-1, 3)
+    quads = (np.arange(count)[:, None, None] * 8 + faces[None]).reshape(-1, 4)
+    cells = np.repeat(np.arange(count), 6)
+    if not cull_shared or count == 0:
+        return verts, quads, cells
+
+    keys, aligned = lattice_keys(positions, size, tolerance)
+    low = keys.min(axis=0) - 1
+    dims = keys.max(axis=0) - low + 2
+    codes = np.sort(encode_cells(keys[aligned], low, dims))
+
+    # A face is internal when the neighbouring lattice cell is occupied
+    neighbours = keys[:, None, :] + CUBE_FACE_NORMALS[None]
+    neighbour_codes = encode_cells(neighbours.reshape(-1, 3), low, dims)
+    found = np.searchsorted(codes, neighbour_codes).clip(0, max(len(codes) - 1, 0))
+    internal = (codes[found] == neighbour_codes) if len(codes) else np.zeros(
+        len(neighbour_codes), dtype=bool)
+    internal &= np.repeat(aligned, 6)
+    quads = quads[~internal]
+    cells = cells[~internal]
+
+    # Weld the corners of dropped faces on the doubled lattice; every other
+    # corner, and every corner of an off-lattice cube, keeps its own vertex
+    incidence = (faces[:, :, None] == np.arange(8)).any(axis=1)
+    seam = internal.reshape(count, 6) @ incidence > 0
+    corner_keys = (2 * keys[:, None, :] + (corners[None] * 2 / size).round()
+                   .astype(np.int64)).reshape(-1, 3)
+    corner_codes = encode_cells(corner_keys, 2 * low - 1, 2 * dims + 2)
+    loose = ~seam.reshape(-1)
+    corner_codes[loose] = -1 - np.flatnonzero(loose)
+    _, first, remap = np.unique(corner_codes, return_index=True,
+                                return_inverse=True)
+    quads = remap.reshape(-1)[quads]
+
+    # Drop corners no remaining face uses
+    used, quads = np.unique(quads, return_inverse=True)
+    return verts[first[used]], quads.reshape(-1, 4), cells
+
+
+# Order-of-magnitude (bytes, seconds) per cube for each output, only used to
+# warn before very large distributions
+CUBE_COST = {
+    'OBJECTS': (4096, 100e-6),
+    'SHARED': (1536, 60e-6),
+    'INSTANCES': (16, 0.5e-6),
+    'VOXELS': (600, 2e-6),
+}
+
+
+def estimate_distribution_cost(n, mode='OBJECTS'):
+    """Return a rough (bytes, seconds) estimate for distributing n cubes"""
+    per_cube_bytes, per_cube_seconds = CUBE_COST[mode]
+    return n * per_cube_bytes, n * per_cube_seconds
+
+
+def format_bytes(count):
+    """Format a byte count for reports, e.g. 1.5 GB"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024:
+            return f"{count:.1f} {unit}" if unit != "B" else f"{count} B"
+        count /= 1024
+    return f"{count:.1f} TB"
+
+
+
+
+# ---------------------------------------------------------------------------
+# Face matching and merge planning
+# ---------------------------------------------------------------------------
+
+def faces_match(verts1, verts2, tolerance=DEFAULT_TOLERANCE):
+    """Check if two faces have the same vertices (in any order)"""
+    verts1 = np.asarray(verts1, dtype=np.float64)
+    verts2 = np.asarray(verts2, dtype=np.float64)
+    if len(verts1) != len(verts2):
+        return False
+
+    distances = np.linalg.norm(verts1[:, None, :] - verts2[None, :, :], axis=2)
+    close = distances < tolerance
+    matched = np.zeros(len(verts2), dtype=bool)
+
+    # Greedy one-to-one assignment, as the original vertex loop did
+    for row in close:
+        free = np.flatnonzero(row & ~matched)
+        if free.size == 0:
+            return False
+        matched[free[0]] = True
+
+    return True
+
+
+class FaceArrays(namedtuple("FaceArrays", ["loop_verts", "loop_totals"])):
+    """Polygons stored flat, the way Blender stores mesh loops
+
+    loop_verts holds the vertex indices of every face back to back and
+    loop_totals the number of corners of each face.
+    """
+
+    __slots__ = ()
+
+    @property
+    def count(self):
+        return len(self.loop_totals)
+
+    @property
+    def loop_starts(self):
+        starts = np.zeros(len(self.loop_totals), dtype=np.int64)
+        np.cumsum(self.loop_totals[:-1], out=starts[1:])
+        return starts
+
+    def face(self, index):
+        """Return the vertex indices of one face"""
+        start = int(self.loop_starts[index])
+        return self.loop_verts[start:start + int(self.loop_totals[index])]
+
+    def subset(self, indices):
+        """Return the faces at the given indices, in that order"""
+        indices = np.asarray(indices, dtype=np.int64)
+        totals = self.loop_totals[indices]
+        starts = self.loop_starts[indices]
+        offsets = np.arange(totals.sum()) - np.repeat(np.cumsum(totals) - totals, totals)
+        return FaceArrays(self.loop_verts[np.repeat(starts, totals) + offsets], totals)
+
+    def offset(self, amount):
+        """Return the faces with every vertex index shifted by amount"""
+        return FaceArrays(self.loop_verts + amount, self.loop_totals)
+
+    def to_lists(self):
+        """Return the faces as a list of vertex index lists"""
+        return [part.tolist() for part in
+                np.split(self.loop_verts, np.cumsum(self.loop_totals)[:-1])]
+
+
+def as_face_arrays(faces):
+    """Return faces as FaceArrays, converting from index sequences if needed"""
+    if isinstance(faces, FaceArrays):
+        return faces
+    faces = [list(face) for face in faces]
+    loop_totals = np.fromiter((len(face) for face in faces), dtype=np.int64,
+                              count=len(faces))
+    loop_verts = np.fromiter(itertools.chain.from_iterable(faces),
+                             dtype=np.int64, count=int(loop_totals.sum()))
+    return FaceArrays(loop_verts, loop_totals)
+
+
+def concat_meshes(meshes):
+    """Stack (verts, faces) meshes into one vertex array and one FaceArrays
+
+    Returns (verts, faces, owners) where owners[f] is the mesh of face f.
+    """
+    verts = []
+    loop_verts = []
+    loop_totals = []
+    owners = []
+    offset = 0
+    for mesh_index, (mesh_verts, mesh_faces) in enumerate(meshes):
+        mesh_verts = np.asarray(mesh_verts, dtype=np.float64).reshape(-1, 3)
+        mesh_faces = as_face_arrays(mesh_faces)
+        verts.append(mesh_verts)
+        loop_verts.append(mesh_faces.loop_verts + offset)
+        loop_totals.append(mesh_faces.loop_totals)
+        owners.append(np.full(mesh_faces.count, mesh_index, dtype=np.int64))
+        offset += len(mesh_verts)
+
+    if not meshes:
+        empty = np.empty(0, dtype=np.int64)
+        return np.empty((0, 3)), FaceArrays(empty, empty), empty
+    faces = FaceArrays(np.concatenate(loop_verts).astype(np.int64),
+                       np.concatenate(loop_totals).astype(np.int64))
+    return np.concatenate(verts), faces, np.concatenate(owners)
+
+
+# Vertices closer than this (in tolerance cells) to a rounding boundary are
+# also matched against the neighbouring cell
+BOUNDARY_MARGIN = 0.25
+
+
+def quantise(verts, tolerance=DEFAULT_TOLERANCE):
+    """Snap vertices to the tolerance grid
+
+    Returns (keys, steps): the nearest grid point of every vertex as an
+    (N, 3) int64 array, and per coordinate the direction (-1 or 1) of the
+    neighbouring grid point where the vertex lies within BOUNDARY_MARGIN of
+    a rounding boundary (0 elsewhere).
+    """
+    scaled = np.asarray(verts, dtype=np.float64).reshape(-1, 3) / tolerance
+    keys = np.round(scaled)
+    offset = scaled - keys
+    near_edge = np.abs(np.abs(offset) - 0.5) < BOUNDARY_MARGIN
+    steps = np.where(near_edge, np.sign(offset), 0)
+    return keys.astype(np.int64), steps.astype(np.int64)
+
+
+def _component_labels(count, a, b):
+    """Label the connected components of a graph given as edge arrays"""
+    labels = np.arange(count)
+    while True:
+        lowest = np.minimum(labels[a], labels[b])
+        updated = labels.copy()
+        np.minimum.at(updated, a, lowest)
+        np.minimum.at(updated, b, lowest)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def vertex_clusters(verts, tolerance=DEFAULT_TOLERANCE):
+    """Give vertices that coincide within tolerance the same cluster id
+
+    Vertices are grouped by their cell on the tolerance grid. A vertex close
+    to a cell edge also joins the neighbouring cells it may belong to, so
+    coincident points that round to different cells still end up together.
+    """
+    keys, steps = quantise(verts, tolerance)
+    count = len(keys)
+    if count == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Neighbouring cells of vertices near an edge, one per subset of axes
+    owners = []
+    alternates = []
+    ambiguous = np.flatnonzero(steps.any(axis=1))
+    for mask in itertools.product((0, 1), repeat=3):
+        if not any(mask):
+            continue
+        move = steps[ambiguous] * np.array(mask)
+        moved = move.any(axis=1)
+        owners.append(ambiguous[moved])
+        alternates.append(keys[ambiguous[moved]] + move[moved])
+
+    owners = np.concatenate(owners)
+    cells, inverse = np.unique(np.concatenate([keys] + alternates), axis=0,
+                               return_inverse=True)
+    inverse = inverse.reshape(-1)
+    primary = inverse[:count]
+    alternate = inverse[count:]
+
+    # Only cells that actually hold a vertex link anything
+    occupied = np.zeros(len(cells), dtype=bool)
+    occupied[primary] = True
+    linked = occupied[alternate]
+    labels = _component_labels(len(cells), primary[owners[linked]],
+                               alternate[linked])
+    return labels[primary]
+
+
+def coincident_faces(verts, faces, tolerance=DEFAULT_TOLERANCE):
+    """Find pairs of faces of one mesh whose corners coincide
+
+    Faces are keyed by the sorted cluster ids of their corners and grouped
+    with one sort per face size, so the whole search is O(L log L) in the
+    number of loops with no per-face Python work. Candidates are confirmed
+    against the distance tolerance. Returns (a, b) face index arrays, a < b.
+    """
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+    faces = as_face_arrays(faces)
+    clusters = vertex_clusters(verts, tolerance)
+    starts = faces.loop_starts
+    found_a = []
+    found_b = []
+
+    for size in np.unique(faces.loop_totals):
+        selected = np.flatnonzero(faces.loop_totals == size)
+        corners = faces.loop_verts[starts[selected, None] + np.arange(size)]
+        ids = clusters[corners]
+        order = np.argsort(ids, axis=1, kind='stable')
+        ids = np.take_along_axis(ids, order, axis=1)
+        corners = np.take_along_axis(corners, order, axis=1)
+
+        _, group, counts = np.unique(ids, axis=0, return_inverse=True,
+                                     return_counts=True)
+        group = group.reshape(-1)
+        shared = np.flatnonzero(counts[group] > 1)
+        if len(shared) == 0:
+            continue
+        shared = shared[np.argsort(group[shared], kind='stable')]
+
+        # Every pair of faces within a group is a candidate; groups are
+        # almost always pairs, larger ones are expanded one by one
+        heads = np.flatnonzero(np.r_[True, np.diff(group[shared]) != 0])
+        sizes = np.diff(np.r_[heads, len(shared)])
+        pairs = heads[sizes == 2]
+        a = [shared[pairs]]
+        b = [shared[pairs + 1]]
+        for head, count in zip(heads[sizes > 2].tolist(), sizes[sizes > 2].tolist()):
+            members = shared[head:head + count]
+            combos = np.array(list(itertools.combinations(range(count), 2)))
+            a.append(members[combos[:, 0]])
+            b.append(members[combos[:, 1]])
+        a = np.concatenate(a)
+        b = np.concatenate(b)
+
+        # Sorted ids line the corners up; repeated ids need the full check
+        close = (np.linalg.norm(verts[corners[a]] - verts[corners[b]], axis=2)
+                 < tolerance).all(axis=1)
+        repeated = (np.diff(ids[a], axis=1) == 0).any(axis=1)
+        for k in np.flatnonzero(repeated):
+            close[k] = faces_match(verts[corners[a[k]]], verts[corners[b[k]]],
+                                   tolerance)
+
+        found_a.append(selected[a[close]])
+        found_b.append(selected[b[close]])
+
+    if not found_a:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    a = np.concatenate(found_a)
+    b = np.concatenate(found_b)
+    return np.minimum(a, b), np.maximum(a, b)
+
+
+def find_common_faces(verts1, faces1, verts2, faces2,
+                      tolerance=DEFAULT_TOLERANCE):
+    """Return (face1_index, face2_index) pairs of coincident faces"""
+    verts, faces, owners = concat_meshes([(verts1, faces1), (verts2, faces2)])
+    a, b = coincident_faces(verts, faces, tolerance)
+    across = owners[a] != owners[b]
+    offset = as_face_arrays(faces1).count
+    return list(zip(a[across].tolist(), (b[across] - offset).tolist()))
+
+
+def have_common_face(verts1, faces1, verts2, faces2,
+                     tolerance=DEFAULT_TOLERANCE):
+    """Check if two meshes have at least one common face"""
+    return bool(find_common_faces(verts1, faces1, verts2, faces2, tolerance))
+
+
+def weld_vertices(verts, tolerance=DEFAULT_TOLERANCE):
+    """Merge vertices that coincide within tolerance
+
+    Returns (unique_verts, remap) where remap[i] is the new index of vertex i.
+    """
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+    if verts.shape[0] == 0:
+        return verts, np.empty(0, dtype=np.int64)
+    _, first, remap = np.unique(vertex_clusters(verts, tolerance),
+                                return_index=True, return_inverse=True)
+    return verts[first], remap.reshape(-1)
+
+
+def merge_geometry(verts1, faces1, verts2, faces2,
+                   tolerance=DEFAULT_TOLERANCE):
+    """Merge mesh 2 into mesh 1, dropping the faces they have in common
+
+    This is the array equivalent of joining the objects, removing doubles
+    and deleting the internal faces. Returns (verts, faces) with faces as
+    FaceArrays.
+    """
+    verts, faces, owners = concat_meshes([(verts1, faces1), (verts2, faces2)])
+    a, b = coincident_faces(verts, faces, tolerance)
+    across = owners[a] != owners[b]
+
+    keep = np.ones(faces.count, dtype=bool)
+    keep[a[across]] = False
+    keep[b[across]] = False
+
+    # Only corners of the shared faces can be duplicates
+    seam = np.unique(faces.subset(np.flatnonzero(~keep)).loop_verts)
+    faces = faces.subset(np.flatnonzero(keep))
+    verts, remap = weld_seam(verts, seam, tolerance)
+    return verts, FaceArrays(remap[faces.loop_verts], faces.loop_totals)
+
+
+def weld_seam(verts, seam, tolerance=DEFAULT_TOLERANCE):
+    """Weld only the vertices listed in seam, keeping every other vertex
+
+    Returns (verts, remap) like weld_vertices, with the cost following the
+    seam size instead of the mesh size.
+    """
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+    seam = np.asarray(seam, dtype=np.int64)
+    _, first, groups = np.unique(vertex_clusters(verts[seam], tolerance),
+                                 return_index=True, return_inverse=True)
+
+    # Every seam vertex points at the first seam vertex of its cluster
+    target = np.arange(len(verts))
+    target[seam] = seam[first][groups.reshape(-1)]
+    keep = target == np.arange(len(verts))
+    new_index = np.cumsum(keep) - 1
+    return verts[keep], new_index[target]
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size"""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        """Join the sets of a and b; return False if they were already one"""
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+    def groups(self):
+        """Return every set as a sorted list, ordered by smallest member"""
+        groups = defaultdict(list)
+        for item in range(len(self.parent)):
+            groups[self.find(item)].append(item)
+        return sorted(groups.values())
+
+
+def find_face_adjacency(meshes, tolerance=DEFAULT_TOLERANCE):
+    """Find which meshes share faces, in one pass over all faces
+
+    meshes is a list of (verts, faces) pairs in world space. Returns
+    (pairs, internal): the set of (a, b) mesh index pairs with a < b that
+    share a face, and per mesh the sorted indices of its shared faces.
+    """
+    verts, faces, owners = concat_meshes(meshes)
+    a, b = coincident_faces(verts, faces, tolerance)
+    across = owners[a] != owners[b]
+    a = a[across]
+    b = b[across]
+
+    pairs = set(zip(owners[a].tolist(), owners[b].tolist()))
+
+    # Faces are stacked mesh by mesh, so owners is sorted
+    first_face = np.searchsorted(owners, np.arange(len(meshes)))
+    shared = np.unique(np.concatenate([a, b]))
+    local = shared - first_face[owners[shared]]
+    splits = np.searchsorted(owners[shared], np.arange(1, len(meshes)))
+    internal = [part.tolist() for part in np.split(local, splits)]
+    return pairs, internal
+
+
+def plan_components(meshes, tolerance=DEFAULT_TOLERANCE):
+    """Group meshes that are connected through shared faces
+
+    Builds the face-adjacency graph of the whole selection once and finds
+    its connected components with union-find, so each component can be
+    merged with a single join. Returns (components, internal): lists of
+    mesh indices (two or more, smallest first, which is the merge target)
+    and per mesh the indices of faces that become internal.
+    """
+    pairs, internal = find_face_adjacency(meshes, tolerance)
+    sets = UnionFind(len(meshes))
+    for a, b in pairs:
+        sets.union(a, b)
+    components = [group for group in sets.groups() if len(group) > 1]
+    return components, internal
+
+
+LatticeCubes = namedtuple("LatticeCubes", ["indices", "centres", "keys", "size"])
+
+
+def find_lattice_cubes(meshes, tolerance=DEFAULT_TOLERANCE):
+    """Find the meshes that are axis-aligned cubes on one shared lattice
+
+    A mesh qualifies when it has 8 vertices on the corners of its bounding
+    box, that box is a cube, and its 6 quads are the 6 sides of it. Only
+    cubes of the most common size (within tolerance) are kept, with centres
+    on the size-spaced lattice through the first of them; cubes sharing a
+    cell with another are left out. Returns LatticeCubes(indices, centres, keys, size)
+    with the mesh indices, their (K, 3) world centres and integer lattice
+    keys, and the cube size (None when no mesh qualifies).
+    """
+    empty = LatticeCubes(np.empty(0, dtype=np.int64), np.empty((0, 3)),
+                         np.empty((0, 3), dtype=np.int64), None)
+    candidates = [index for index, (verts, faces) in enumerate(meshes)
+                  if len(verts) == 8 and len(faces.loop_totals) == 6 and
+                  (np.asarray(faces.loop_totals) == 4).all()]
+    if not candidates:
+        return empty
+
+    verts = np.stack([meshes[i][0] for i in candidates]).astype(np.float64)
+    quads = np.stack([np.asarray(meshes[i][1].loop_verts).reshape(6, 4)
+                      for i in candidates])
+    low = verts.min(axis=1)
+    high = verts.max(axis=1)
+    extent = high - low
+    sizes = extent[:, 0]
+
+    # Every vertex on a distinct corner of a cube-shaped box
+    cube = (np.abs(extent - sizes[:, None]) <= tolerance).all(axis=1) & (sizes > tolerance)
+    at_high = np.abs(verts - high[:, None]) <= tolerance
+    at_low = np.abs(verts - low[:, None]) <= tolerance
+    cube &= (at_high | at_low).all(axis=(1, 2))
+    corner = at_high.astype(np.int64) @ np.array([4, 2, 1])
+    cube &= (np.sort(corner, axis=1) == np.arange(8)).all(axis=1)
+
+    # Every quad on a distinct side: its 4 corners agree on exactly one bit
+    face_corners = np.take_along_axis(corner, quads.reshape(len(quads), -1),
+                                      axis=1).reshape(-1, 6, 4)
+    ones = np.bitwise_and.reduce(face_corners, axis=2)
+    zeros = ~np.bitwise_or.reduce(face_corners, axis=2) & 7
+    fixed = ones | zeros
+    single = (fixed != 0) & ((fixed & (fixed - 1)) == 0)
+    side = np.where(ones != 0, fixed, fixed << 3)
+    cube &= single.all(axis=1)
+    cube &= (np.sort(side, axis=1) == np.array([1, 2, 4, 8, 16, 32])).all(axis=1)
+    if not cube.any():
+        return empty
+
+    # Sizes less than tolerance apart form one group; the largest group wins
+    ordered = np.sort(sizes[cube])
+    group = np.concatenate([[0], np.cumsum(np.diff(ordered) > tolerance)])
+    size = float(np.median(ordered[group == np.argmax(np.bincount(group))]))
+    cube &= np.abs(sizes - size) <= tolerance
+
+    indices = np.asarray(candidates)[cube]
+    centres = ((low + high) / 2)[cube]
+    keys, aligned = lattice_keys(centres, size, tolerance)
+    _, inverse, counts = np.unique(keys, axis=0, return_inverse=True,
+                                   return_counts=True)
+    keep = aligned & (counts[inverse.reshape(-1)] == 1)
+    return LatticeCubes(indices[keep], centres[keep], keys[keep], size)
+
+
+def lattice_components(keys):
+    """Group lattice cells that touch through a face
+
+    Returns lists of indices into keys (two or more, sorted, ordered by
+    their smallest member), like the components of plan_components.
+    """
+    keys = np.asarray(keys, dtype=np.int64).reshape(-1, 3)
+    count = len(keys)
+    if count < 2:
+        return []
+    low = keys.min(axis=0) - 1
+    dims = keys.max(axis=0) - low + 2
+    codes = encode_cells(keys, low, dims)
+    order = np.argsort(codes)
+    sorted_codes = codes[order]
+
+    # Only the +X, +Y and +Z neighbours, so each touching pair shows up once
+    a = []
+    b = []
+    for step in CUBE_FACE_NORMALS[1::2]:
+        neighbour = encode_cells(keys + step, low, dims)
+        found = np.searchsorted(sorted_codes, neighbour).clip(0, count - 1)
+        hit = sorted_codes[found] == neighbour
+        a.append(np.flatnonzero(hit))
+        b.append(order[found[hit]])
+    labels = _component_labels(count, np.concatenate(a), np.concatenate(b))
+
+    order = np.argsort(labels, kind="stable")
+    starts = np.flatnonzero(np.diff(labels[order], prepend=-1))
+    groups = np.split(order, starts[1:])
+    return sorted(group.tolist() for group in groups if len(group) > 1)
+
+
+def _run_starts(keys, position):
+    """Mark the rows that start a run
+
+    keys is an (N, K) int array sorted so that rows with equal keys are
+    adjacent and ordered by position. A run is a stretch of equal keys with
+    consecutive positions.
+    """
+    start = np.ones(len(keys), dtype=bool)
+    start[1:] = ((keys[1:] != keys[:-1]).any(axis=1) |
+                 (position[1:] != position[:-1] + 1))
+    return np.flatnonzero(start)
+
+
+def merge_flat_quads(verts, faces, tolerance=DEFAULT_TOLERANCE):
+    """Merge coplanar axis-aligned quads into maximal rectangles
+
+    Quads that are axis-aligned rectangles are grouped by plane and facing.
+    Each plane is cut into cells along the distinct edge coordinates of its
+    quads; covered cells are joined into runs along one axis, and runs with
+    the same extent in consecutive rows are stacked into rectangles (greedy
+    meshing). Other faces are kept as they are. Vertices that only served
+    the merged quads are dropped, so straight seams keep just their ends.
+    Where a rectangle borders smaller faces their corners sit on its edge
+    (T-junctions); the surface itself does not change.
+
+    Returns (verts, faces) as a vertex array and FaceArrays.
+    """
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+    faces = as_face_arrays(faces)
+    quads = np.flatnonzero(faces.loop_totals == 4)
+    corners = verts[faces.subset(quads).loop_verts.reshape(-1, 4)]
+    ticks = np.round(corners / tolerance).astype(np.int64)
+    low = ticks.min(axis=1)
+    high = ticks.max(axis=1)
+
+    # Flat along exactly one axis, with the corners going round the four
+    # corners of the rectangle in the other two
+    flat = low == high
+    axis = np.argmax(flat, axis=1)
+    rows = np.arange(len(quads))[:, None]
+    u_axis = (axis[:, None] + 1) % 3
+    v_axis = (axis[:, None] + 2) % 3
+    u = ticks[rows, np.arange(4), u_axis]
+    v = ticks[rows, np.arange(4), v_axis]
+    u_high = u == high[rows, u_axis]
+    v_high = v == high[rows, v_axis]
+    on_corner = ((u_high | (u == low[rows, u_axis])) &
+                 (v_high | (v == low[rows, v_axis])))
+    code = u_high * 2 + v_high
+    step = code ^ np.roll(code, -1, axis=1)
+    rectangle = ((flat.sum(axis=1) == 1) & on_corner.all(axis=1) &
+                 ((step == 1) | (step == 2)).all(axis=1))
+    if not rectangle.any():
+        return verts, faces
+
+    quads = quads[rectangle]
+    corners = corners[rectangle]
+    axis = axis[rectangle]
+    u, v = u[rectangle], v[rectangle]
+    rows = np.arange(len(quads))
+
+    # Winding in the (u, v) plane gives the facing along the flat axis
+    area = (u * np.roll(v, -1, axis=1) - np.roll(u, -1, axis=1) * v).sum(axis=1)
+    offset = ticks[rectangle][rows, 0, axis]
+    planes, first, plane = np.unique(
+        encode_cells(np.stack([axis, area > 0, offset], axis=1),
+                     np.array([0, 0, offset.min()]),
+                     np.array([3, 2, offset.max() - offset.min() + 1])),
+        return_index=True, return_inverse=True)
+    plane = plane.reshape(-1)
+    plane_axis = axis[first]
+    plane_positive = area[first] > 0
+    plane_offset = corners[first, 0, plane_axis]
+
+    def ranks(values, axes):
+        # Number the edge coordinates of every plane in plane order, so a
+        # cell of a plane is a rank and the rank after it
+        low_corner = np.argmin(values, axis=1)
+        high_corner = np.argmax(values, axis=1)
+        ends = np.stack([values[rows, low_corner], values[rows, high_corner]],
+                        axis=1)
+        start = ends.min()
+        span = ends.max() - start + 1
+        codes, index, rank = np.unique(
+            plane[:, None] * span + (ends - start), return_index=True,
+            return_inverse=True)
+        coords = np.stack([corners[rows, low_corner, axes],
+                           corners[rows, high_corner, axes]], axis=1)
+        rank = rank.reshape(-1, 2)
+        return rank[:, 0], rank[:, 1], coords.reshape(-1)[index], codes // span
+
+    u0, u1, u_values, _ = ranks(u, (axis + 1) % 3)
+    v0, v1, v_values, v_plane = ranks(v, (axis + 2) % 3)
+
+    # Every covered cell once, ordered by plane, row and column; v ranks
+    # are in plane order, so the row alone also orders by plane
+    width = u1 - u0
+    counts = width * (v1 - v0)
+    owner = np.repeat(rows, counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cells = np.unique((v0[owner] + k // width[owner]) * len(u_values) +
+                      u0[owner] + k % width[owner])
+    cell_v, cell_u = np.divmod(cells, len(u_values))
+
+    # Runs along u, then runs of equal extent stacked along v
+    starts = _run_starts(cell_v[:, None], cell_u)
+    ends = np.append(starts[1:], len(cells)) - 1
+    runs = np.stack([cell_u[starts], cell_u[ends] + 1, cell_v[starts]], axis=1)
+    runs = runs[np.lexsort(runs.T[::-1])]
+    starts = _run_starts(runs[:, :2], runs[:, 2])
+    ends = np.append(starts[1:], len(runs)) - 1
+    rects = np.concatenate([runs[starts], runs[ends, 2:] + 1], axis=1)
+
+    # Corners wound counter-clockwise in (u, v) when facing along +axis
+    rect_plane = v_plane[rects[:, 2]]
+    positive = plane_positive[rect_plane][:, None]
+    ua, ub = u_values[rects[:, 0]], u_values[rects[:, 1]]
+    va, vb = v_values[rects[:, 2]], v_values[rects[:, 3]]
+    quad_u = np.where(positive, np.stack([ua, ub, ub, ua], axis=1),
+                      np.stack([ua, ua, ub, ub], axis=1))
+    quad_v = np.where(positive, np.stack([va, va, vb, vb], axis=1),
+                      np.stack([va, vb, vb, va], axis=1))
+    rect_axis = plane_axis[rect_plane][:, None]
+    merged = np.empty((len(rects), 4, 3))
+    index = (np.arange(len(rects))[:, None], np.arange(4)[None])
+    merged[index + (rect_axis,)] = plane_offset[rect_plane][:, None]
+    merged[index + ((rect_axis + 1) % 3,)] = quad_u
+    merged[index + ((rect_axis + 2) % 3,)] = quad_v
+
+    # Weld the new corners to each other and to the corners the kept faces
+    # share with the merged quads, then drop vertices nothing uses
+    keep = np.ones(faces.count, dtype=bool)
+    keep[quads] = False
+    kept = faces.subset(np.flatnonzero(keep))
+    new = len(verts) + np.arange(4 * len(rects))
+    shared = np.intersect1d(kept.loop_verts, faces.subset(quads).loop_verts)
+    verts, remap = weld_seam(np.concatenate([verts, merged.reshape(-1, 3)]),
+                             np.concatenate([shared, new]), tolerance)
+    used, loop_verts = np.unique(remap[np.concatenate([kept.loop_verts, new])],
+                                 return_inverse=True)
+    loop_totals = np.concatenate([kept.loop_totals,
+                                  np.full(len(rects), 4, dtype=np.int64)])
+    return verts[used], FaceArrays(loop_verts.reshape(-1), loop_totals)
+
+# ---------------------------------------------------------------------------
+# Tiled compose on worker processes
+# ---------------------------------------------------------------------------
+
+# Fewest faces worth a tile of their own, and tiles handed out per worker so
+# that uneven tiles still keep every worker busy
+TILE_MIN_FACES = 5000
+TILES_PER_WORKER = 4
+
+
+def compose_tile(task):
+    """Find the shared faces of one tile; runs in a worker process
+
+    task is (verts, loop_verts, loop_totals, owners, face_ids, vert_ids,
+    tolerance) for the faces of the tile, plain arrays only so that a
+    worker can load it without importing the caller's modules. face_ids and
+    vert_ids give the indices in the whole selection. Returns (dropped,
+    welds, links) in those global indices: the faces to remove, (2, K)
+    pairs of vertices to weld and (2, M) pairs of meshes that share a face.
+    """
+    verts, loop_verts, loop_totals, owners, face_ids, vert_ids, tolerance = task
+    faces = FaceArrays(loop_verts, loop_totals)
+    a, b = coincident_faces(verts, faces, tolerance)
+    across = owners[a] != owners[b]
+    a = a[across]
+    b = b[across]
+    dropped = np.unique(np.concatenate([a, b]))
+
+    # Only the corners of the dropped faces are welded, as in merge_geometry
+    seam = np.unique(faces.subset(dropped).loop_verts)
+    _, first, groups = np.unique(vertex_clusters(verts[seam], tolerance),
+                                 return_index=True, return_inverse=True)
+    welds = np.stack([vert_ids[seam], vert_ids[seam[first][groups.reshape(-1)]]])
+    return face_ids[dropped], welds, np.stack([owners[a], owners[b]])
+
+
+def serve_tiles(source, sink):
+    """Answer pickled compose_tile tasks from source until it closes
+
+    The loop of a worker process, started as this file run with
+    --tile-worker (see the end of the module).
+    """
+    while True:
+        try:
+            task = pickle.load(source)
+        except EOFError:
+            return
+        pickle.dump(compose_tile(task), sink, protocol=pickle.HIGHEST_PROTOCOL)
+        sink.flush()
+
+
+class TileWorkers:
+    """Worker processes that run compose_tile for run_tiles
+
+    Each worker is the Python of this process running this very file, so it
+    imports NumPy and this module and nothing else: not the caller's
+    __main__ (a Blender script importing bpy) and not the add-on package.
+    Tasks and results travel as pickles over the worker's pipes, and one
+    thread per worker hands out the next task as soon as the last one is
+    back. A worker that fails to start or dies gives its task back to the
+    caller instead, which runs it in this process.
+    """
+
+    def __init__(self, tasks, count):
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.pending = iter(tasks)
+        self.processes = []
+        for _ in range(count):
+            try:
+                process = subprocess.Popen(
+                    [sys.executable, os.path.abspath(__file__), "--tile-worker"],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            except OSError:
+                process = None
+            self.processes.append(process)
+            threading.Thread(target=self.serve, args=(process,), daemon=True).start()
+
+    def next_task(self):
+        with self.lock:
+            return next(self.pending, None)
+
+    def serve(self, process):
+        """Feed one worker; put (result, None) or (None, failed task) on results"""
+        while True:
+            task = self.next_task()
+            if task is None:
+                return
+            if process is None:
+                self.results.put((None, task))
+                continue
+            try:
+                pickle.dump(task, process.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+                process.stdin.flush()
+                self.results.put((pickle.load(process.stdout), None))
+            except (OSError, EOFError, pickle.UnpicklingError):
+                process = None
+                self.results.put((None, task))
+
+    def close(self):
+        """Stop handing out tasks and end every worker"""
+        with self.lock:
+            self.pending = iter(())
+        for process in self.processes:
+            if process is not None:
+                process.kill()
+                process.wait()
+                process.stdin.close()
+                process.stdout.close()
+
+
+def run_tiles(tasks, workers=1):
+    """Run compose_tile over tasks, yielding results as they finish
+
+    With more than one worker the tiles go to TileWorkers processes, which
+    only need NumPy and this module; otherwise, and for any tile a worker
+    could not finish, they run in this process. Closing the generator
+    cancels the tiles not started yet.
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield compose_tile(task)
+        return
+
+    pool = TileWorkers(tasks, min(workers, len(tasks)))
+    try:
+        for _ in range(len(tasks)):
+            result, failed = pool.results.get()
+            yield compose_tile(failed) if failed is not None else result
+    finally:
+        pool.close()
+
+
+class TiledCompose:
+    """A compose split into tiles that worker processes handle independently
+
+    Faces are cut into slabs along the longest axis of the selection, with
+    equal face counts and cuts placed in gaps between face centres. Shared
+    faces coincide, so both copies land in the same slab; a face within
+    tolerance of a cut goes to both slabs, which only costs a little
+    duplicate work. Each task in tasks is the input of compose_tile, and
+    stitch turns the results into merged surfaces.
+    """
+
+    def __init__(self, meshes, workers=1, tolerance=DEFAULT_TOLERANCE):
+        self.mesh_count = len(meshes)
+        self.verts, self.faces, self.owners = concat_meshes(meshes)
+        self.tolerance = tolerance
+        count = self.faces.count
+        tiles = int(np.clip(count // TILE_MIN_FACES, 1, workers * TILES_PER_WORKER))
+
+        totals = self.faces.loop_totals
+        corners = self.verts[self.faces.loop_verts]
+        centres = (np.add.reduceat(corners, self.faces.loop_starts, axis=0)
+                   / totals[:, None]) if count else np.empty((0, 3))
+        self.axis = int(np.argmax(np.ptp(centres, axis=0))) if count else 0
+        position = centres[:, self.axis]
+
+        # Seam corners further than this from a cut only meet faces of one tile
+        along = corners[:, self.axis]
+        starts = self.faces.loop_starts
+        self.reach = float((np.maximum.reduceat(along, starts) -
+                            np.minimum.reduceat(along, starts)).max()
+                           + tolerance) if count else 0.0
+
+        # Cut between distinct centre positions, near equal-count quantiles
+        values, counts = np.unique(np.round(position / tolerance), return_counts=True)
+        cut_after = np.searchsorted(np.cumsum(counts),
+                                    np.arange(1, tiles) * count / tiles)
+        cut_after = np.unique(cut_after[cut_after < len(values) - 1])
+        cuts = (values[cut_after] + values[cut_after + 1]) / 2 * tolerance
+        self.cuts = cuts
+
+        margin = 2 * tolerance
+        low = np.searchsorted(cuts, position - margin)
+        high = np.searchsorted(cuts, position + margin)
+        self.tasks = []
+        for tile in range(len(cuts) + 1):
+            face_ids = np.flatnonzero((low <= tile) & (high >= tile))
+            if len(face_ids):
+                self.tasks.append(self.task(face_ids))
+
+    def task(self, face_ids):
+        """Build the compose_tile input for the given faces"""
+        tile_faces = self.faces.subset(face_ids)
+        vert_ids, local = np.unique(tile_faces.loop_verts, return_inverse=True)
+        return (self.verts[vert_ids], local.reshape(-1), tile_faces.loop_totals,
+                self.owners[face_ids], face_ids, vert_ids, self.tolerance)
+
+    def stitch(self, results):
+        """Combine tile results into one surface per group of meshes
+
+        Welds from different tiles meet at the vertices the tiles share, and
+        seam corners close enough to a cut to have been welded in more than
+        one tile are clustered once more, so the seams between tiles close
+        as if the selection were one tile. Returns (components, surfaces): mesh index lists like
+        plan_components, and the (verts, faces) of each merged group.
+        """
+        results = list(results)
+        empty = np.empty((2, 0), dtype=np.int64)
+        dropped = np.concatenate([np.empty(0, dtype=np.int64)] +
+                                 [result[0] for result in results])
+        welds = np.concatenate([empty] + [result[1] for result in results], axis=1)
+        links = np.concatenate([empty] + [result[2] for result in results], axis=1)
+
+        # Groups of meshes connected through shared faces
+        labels = _component_labels(self.mesh_count, links[0], links[1])
+        order = np.argsort(labels, kind="stable")
+        starts = np.flatnonzero(np.diff(labels[order], prepend=-1))
+        components = sorted(group.tolist() for group in np.split(order, starts[1:])
+                            if len(group) > 1)
+        if not components:
+            return [], []
+
+        # Coincident seam corners welded in different tiles
+        seam = np.unique(welds[0])
+        if len(self.cuts) and len(seam):
+            position = self.verts[seam, self.axis]
+            index = np.searchsorted(self.cuts, position)
+            below = self.cuts[(index - 1).clip(0)]
+            above = self.cuts[index.clip(max=len(self.cuts) - 1)]
+            nearest = np.minimum(np.abs(position - below), np.abs(above - position))
+            border = seam[nearest <= self.reach]
+            _, first, groups = np.unique(vertex_clusters(self.verts[border],
+                                                         self.tolerance),
+                                         return_index=True, return_inverse=True)
+            welds = np.concatenate(
+                [welds, np.stack([border, border[first][groups.reshape(-1)]])], axis=1)
+
+        # Every welded vertex becomes the lowest vertex of its group
+        vertex_labels = _component_labels(len(self.verts), welds[0], welds[1])
+        keep = np.ones(self.faces.count, dtype=bool)
+        keep[dropped] = False
+        component_of = np.full(self.mesh_count, -1)
+        for index, component in enumerate(components):
+            component_of[component] = index
+        face_component = component_of[self.owners]
+        keep &= face_component >= 0
+
+        kept = np.flatnonzero(keep)
+        kept = kept[np.argsort(face_component[kept], kind="stable")]
+        faces = self.faces.subset(kept)
+        face_splits = np.searchsorted(face_component[kept], np.arange(1, len(components)))
+        loop_splits = np.concatenate([[0], np.cumsum(faces.loop_totals)])[face_splits]
+        surfaces = []
+        for loop_verts, loop_totals in zip(
+                np.split(vertex_labels[faces.loop_verts], loop_splits),
+                np.split(faces.loop_totals, face_splits)):
+            used, loop_verts = np.unique(loop_verts, return_inverse=True)
+            surfaces.append((self.verts[used],
+                             FaceArrays(loop_verts.reshape(-1), loop_totals)))
+        return components, surfaces
+
+
+def compose_tiled(meshes, tolerance=DEFAULT_TOLERANCE, workers=None):
+    """Merge meshes that share faces, spreading the work over processes
+
+    The headless counterpart of the Compose operator's tiled mode: meshes
+    are (verts, faces) in world space and workers defaults to the number
+    of cores. Returns (components, surfaces) as TiledCompose.stitch.
+    """
+    workers = workers or os.cpu_count() or 1
+    tiles = TiledCompose(meshes, workers, tolerance)
+    return tiles.stitch(run_tiles(tiles.tasks, workers))
+
+
+# ---------------------------------------------------------------------------
+# Streaming compose
+# ---------------------------------------------------------------------------
+
+# Meshes read and merged per chunk of a streaming compose
+STREAM_CHUNK_SIZE = 1000
+
+
+class GeometrySpool:
+    """Finished geometry appended chunk by chunk to temporary files
+
+    Vertices are kept as float32 and loops as int32, the types Blender
+    stores, and nothing stays in memory between appends. arrays maps the
+    files back for one final write.
+    """
+
+    def __init__(self):
+        self._files = [tempfile.TemporaryFile() for _ in range(3)]
+        self.vert_count = 0
+        self.loop_count = 0
+        self.face_count = 0
+
+    def append(self, verts, faces):
+        """Append verts and faces whose indices already count from vert_count"""
+        verts_file, loops_file, totals_file = self._files
+        np.asarray(verts, dtype=np.float32).tofile(verts_file)
+        np.asarray(faces.loop_verts, dtype=np.int32).tofile(loops_file)
+        np.asarray(faces.loop_totals, dtype=np.int32).tofile(totals_file)
+        self.vert_count += len(verts)
+        self.loop_count += len(faces.loop_verts)
+        self.face_count += faces.count
+
+    def arrays(self):
+        """Return (verts, faces) of everything appended, mapped from disk"""
+        def mapped(file, dtype, count, shape):
+            if count == 0:
+                return np.empty(shape, dtype=dtype)
+            file.flush()
+            return np.memmap(file, dtype=dtype, mode="r", shape=shape)
+
+        verts_file, loops_file, totals_file = self._files
+        verts = mapped(verts_file, np.float32, self.vert_count, (self.vert_count, 3))
+        loop_verts = mapped(loops_file, np.int32, self.loop_count, (self.loop_count,))
+        loop_totals = mapped(totals_file, np.int32, self.face_count, (self.face_count,))
+        return verts, FaceArrays(loop_verts, loop_totals)
+
+    def close(self):
+        for file in self._files:
+            file.close()
+
+
+class StreamingCompose:
+    """Merge meshes a chunk at a time along a sweep, holding only the frontier
+
+    Meshes are ordered by where their bounds start along the longest axis
+    of the selection. Each chunk added is merged into the frontier: shared
+    faces are dropped and their corners welded, as in merge_geometry. A
+    face ending more than twice the tolerance before the start of the next
+    chunk can no longer meet anything, so it is finished and goes to spool,
+    in the space given by matrix if one is set. Only the faces across the
+    sweep line and their vertices stay in memory. Unlike plan_components,
+    every mesh ends up in the one output, touching others or not.
+    """
+
+    def __init__(self, bounds, tolerance=DEFAULT_TOLERANCE, matrix=None):
+        bounds = as_bounds_array(bounds)
+        self.tolerance = tolerance
+        self.matrix = None if matrix is None else np.asarray(matrix, dtype=np.float64)
+        extent = (bounds[:, 1::2].max(axis=0) - bounds[:, 0::2].min(axis=0)
+                  if len(bounds) else np.zeros(3))
+        self.axis = int(np.argmax(extent))
+        starts = bounds[:, 2 * self.axis]
+        self.order = np.argsort(starts, kind="stable")
+        self._starts = starts[self.order]
+        self.spool = GeometrySpool()
+        self.read = 0
+        self.shared_faces = 0
+        self.peak_faces = 0
+
+        # The frontier: open faces, their owners and vertices, which vertices
+        # are seam corners and where vertices already went in the spool
+        empty = np.empty(0, dtype=np.int64)
+        self.verts = np.empty((0, 3))
+        self.faces = FaceArrays(empty, empty)
+        self.owners = empty
+        self.seam = np.empty(0, dtype=bool)
+        self.written = empty
+
+    def chunks(self, size=STREAM_CHUNK_SIZE):
+        """Yield the mesh indices of each chunk in sweep order"""
+        for start in range(0, len(self.order), size):
+            yield self.order[start:start + size]
+
+    def add(self, meshes):
+        """Merge the next chunk's (verts, faces) meshes, in chunks order"""
+        verts, faces, owners = concat_meshes(meshes)
+        offset = len(self.verts)
+        self.verts = np.concatenate([self.verts, verts])
+        self.faces = FaceArrays(
+            np.concatenate([self.faces.loop_verts, faces.loop_verts + offset]),
+            np.concatenate([self.faces.loop_totals, faces.loop_totals]))
+        self.owners = np.concatenate(
+            [self.owners, self.order[self.read:self.read + len(meshes)][owners]])
+        self.seam = np.concatenate([self.seam, np.zeros(len(verts), dtype=bool)])
+        self.written = np.concatenate([self.written, np.full(len(verts), -1)])
+        self.read += len(meshes)
+        self.peak_faces = max(self.peak_faces, self.faces.count)
+
+        a, b = coincident_faces(self.verts, self.faces, self.tolerance)
+        across = self.owners[a] != self.owners[b]
+        dropped = np.unique(np.concatenate([a[across], b[across]]))
+        self.shared_faces += len(dropped)
+        self.seam[self.faces.subset(dropped).loop_verts] = True
+        keep = np.ones(self.faces.count, dtype=bool)
+        keep[dropped] = False
+        self.faces = self.faces.subset(np.flatnonzero(keep))
+        self.owners = self.owners[keep]
+
+        # Seam corners seen so far point at the first vertex of their cluster
+        seam = np.flatnonzero(self.seam)
+        _, first, groups = np.unique(vertex_clusters(self.verts[seam], self.tolerance),
+                                     return_index=True, return_inverse=True)
+        target = np.arange(len(self.verts))
+        target[seam] = seam[first][groups.reshape(-1)]
+        self.faces = FaceArrays(target[self.faces.loop_verts], self.faces.loop_totals)
+
+        if self.read < len(self._starts):
+            line = self._starts[self.read] - 2 * self.tolerance
+        else:
+            line = np.inf
+        if self.faces.count:
+            along = self.verts[self.faces.loop_verts, self.axis]
+            closed = np.maximum.reduceat(along, self.faces.loop_starts) < line
+        else:
+            closed = np.zeros(0, dtype=bool)
+        self._write(self.faces.subset(np.flatnonzero(closed)))
+
+        # Keep the open faces and only the vertices they use
+        self.faces = self.faces.subset(np.flatnonzero(~closed))
+        self.owners = self.owners[~closed]
+        used, loop_verts = np.unique(self.faces.loop_verts, return_inverse=True)
+        self.faces = FaceArrays(loop_verts.reshape(-1), self.faces.loop_totals)
+        self.verts = self.verts[used]
+        self.seam = self.seam[used]
+        self.written = self.written[used]
+
+    def _write(self, faces):
+        """Append finished faces to spool with any vertices not yet there"""
+        used = np.unique(faces.loop_verts)
+        new = used[self.written[used] < 0]
+        self.written[new] = self.spool.vert_count + np.arange(len(new))
+        verts = self.verts[new]
+        if self.matrix is not None:
+            verts = verts @ self.matrix[:3, :3].T + self.matrix[:3, 3]
+        self.spool.append(verts, FaceArrays(self.written[faces.loop_verts],
+                                            faces.loop_totals))
+
+    def close(self):
+        self.spool.close()
+
+
+def compose_streaming(bounds, read_meshes, tolerance=DEFAULT_TOLERANCE,
+                      chunk_size=STREAM_CHUNK_SIZE):
+    """Merge every mesh into one surface, loading a chunk at a time
+
+    The headless counterpart of the Compose operator's streaming mode:
+    bounds holds one row per mesh and read_meshes(indices) returns the
+    world-space (verts, faces) of those meshes, so only one chunk is ever
+    loaded. Returns the GeometrySpool holding the result; close it once
+    its arrays have been used.
+    """
+    stream = StreamingCompose(bounds, tolerance)
+    try:
+        for chunk in stream.chunks(chunk_size):
+            stream.add(read_meshes(chunk))
+    except BaseException:
+        stream.close()
+        raise
+    return stream.spool
+
+
+# ---------------------------------------------------------------------------
+# Mesh export
+# ---------------------------------------------------------------------------
+
+# Vertices or faces converted and written at a time when exporting
+EXPORT_CHUNK_SIZE = 65536
+
+
+def face_chunks(faces, size=EXPORT_CHUNK_SIZE):
+    """Yield faces as FaceArrays of at most size faces each"""
+    bounds = np.concatenate([faces.loop_starts, [len(faces.loop_verts)]])
+    for first in range(0, faces.count, size):
+        last = min(first + size, faces.count)
+        yield FaceArrays(faces.loop_verts[bounds[first]:bounds[last]],
+                         faces.loop_totals[first:last])
+
+
+def triangulate(faces):
+    """Split every face into a fan of triangles, returned as (T, 3) indices"""
+    fans = np.maximum(np.asarray(faces.loop_totals, dtype=np.int64) - 2, 0)
+    first = np.repeat(faces.loop_starts, fans)
+    step = np.arange(fans.sum()) - np.repeat(np.cumsum(fans) - fans, fans)
+    corners = np.stack([first, first + step + 1, first + step + 2], axis=1)
+    return np.asarray(faces.loop_verts)[corners]
+
+
+class PlyWriter:
+    """Binary little-endian PLY
+
+    The header needs both element counts, so geometry goes to a
+    GeometrySpool first and is copied into the file behind the header by
+    finish.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.spool = GeometrySpool()
+
+    def add(self, verts, faces):
+        self.spool.append(verts, faces.offset(self.spool.vert_count))
+
+    def finish(self):
+        spool = self.spool
+        verts, faces = spool.arrays()
+        if faces.count and faces.loop_totals.max() > 255:
+            raise ValueError("PLY export supports faces of at most 255 corners")
+        self.file.write((
+            "ply\nformat binary_little_endian 1.0\n"
+            f"element vertex {spool.vert_count}\n"
+            "property float x\nproperty float y\nproperty float z\n"
+            f"element face {spool.face_count}\n"
+            "property list uchar int vertex_indices\nend_header\n").encode("ascii"))
+        for start in range(0, len(verts), EXPORT_CHUNK_SIZE):
+            verts[start:start + EXPORT_CHUNK_SIZE].astype("<f4").tofile(self.file)
+
+        # Each face is its corner count as one byte, then its indices
+        for chunk in face_chunks(faces):
+            record = np.ones(chunk.count + 4 * len(chunk.loop_verts), dtype=bool)
+            counts = chunk.loop_starts * 4 + np.arange(chunk.count)
+            record[counts] = False
+            data = np.empty(len(record), dtype=np.uint8)
+            data[counts] = chunk.loop_totals
+            data[record] = np.asarray(chunk.loop_verts, dtype="<i4").view(np.uint8)
+            data.tofile(self.file)
+        return spool.vert_count, spool.face_count
+
+    def close(self):
+        self.spool.close()
+
+
+class StlWriter:
+    """Binary STL; faces are fanned into triangles with flat normals
+
+    The triangle count in the header is filled in by finish.
+    """
+
+    RECORD = np.dtype([("normal", "<f4", 3), ("corners", "<f4", (3, 3)),
+                       ("attribute", "<u2")])
+
+    def __init__(self, file):
+        self.file = file
+        self.vert_count = 0
+        self.face_count = 0
+        self.triangle_count = 0
+        self.file.write(b"Binary STL written by Cube Mesh Manager".ljust(80, b" "))
+        self.file.write(np.uint32(0).tobytes())
+
+    def add(self, verts, faces):
+        verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+        for chunk in face_chunks(faces):
+            corners = verts[triangulate(chunk)]
+            normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+            lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+            records = np.zeros(len(corners), dtype=self.RECORD)
+            records["normal"] = np.divide(normals, lengths, out=np.zeros_like(normals),
+                                          where=lengths > 0)
+            records["corners"] = corners
+            records.tofile(self.file)
+            self.triangle_count += len(records)
+        self.vert_count += len(verts)
+        self.face_count += faces.count
+
+    def finish(self):
+        self.file.seek(80)
+        self.file.write(np.uint32(self.triangle_count).astype("<u4").tobytes())
+        self.file.seek(0, os.SEEK_END)
+        return self.vert_count, self.face_count
+
+    def close(self):
+        pass
+
+
+class ObjWriter:
+    """Wavefront OBJ, which only exists as text
+
+    Each chunk is formatted with one string operation; vertices and faces
+    of every mesh are written in turn, since faces count vertices from the
+    start of the file.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.vert_count = 0
+        self.face_count = 0
+
+    def add(self, verts, faces):
+        verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+        for start in range(0, len(verts), EXPORT_CHUNK_SIZE):
+            chunk = verts[start:start + EXPORT_CHUNK_SIZE]
+            text = "v %.6f %.6f %.6f\n" * len(chunk) % tuple(chunk.ravel().tolist())
+            self.file.write(text.encode("ascii"))
+
+        templates = {}
+        for chunk in face_chunks(faces):
+            totals = chunk.loop_totals.tolist()
+            for total in set(totals):
+                templates.setdefault(total, "f" + " %d" * total + "\n")
+            layout = "".join(map(templates.__getitem__, totals))
+            indices = np.asarray(chunk.loop_verts, dtype=np.int64) + self.vert_count + 1
+            self.file.write((layout % tuple(indices.tolist())).encode("ascii"))
+        self.vert_count += len(verts)
+        self.face_count += faces.count
+
+    def finish(self):
+        return self.vert_count, self.face_count
+
+    def close(self):
+        pass
+
+
+EXPORT_WRITERS = {"PLY": PlyWriter, "STL": StlWriter, "OBJ": ObjWriter}
+
+
+def export_format(path, file_format=None):
+    """Return file_format, or the format named by the extension of path"""
+    file_format = (file_format or os.path.splitext(path)[1].lstrip(".")).upper()
+    if file_format not in EXPORT_WRITERS:
+        raise ValueError(f"Cannot export to {file_format or path!r}: "
+                         f"use one of {', '.join(EXPORT_WRITERS)}")
+    return file_format
+
+
+def write_mesh(path, meshes, file_format=None):
+    """Write (verts, faces) meshes together into one PLY, STL or OBJ file
+
+    meshes is any iterable, read once, so a generator can load one mesh at
+    a time. Geometry is converted and written in chunks of
+    EXPORT_CHUNK_SIZE with NumPy, with no Python work per vertex. The
+    format defaults to the extension of path. Returns the number of
+    vertices and faces written.
+    """
+    writer_class = EXPORT_WRITERS[export_format(path, file_format)]
+    with open(path, "wb") as file:
+        writer = writer_class(file)
+        try:
+            for verts, faces in meshes:
+                writer.add(np.asarray(verts).reshape(-1, 3), as_face_arrays(faces))
+            return writer.finish()
+        finally:
+            writer.close()
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+class PhaseStats:
+    """Wall time and peak traced memory of named phases
+
+    Time is always measured. With trace_memory, tracemalloc is started for
+    the lifetime of the object (unless it already runs) and each phase also
+    records how far traced memory rose above its level at the start of the
+    phase. Entering a phase name again adds to its time and keeps the
+    larger peak.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.seconds = {}
+        self.peak_bytes = {}
+        self.total = None
+        self._started_tracing = False
+        self._start = time.perf_counter()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @contextmanager
+    def phase(self, name):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                self.peak_bytes[name] = max(self.peak_bytes.get(name, 0), peak)
+
+    def close(self):
+        """Stop tracemalloc if this object started it and fix the total time"""
+        self.total = time.perf_counter() - self._start
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def as_dict(self):
+        total = self.total
+        if total is None:
+            total = time.perf_counter() - self._start
+        phases = {}
+        for name, seconds in self.seconds.items():
+            phases[name] = {"seconds": round(seconds, 6)}
+            if name in self.peak_bytes:
+                phases[name]["peak_bytes"] = self.peak_bytes[name]
+        return {"total_seconds": round(total, 6), "phases": phases}
+
+    def summary(self):
+        """Describe the phases in one line, e.g. read 0.12s, plan 0.40s (3.1 MB)"""
+        parts = []
+        for name, seconds in self.seconds.items():
+            part = f"{name} {seconds:.2f}s"
+            if name in self.peak_bytes:
+                part += f" ({format_bytes(self.peak_bytes[name])})"
+            parts.append(part)
+        return ", ".join(parts)
+
+
+if __name__ == "__main__" and sys.argv[1:] == ["--tile-worker"]:
+    serve_tiles(sys.stdin.buffer, sys.stdout.buffer)
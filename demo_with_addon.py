@@ -1,8 +1,10 @@
 import bpy
 import os
+import shutil
+import tempfile
 
-# Get the addon file path
-addon_file = "/Users/adityasarna/Downloads/cube_mesh_manager_addon/cube_mesh_manager.py"
+# Get the folder holding the cube_mesh_manager package
+addon_dir = "/Users/adityasarna/Downloads/cube_mesh_manager_addon"
 
 print("\n" + "="*60)
 print("INSTALLING ADDON...")
@@ -10,8 +12,10 @@ print("="*60)
 
 # Install the addon
 try:
+    addon_file = shutil.make_archive(os.path.join(tempfile.mkdtemp(), "cube_mesh_manager"),
+                                     "zip", addon_dir, "cube_mesh_manager")
     bpy.ops.preferences.addon_install(filepath=addon_file)
-    print(f"✓ Addon installed from: {addon_file}")
+    print(f"✓ Addon installed from: {addon_dir}")
 except Exception as e:
     print(f"Note: {e}")
 
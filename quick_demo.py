@@ -4,18 +4,21 @@ Quick demo script - installs addon and runs basic tests
 import bpy
 import sys
 import os
+import shutil
+import tempfile
 
 # Get the addon directory
 addon_dir = os.path.dirname(os.path.abspath(__file__))
-addon_file = os.path.join(addon_dir, "cube_mesh_manager.py")
 
 print("=" * 60)
 print("INSTALLING CUBE MESH MANAGER ADDON")
 print("=" * 60)
 
-# Install the addon
+# Install the addon, zipping its package folder the way it ships
 try:
-    bpy.ops.preferences.addon_install(filepath=addon_file)
+    addon_zip = shutil.make_archive(os.path.join(tempfile.mkdtemp(), "cube_mesh_manager"),
+                                    "zip", addon_dir, "cube_mesh_manager")
+    bpy.ops.preferences.addon_install(filepath=addon_zip)
     print("✓ Addon installed")
 except Exception as e:
     print(f"Install note: {e}")
@@ -2,16 +2,20 @@
 import bpy
 import sys
 import os
+import shutil
+import tempfile
 
 # Get the addon directory
 addon_dir = os.path.dirname(os.path.abspath(__file__))
-addon_file = os.path.join(addon_dir, "cube_mesh_manager.py")
+addon_package = os.path.join(addon_dir, "cube_mesh_manager")
 
-print(f"Installing addon from: {addon_file}")
+print(f"Installing addon from: {addon_package}")
 
-# Install the addon
+# Install the addon package from a zip
 try:
-    bpy.ops.preferences.addon_install(filepath=addon_file)
+    addon_zip = shutil.make_archive(os.path.join(tempfile.mkdtemp(), "cube_mesh_manager"),
+                                    "zip", addon_dir, "cube_mesh_manager")
+    bpy.ops.preferences.addon_install(filepath=addon_zip)
     print("Addon installed")
 except Exception as e:
     print(f"Install failed: {e}")
@@ -12,15 +12,18 @@ Instructions:
 
 The script will automatically test:
 - Cube distribution with various counts
-- Range validation
+- Large counts above the soft limit
 - Cube deletion
 - Mesh merging with common faces
 - Edge cases and error handling
 """
 
 import bpy
+import sys
 import time
 import os
+import math
+from types import SimpleNamespace
 
 
 def setup_camera_and_light():
@@ -126,31 +129,37 @@ def test_cube_distribution():
 
 
 def test_range_validation():
-    """Test range validation (max 20 cubes)"""
-    print_separator("TEST 2: Range Validation")
+    """Test large counts (warning above the soft limit, no hard cap)"""
+    print_separator("TEST 2: Large Counts")
     
     clear_scene()
     
-    # Test 2a: Try to create 21 cubes (should fail)
-    print("Test 2a: Attempting to create 21 cubes (should fail)...")
+    # Test 2a: More than the old limit of 20 cubes
+    print("Test 2a: Creating 21 cubes (above the old limit)...")
     bpy.context.scene.cube_manager_props.number_of_cubes = 21
     result = bpy.ops.cube.distribute_cubes()
     
-    if result == {'CANCELLED'}:
-        print("Correctly rejected value > 20")
+    if result == {'FINISHED'}:
+        print(f"Successfully created 21 cubes")
+        print(f"  Objects in scene: {len(bpy.context.scene.objects)}")
     else:
-        print("Failed to validate range")
+        print("Failed to create 21 cubes")
     
-    # Test 2b: Create exactly 20 cubes (should succeed)
-    print("\nTest 2b: Creating exactly 20 cubes (at limit)...")
-    bpy.context.scene.cube_manager_props.number_of_cubes = 20
+    # Test 2b: Above the soft limit (should warn, not fail)
+    clear_scene()
+    print("\nTest 2b: Creating 2000 cubes above a soft limit of 1000...")
+    props = bpy.context.scene.cube_manager_props
+    props.number_of_cubes = 2000
+    props.soft_limit = 1000
+    start = time.time()
     result = bpy.ops.cube.distribute_cubes()
+    props.soft_limit = 10000
     
     if result == {'FINISHED'}:
-        print(f"Successfully created 20 cubes (maximum allowed)")
+        print(f"Created 2000 cubes in {time.time() - start:.2f} seconds")
         print(f"  Objects in scene: {len(bpy.context.scene.objects)}")
     else:
-        print("Failed to create 20 cubes")
+        print("Failed to create 2000 cubes")
 
 
 def test_delete_cubes():
@@ -383,6 +392,441 @@ def test_overlap_avoidance():
         print("Distribution failed")
 
 
+def test_shared_mesh_distribution():
+    """Test shared-mesh distribution and composing linked duplicates"""
+    print_separator("TEST 9: Shared Mesh Distribution")
+    
+    clear_scene()
+    
+    print("Distributing 4 cubes that share one mesh...")
+    props = bpy.context.scene.cube_manager_props
+    props.number_of_cubes = 4
+    props.shared_mesh = True
+    result = bpy.ops.cube.distribute_cubes()
+    props.shared_mesh = False
+    
+    cubes = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+    meshes = {obj.data.name for obj in cubes}
+    
+    if result == {'FINISHED'} and len(cubes) == 4 and len(meshes) == 1:
+        print(f"All {len(cubes)} cubes use mesh '{cubes[0].data.name}'")
+    else:
+        print(f"Expected 4 cubes sharing 1 mesh, got {len(cubes)} cubes and {len(meshes)} meshes")
+    
+    # Move two of them together so they share a face, then compose them
+    print("\nComposing two linked duplicates...")
+    cubes[1].location = (cubes[0].location.x + 1, cubes[0].location.y, 0)
+    bpy.context.view_layer.update()
+    
+    bpy.ops.object.select_all(action='DESELECT')
+    cubes[0].select_set(True)
+    cubes[1].select_set(True)
+    bpy.context.view_layer.objects.active = cubes[0]
+    result = bpy.ops.cube.compose_mesh()
+    
+    untouched = [obj for obj in cubes[2:] if len(obj.data.polygons) == 6]
+    if result == {'FINISHED'} and len(untouched) == 2:
+        print("Merged cubes without changing the other linked duplicates")
+    else:
+        print("Compose changed the shared mesh of unselected cubes")
+
+
+def test_instance_output():
+    """Test point-instanced distribution and realizing a subset"""
+    print_separator("TEST 10: Instance Output")
+    
+    clear_scene()
+    
+    print("Distributing 16 cubes as instances...")
+    props = bpy.context.scene.cube_manager_props
+    props.number_of_cubes = 16
+    props.output_mode = 'INSTANCES'
+    result = bpy.ops.cube.distribute_cubes()
+    props.output_mode = 'OBJECTS'
+    
+    object_count = len(bpy.context.scene.objects)
+    if result == {'FINISHED'} and object_count == 2:
+        print(f"16 cubes placed using {object_count} objects")
+    else:
+        print(f"Expected 2 objects, found {object_count}")
+    
+    # Realize the first 4 points
+    print("\nRealizing 4 instances...")
+    instancer = next(obj for obj in bpy.context.scene.objects
+                     if obj.instance_type == 'VERTS')
+    for index, vertex in enumerate(instancer.data.vertices):
+        vertex.select = index < 4
+    bpy.ops.object.select_all(action='DESELECT')
+    instancer.select_set(True)
+    bpy.context.view_layer.objects.active = instancer
+    result = bpy.ops.cube.realize_instances()
+    
+    remaining = len(instancer.data.vertices)
+    if result == {'FINISHED'} and remaining == 12:
+        print(f"Realized 4 cubes, {remaining} instances left")
+    else:
+        print("Realize operation failed")
+
+
+def test_export():
+    """Test exporting a composed mesh to PLY, STL and OBJ"""
+    print_separator("TEST 11: Export")
+    
+    clear_scene()
+    
+    print("Composing 2 touching cubes...")
+    bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 0))
+    cube1 = bpy.context.active_object
+    bpy.ops.mesh.primitive_cube_add(size=1, location=(1, 0, 0))
+    cube1.select_set(True)
+    bpy.ops.cube.compose_mesh()
+    
+    output_dir = os.path.dirname(os.path.abspath(__file__))
+    for file_format in ('PLY', 'STL', 'OBJ'):
+        path = os.path.join(output_dir, f"test_11_export.{file_format.lower()}")
+        result = bpy.ops.cube.export_mesh(filepath=path, file_format=file_format)
+        if result == {'FINISHED'} and os.path.getsize(path) > 0:
+            print(f"Wrote {file_format}: {os.path.getsize(path)} bytes")
+        else:
+            print(f"Export to {file_format} failed")
+
+
+def test_modal_cancel():
+    """Test that cancelling a modal compose blocks edits and rolls back"""
+    print_separator("TEST 12: Modal Cancel")
+    
+    clear_scene()
+    
+    print("Creating a row of 50 touching cubes...")
+    cubes = []
+    for index in range(50):
+        bpy.ops.mesh.primitive_cube_add(size=1, location=(index, 0, 0))
+        cubes.append(bpy.context.active_object)
+    for cube in cubes:
+        cube.select_set(True)
+    names = sorted(obj.name for obj in bpy.context.scene.objects)
+    
+    addon = sys.modules["cube_mesh_manager"]
+    result = bpy.ops.cube.compose_mesh('INVOKE_DEFAULT')
+    if result != {'RUNNING_MODAL'} or not addon.running_jobs:
+        print(f"Compose did not start modally ({result}), skipping")
+        return
+    job = addon.running_jobs[0]
+    
+    # Drive the run by hand: background Blender has no event loop
+    try:
+        bpy.ops.cube.delete_cubes()
+        print("Delete Cubes ran while the compose was still running")
+    except RuntimeError:
+        print("Delete Cubes is blocked while the compose runs")
+    job.modal(bpy.context, SimpleNamespace(type='DEL', value='PRESS'))
+    result = job.modal(bpy.context, SimpleNamespace(type='ESC', value='PRESS'))
+    
+    restored = sorted(obj.name for obj in bpy.context.scene.objects)
+    intact = all(len(cube.data.polygons) == 6 for cube in cubes)
+    if result == {'CANCELLED'} and restored == names and intact and not addon.running_jobs:
+        print("Cancelled compose left all 50 cubes as they were")
+    else:
+        print("Cancelled compose did not roll back completely")
+
+
+def compose_shape(cells, angle):
+    """Compose unit cubes at cells, all turned by angle about Z
+    
+    Returns (vertices, faces) of every resulting object, sorted.
+    """
+    clear_scene()
+    cubes = []
+    for x, y, z in cells:
+        location = (x * math.cos(angle) - y * math.sin(angle),
+                    x * math.sin(angle) + y * math.cos(angle), z)
+        bpy.ops.mesh.primitive_cube_add(size=1, location=location, rotation=(0, 0, angle))
+        cubes.append(bpy.context.active_object)
+    for cube in cubes:
+        cube.select_set(True)
+    bpy.context.view_layer.objects.active = cubes[0]
+    bpy.ops.cube.compose_mesh()
+    return sorted((len(obj.data.vertices), len(obj.data.polygons))
+                  for obj in bpy.context.scene.objects if obj.type == 'MESH')
+
+
+def test_lattice_vs_general():
+    """Test that the lattice path and the general path compose alike"""
+    print_separator("TEST 13: Lattice vs General Compose")
+    
+    # An L of 2 layers with a dent underneath, where its cubes meet along an
+    # edge, plus a cube touching it only along an edge and a loose cube
+    cells = [(x, y, z) for x in range(3) for y in range(3) for z in range(2)
+             if (x, y) != (2, 2) and (x, y, z) != (1, 1, 0)]
+    cells += [(3, 2, 0), (6, 0, 0)]
+    
+    # Axis-aligned unit cubes take the lattice path; turned ones cannot
+    print(f"Composing {len(cells)} axis-aligned cubes...")
+    lattice = compose_shape(cells, 0.0)
+    print(f"  (vertices, faces) per object: {lattice}")
+    print(f"Composing the same {len(cells)} cubes turned by 30 degrees...")
+    general = compose_shape(cells, math.radians(30))
+    print(f"  (vertices, faces) per object: {general}")
+    
+    if lattice == general:
+        print("Lattice and general compose give the same objects")
+    else:
+        print("Lattice and general compose differ")
+
+
+def test_voxel_shared_faces():
+    """Test that touching voxel cubes lose the faces between them"""
+    print_separator("TEST 14: Voxels Without Shared Faces")
+    
+    clear_scene()
+    props = bpy.context.scene.cube_manager_props
+    props.number_of_cubes = 9
+    props.spacing = 1.0
+    props.output_mode = 'VOXELS'
+    props.voxel_cull_shared = True
+    
+    print("Distributing 9 touching cubes into one mesh without shared faces...")
+    result = bpy.ops.cube.distribute_cubes()
+    props.spacing = 2.5
+    props.output_mode = 'OBJECTS'
+    props.voxel_cull_shared = False
+    
+    # A 3x3 slab: 9 faces on top and bottom, 12 around, on a 4x4x2 corner grid
+    mesh = bpy.context.scene.objects[0].data if result == {'FINISHED'} else None
+    if mesh is not None and (len(mesh.vertices), len(mesh.polygons)) == (32, 30):
+        print("Voxel mesh is one 3x3 slab: 32 vertices, 30 faces")
+    else:
+        print(f"Unexpected voxel mesh ({result})")
+
+
+def test_mesh_rna_shape():
+    """Test that the mesh structs expose the RNA the addon reads and writes"""
+    print_separator("TEST 15: Mesh RNA Shape")
+    
+    # (element struct, property) pairs the addon passes to foreach_get/set
+    used = [
+        (bpy.types.MeshVertex, "co"),
+        (bpy.types.MeshVertex, "select"),
+        (bpy.types.MeshLoop, "vertex_index"),
+        (bpy.types.MeshPolygon, "loop_start"),
+        (bpy.types.MeshPolygon, "loop_total"),
+    ]
+    missing = [f"{struct.__name__}.{name}" for struct, name in used
+               if name not in struct.bl_rna.properties]
+    if missing:
+        print(f"Missing RNA properties: {', '.join(missing)}")
+    else:
+        print(f"All {len(used)} element properties are in their structs' bl_rna")
+    
+    loop_total = bpy.types.MeshPolygon.bl_rna.properties["loop_total"]
+    print(f"MeshPolygon.loop_total read-only: {loop_total.is_readonly}")
+    
+    mesh = bpy.data.meshes.new("RNA_Shape")
+    mesh.from_pydata([(0, 0, 0), (1, 0, 0), (0, 1, 0)], [], [(0, 1, 2)])
+    mesh.attributes.new("cell_index", 'INT', 'FACE')
+    names = [attribute.name for attribute in mesh.attributes]
+    bpy.data.meshes.remove(mesh)
+    if "cell_index" in names:
+        print("Iterating mesh.attributes yields attributes")
+    else:
+        print(f"Iterating mesh.attributes yields {names}")
+
+
+def test_mixed_cube_sizes():
+    """Test that one odd cube does not set the lattice of a selection"""
+    print_separator("TEST 16: Mixed Cube Sizes")
+    
+    # A size 2 cube first, then 6 unit cubes in a row well away from it
+    clear_scene()
+    bpy.ops.mesh.primitive_cube_add(size=2, location=(-5, 0, 0))
+    cubes = [bpy.context.active_object]
+    for x in range(6):
+        bpy.ops.mesh.primitive_cube_add(size=1, location=(x + 0.25, 0, 0))
+        cubes.append(bpy.context.active_object)
+    
+    addon = sys.modules["cube_mesh_manager"]
+    meshes = [addon.get_mesh_arrays(cube) for cube in cubes]
+    lattice = addon.core.find_lattice_cubes(meshes)
+    print(f"Lattice size {lattice.size}, cubes {lattice.indices.tolist()}")
+    if lattice.size == 1 and lattice.indices.tolist() == [1, 2, 3, 4, 5, 6]:
+        print("The 6 unit cubes form the lattice; the size 2 cube is left out")
+    else:
+        print("The first cube decided the lattice")
+
+
+def cubes_hitting(obstacle):
+    """Count distributed unit cubes that overlap obstacle's world bounds"""
+    corners = [obstacle.matrix_world @ vertex.co for vertex in obstacle.data.vertices]
+    low = [min(corner[axis] for corner in corners) for axis in range(3)]
+    high = [max(corner[axis] for corner in corners) for axis in range(3)]
+    cubes = bpy.data.collections["Distributed Cubes"].objects
+    return sum(all(cube.location[axis] + 0.5 > low[axis] and
+                   cube.location[axis] - 0.5 < high[axis] for axis in range(3))
+               for cube in cubes)
+
+
+def delete_distributed_cubes():
+    """Delete the distributed cubes and nothing else"""
+    bpy.ops.object.select_all(action='DESELECT')
+    for cube in bpy.data.collections["Distributed Cubes"].objects:
+        cube.select_set(True)
+    bpy.ops.cube.delete_cubes()
+
+
+def test_obstacle_edits():
+    """Test that moving or reshaping an obstacle reaches the next distribute"""
+    print_separator("TEST 17: Obstacle Edits Between Distributes")
+    
+    clear_scene()
+    props = bpy.context.scene.cube_manager_props
+    props.number_of_cubes = 9
+    
+    # The first distribute caches the obstacle's bounds far from the grid
+    bpy.ops.mesh.primitive_cube_add(size=2, location=(50, 0, 0))
+    obstacle = bpy.context.active_object
+    obstacle.name = "Obstacle"
+    bpy.ops.cube.distribute_cubes()
+    delete_distributed_cubes()
+    
+    print("Moving the obstacle into the grid at (2.5, 2.5, 0)...")
+    obstacle.location = (2.5, 2.5, 0)
+    bpy.ops.cube.distribute_cubes()
+    moved_hits = cubes_hitting(obstacle)
+    delete_distributed_cubes()
+    
+    # Three times as wide, so it reaches the cubes next to its cell too
+    print("Scaling the obstacle's vertices by 3...")
+    co = [0.0] * (len(obstacle.data.vertices) * 3)
+    obstacle.data.vertices.foreach_get("co", co)
+    obstacle.data.vertices.foreach_set("co", [value * 3 for value in co])
+    obstacle.data.update()
+    bpy.ops.cube.distribute_cubes()
+    edited_hits = cubes_hitting(obstacle)
+    
+    print(f"  Cubes inside the obstacle: {moved_hits} after moving, {edited_hits} after editing")
+    if moved_hits == 0 and edited_hits == 0:
+        print("Both distributes avoided the obstacle where it is now")
+    else:
+        print("A distribute used stale obstacle bounds")
+
+
+def count_moved_cubes(rows, cols, spacing):
+    """Count distributed cubes that are not on their rows x cols grid cell"""
+    grid = {(round(j * spacing, 3), round(i * spacing, 3))
+            for i in range(rows) for j in range(cols)}
+    cubes = bpy.data.collections["Distributed Cubes"].objects
+    return sum((round(cube.location.x, 3), round(cube.location.y, 3)) not in grid
+               for cube in cubes)
+
+
+def test_exact_collision():
+    """Test that exact collision frees the space a rotated obstacle leaves empty"""
+    print_separator("TEST 18: Exact Collision Around a Rotated Obstacle")
+    
+    clear_scene()
+    props = bpy.context.scene.cube_manager_props
+    props.number_of_cubes = 16
+    
+    # A thin beam along the diagonal of the 4x4 grid: its bounding box
+    # covers every cell, the beam itself only the 4 on the diagonal
+    print("Creating a beam turned 45 degrees across the grid...")
+    bpy.ops.mesh.primitive_cube_add(size=1, location=(3.75, 3.75, 0),
+                                    rotation=(0, 0, math.radians(45)), scale=(12, 0.3, 1))
+    bpy.context.active_object.name = "Beam"
+    
+    moved = {}
+    for exact in (False, True):
+        props.exact_collision = exact
+        bpy.ops.cube.distribute_cubes()
+        moved[exact] = count_moved_cubes(4, 4, props.spacing)
+        delete_distributed_cubes()
+    props.exact_collision = False
+    
+    print(f"  Cubes moved: {moved[False]} with box collision, {moved[True]} with exact collision")
+    if moved[True] < moved[False]:
+        print("Exact collision moved fewer cubes than box collision")
+    else:
+        print("Exact collision did not free any cells")
+
+
+def test_merge_flat_faces():
+    """Test that Merge Flat Faces keeps the volume and leaves T-junctions"""
+    print_separator("TEST 19: Merge Flat Faces")
+    
+    clear_scene()
+    cubes = []
+    for location in [(0, 0, 0), (1, 0, 0), (0, 1, 0)]:
+        bpy.ops.mesh.primitive_cube_add(size=1, location=location)
+        cubes.append(bpy.context.active_object)
+    for cube in cubes:
+        cube.select_set(True)
+    bpy.context.view_layer.objects.active = cubes[0]
+    
+    print("Composing an L of 3 cubes with Merge Flat Faces on...")
+    props = bpy.context.scene.cube_manager_props
+    props.simplify_faces = True
+    result = bpy.ops.cube.compose_mesh()
+    props.simplify_faces = False
+    
+    obj = bpy.context.scene.objects[0]
+    verts = [obj.matrix_world @ vertex.co for vertex in obj.data.vertices]
+    faces = [list(polygon.vertices) for polygon in obj.data.polygons]
+    
+    # Volume from the divergence theorem, one triangle fan per face
+    volume = sum(verts[face[0]].dot(verts[a].cross(verts[b])) / 6
+                 for face in faces for a, b in zip(face[1:], face[2:]))
+    
+    # A rectangle's edge that smaller faces meet in the middle is not
+    # shared edge for edge with them, so both sides count as open. The top
+    # and bottom split into 2 rectangles each, whose inner corners sit on
+    # the long sides: 4 T-junctions of 3 open edges
+    edge_uses = {}
+    for face in faces:
+        for a, b in zip(face, face[1:] + face[:1]):
+            key = (min(a, b), max(a, b))
+            edge_uses[key] = edge_uses.get(key, 0) + 1
+    open_edges = sum(uses == 1 for uses in edge_uses.values())
+    
+    print(f"  {len(verts)} vertices, {len(faces)} faces, volume {volume:.4f}, "
+          f"{open_edges} edges on T-junctions")
+    if result == {'FINISHED'} and abs(volume - 3) < 1e-4 and open_edges == 12:
+        print("Merged L keeps its volume; its T-junction edges are as documented")
+    else:
+        print("Merged L differs from the documented result")
+
+
+def test_stream_compose():
+    """Test that streaming compose in small chunks gives the plain result"""
+    print_separator("TEST 20: Streaming Compose")
+    
+    # A 4x3x2 block with a notch in one corner, one piece either way
+    cells = [(x, y, z) for x in range(4) for y in range(3) for z in range(2)
+             if (x, y) != (3, 2)]
+    props = bpy.context.scene.cube_manager_props
+    
+    print(f"Composing {len(cells)} cubes at once...")
+    plain = compose_shape(cells, 0.0)
+    print(f"  (vertices, faces) per object: {plain}")
+    
+    # Chunks of 4 cubes, so faces wait in the frontier across chunks
+    core = sys.modules["cube_mesh_manager"].core
+    chunk_size = core.STREAM_CHUNK_SIZE
+    core.STREAM_CHUNK_SIZE = 4
+    props.stream_compose = True
+    try:
+        print(f"Streaming the same {len(cells)} cubes 4 at a time...")
+        streamed = compose_shape(cells, 0.0)
+    finally:
+        props.stream_compose = False
+        core.STREAM_CHUNK_SIZE = chunk_size
+    print(f"  (vertices, faces) per object: {streamed}")
+    
+    if len(plain) == 1 and streamed == plain:
+        print("Streaming compose gives the same single object")
+    else:
+        print("Streaming compose differs from composing at once")
+
+
 def run_all_tests():
     """Run all test suites"""
     print("\n")
@@ -402,6 +846,18 @@ def run_all_tests():
         test_mesh_merging_l_shape()
         test_no_common_faces()
         test_overlap_avoidance()
+        test_shared_mesh_distribution()
+        test_instance_output()
+        test_export()
+        test_modal_cancel()
+        test_lattice_vs_general()
+        test_voxel_shared_faces()
+        test_mesh_rna_shape()
+        test_mixed_cube_sizes()
+        test_obstacle_edits()
+        test_exact_collision()
+        test_merge_flat_faces()
+        test_stream_compose()
         
         # Summary
         elapsed_time = time.time() - start_time